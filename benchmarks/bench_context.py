@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline comparison of plain top-k chat context against MMR + chunk merging
+
+For each labeled query, builds the /chat context two ways from the same
+dense candidates: the plain top-k chunks, and the MMR selection from a
+wider candidate pool with adjacent chunks merged (scripts/context_utils.py).
+Reports context size, distinct sections covered, recall of the labeled
+chunks and selection latency. Query embedding time is excluded.
+
+Usage:
+    python benchmarks/bench_context.py --offline
+    python benchmarks/bench_context.py --offline --lambda 0.3 0.5 0.7 --json
+"""
+
+import argparse
+import json
+import time
+
+from common import percentile
+from retrieval import DenseIndex, embed_queries, load_corpus, load_labeled_queries, recall_at_k, resolve_relevant
+from scripts.context_utils import merge_adjacent_chunks, mmr_select
+
+
+CONTEXT_CANDIDATES = 20  # Same as scripts/api.py
+
+
+def context_chars(passages: list) -> int:
+    """Characters the passages contribute to the prompt (snippets plus per-passage header)."""
+    return sum(len(p["snippet"]) + len(p.get("title") or "") + len(p["slug"]) + 8 for p in passages)
+
+
+def main() -> None:
+    """Evaluate each context strategy and print a summary table or JSON."""
+    parser = argparse.ArgumentParser(description="Compare plain top-k and MMR chat context")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=CONTEXT_CANDIDATES)
+    parser.add_argument("--lambda", dest="lambdas", type=float, nargs="+", default=[0.5, 0.7])
+    parser.add_argument("--offline", action="store_true", help="Use cached corpus and embeddings only")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    documents, vectors = load_corpus(offline=args.offline)
+    queries = load_labeled_queries()
+    query_vectors = embed_queries([q["query"] for q in queries], offline=args.offline)
+
+    dense_index = DenseIndex(documents, vectors)
+    row_of = {doc["chunk_id"]: i for i, doc in enumerate(documents)}
+
+    def top_k(vector):
+        return [{**r, "chunk_ids": [r["chunk_id"]]} for r in dense_index.search(vector, args.top_k)]
+
+    def mmr(lambda_mult):
+        def select(vector):
+            candidates = dense_index.search(vector, max(args.top_k, args.candidates))
+            picked = mmr_select(vector, vectors[[row_of[c["chunk_id"]] for c in candidates]],
+                                args.top_k, lambda_mult=lambda_mult)
+            return merge_adjacent_chunks([candidates[i] for i in picked])
+        return select
+
+    strategies = {"top-k": top_k}
+    for lambda_mult in args.lambdas:
+        strategies[f"mmr-{lambda_mult}"] = mmr(lambda_mult)
+
+    summary = []
+    for name, build in strategies.items():
+        chars, passages, sections, recalls, latencies = [], [], [], [], []
+        for query, vector in zip(queries, query_vectors):
+            relevant = resolve_relevant(query, documents)
+            start = time.perf_counter()
+            context = build(vector)
+            latencies.append((time.perf_counter() - start) * 1000)
+            chunk_ids = [cid for p in context for cid in p["chunk_ids"]]
+            chars.append(context_chars(context))
+            passages.append(len(context))
+            sections.append(len({p["source_path"] for p in context}))
+            recalls.append(recall_at_k(chunk_ids, relevant, len(chunk_ids)))
+
+        summary.append({
+            "strategy": name,
+            "avg_context_chars": round(sum(chars) / len(chars), 1),
+            "avg_passages": round(sum(passages) / len(passages), 2),
+            "avg_sections": round(sum(sections) / len(sections), 2),
+            "recall": round(sum(recalls) / len(recalls), 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        })
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{len(documents)} chunks, {len(queries)} labeled queries, top_k={args.top_k}, "
+          f"candidates={args.candidates}")
+    print(f"{'strategy':<10} {'chars':>8} {'passages':>9} {'sections':>9} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in summary:
+        print(f"{row['strategy']:<10} {row['avg_context_chars']:>8.1f} {row['avg_passages']:>9.2f} "
+              f"{row['avg_sections']:>9.2f} {row['recall']:>8.4f} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark for the API with local stand-ins for every upstream
+
+Starts scripts.api:app under uvicorn in this process, against:
+
+- an in-memory Qdrant (QdrantClient(":memory:")) loaded from
+  data/chunks.json, or synthetic chunks when it is missing, with
+  deterministic hashed bag-of-words vectors and the neighbor graph
+- a fake Cohere embed server and a fake OpenAI server with configurable
+  latency and token streaming (benchmarks/fakes.py)
+- a local Postgres for the auth routes (BENCH_DATABASE_URL); the auth
+  scenario is skipped when it is unreachable
+
+The app's startup runs unchanged except that Qdrant is the seeded
+in-memory client and .env is not read: every setting comes from the
+environment this script builds, so nothing leaves the machine.
+
+Each scenario (/search, /chat, /personalize, /translate, auth sign-in +
+session) is driven at each concurrency level for a fixed number of
+requests, and throughput and p50/p95/p99 latency are printed as JSON.
+
+Usage:
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --scenarios search chat --concurrency 1 8 32 --requests 200
+    python benchmarks/bench_e2e.py --llm-first-token-ms 800 --llm-token-ms 10 --output e2e.json
+    BENCH_DATABASE_URL=postgresql://localhost/bench python benchmarks/bench_e2e.py --scenarios auth
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import psycopg2
+import uvicorn
+
+from common import REPO_ROOT, load_script, percentile, synthetic_chunks
+from fakes import FakeCohere, FakeOpenAI, hashed_embedding
+from retrieval import load_labeled_queries
+
+
+SCENARIOS = ["search", "chat", "personalize", "translate", "auth"]
+DEFAULT_CHUNKS_PATH = REPO_ROOT / "data" / "chunks.json"
+DEFAULT_DATABASE_URL = "postgresql://postgres@localhost:5432/bench_rag"
+BENCH_PASSWORD = "bench-password"
+BENCH_PROFILE = {
+    "programming_level": "intermediate",
+    "hardware_background": "hobbyist",
+    "learning_goals": ["upskilling"],
+}
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def load_chunks(path: Path, synthetic_count: int) -> list:
+    """Chunks from data/chunks.json, or synthetic chunks spread over six chapters."""
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))["chunks"]
+    print(f"{path} not found - using {synthetic_count} synthetic chunks", file=sys.stderr)
+    return synthetic_chunks(synthetic_count, chunks_per_doc=max(1, -(-synthetic_count // 6)))
+
+
+def seed_qdrant(chunks: list):
+    """In-memory Qdrant holding book_vectors with hashed vectors and neighbors."""
+    import numpy as np
+    from qdrant_client import QdrantClient
+
+    embed_vectors = load_script("embed-vectors.py")
+    qdrant = QdrantClient(":memory:")
+    embedded = [{"chunk": chunk, "embedding": hashed_embedding(chunk["text"])} for chunk in chunks]
+    vectors = np.array([item["embedding"] for item in embedded], dtype=np.float32)
+    neighbors = embed_vectors.compute_neighbors([c["chunk_id"] for c in chunks], vectors)
+
+    # Silence the pipeline's progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        embed_vectors.ensure_collection(qdrant)
+        embed_vectors.upsert_vectors(qdrant, embed_vectors.build_vector_points(embedded, neighbors))
+    return qdrant
+
+
+def prepare_database(database_url: str) -> bool:
+    """Create the users table and the benchmark user; False if Postgres is unreachable."""
+    try:
+        conn = psycopg2.connect(database_url, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        print(f"Postgres unavailable ({str(e).strip()}) - skipping auth", file=sys.stderr)
+        return False
+    try:
+        with conn.cursor() as cur:
+            load_script("create_users_table.py").create_schema(cur)
+        conn.commit()
+    finally:
+        conn.close()
+    return True
+
+
+def chapters_in(chunks: list) -> list:
+    """Chapter slugs (as /personalize and /translate take them) present in the corpus."""
+    from scripts.personalization_utils import VALID_CHAPTER_SLUGS
+
+    found = set()
+    for chunk in chunks:
+        parts = chunk["source_path"].split("/")
+        if len(parts) > 2 and parts[1] in VALID_CHAPTER_SLUGS:
+            found.add(parts[1])
+        elif chunk["source_path"].startswith("docs/intro"):
+            found.add("intro")
+    return sorted(found)
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+class AppServer:
+    """uvicorn running scripts.api:app on an ephemeral port in a background thread."""
+
+    def __init__(self, app):
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self, timeout: float = 60.0) -> str:
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        base_url = f"http://{host}:{port}"
+        # Clients and indexes are set up in the background: measure only once ready
+        while httpx.get(f"{base_url}/health/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise RuntimeError("API server not ready")
+            time.sleep(0.05)
+        return base_url
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+# =============================================================================
+# Load Generation
+# =============================================================================
+
+def build_scenarios(queries: list, chapters: list) -> dict:
+    """Scenario name -> async fn(client, i) returning the final HTTP status."""
+
+    async def search(client, i):
+        response = await client.post("/search", json={"query": queries[i % len(queries)]})
+        return response.status_code
+
+    async def chat(client, i):
+        response = await client.post("/chat", json={"message": queries[i % len(queries)]})
+        return response.status_code
+
+    async def personalize(client, i):
+        response = await client.post("/personalize", json={
+            "chapter_slug": chapters[i % len(chapters)],
+            "user_profile": BENCH_PROFILE,
+        })
+        return response.status_code
+
+    async def translate(client, i):
+        response = await client.post("/translate", json={
+            "chapter_id": chapters[i % len(chapters)],
+            "user_id": "bench-user",
+        })
+        return response.status_code
+
+    async def auth(client, i):
+        # One sign-in (password hash check) and one session lookup per iteration
+        response = await client.post("/api/auth/sign-in", json={
+            "email": client.bench_email,
+            "password": BENCH_PASSWORD,
+        })
+        if response.status_code != 200:
+            return response.status_code
+        response = await client.get("/api/auth/session", cookies=response.cookies)
+        return response.status_code
+
+    return {"search": search, "chat": chat, "personalize": personalize, "translate": translate, "auth": auth}
+
+
+async def run_level(base_url: str, scenario, concurrency: int, requests: int, warmup: int, email: str) -> dict:
+    """Run requests calls of one scenario with concurrency workers; return the stats row."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        client.bench_email = email
+        for i in range(warmup):
+            await scenario(client, i)
+
+        latencies, statuses = [], {}
+        next_index = 0
+
+        async def worker():
+            nonlocal next_index
+            while next_index < requests:
+                i = next_index
+                next_index += 1
+                start = time.perf_counter()
+                try:
+                    status = str(await scenario(client, warmup + i))
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ok = sum(count for status, count in statuses.items() if status.isdigit() and int(status) < 400)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - ok,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def sign_up(base_url: str) -> str:
+    """Register a fresh benchmark user and return its email."""
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+        response = await client.post("/api/auth/sign-up", json={
+            "email": email,
+            "password": BENCH_PASSWORD,
+            "name": "Bench User",
+            "programmingLevel": "intermediate",
+            "hardwareBackground": "hobbyist",
+            "learningGoals": ["upskilling"],
+        })
+    if response.status_code != 201:
+        raise RuntimeError(f"Benchmark sign-up failed: {response.status_code} {response.text}")
+    return email
+
+
+def main() -> None:
+    """Start the fakes and the API, drive every scenario and print the results as JSON."""
+    parser = argparse.ArgumentParser(description="End-to-end API load benchmark against local fakes")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each level")
+    parser.add_argument("--chunks", type=Path, default=DEFAULT_CHUNKS_PATH)
+    parser.add_argument("--synthetic-chunks", type=int, default=600,
+                        help="Synthetic corpus size when --chunks is missing")
+    parser.add_argument("--embed-latency-ms", type=float, default=30.0)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300.0)
+    parser.add_argument("--llm-token-ms", type=float, default=5.0)
+    parser.add_argument("--llm-tokens", type=int, default=120, help="Completion tokens per LLM call")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="Keep the API's INFO logs")
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL)
+    if "neon.tech" in database_url:
+        print("Error: refusing to benchmark against Neon - use a local scratch database")
+        sys.exit(1)
+
+    cohere_server = FakeCohere(latency_ms=args.embed_latency_ms).start()
+    openai_server = FakeOpenAI(args.llm_first_token_ms, args.llm_token_ms, args.llm_tokens).start()
+    os.environ.update({
+        "COHERE_API_KEY": "bench",
+        "COHERE_BASE_URL": cohere_server.base_url,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai_server.base_url}/v1",
+        "QDRANT_URL": ":memory:",
+        "QDRANT_API_KEY": "bench",
+        "DATABASE_URL": database_url,
+        "BETTER_AUTH_SECRET": "bench-secret",
+        "ENVIRONMENT": "development",  # Session cookie without Secure, so it is sent over http
+    })
+
+    scenarios = list(args.scenarios)
+    if "auth" in scenarios and not prepare_database(database_url):
+        scenarios.remove("auth")
+
+    chunks = load_chunks(args.chunks, args.synthetic_chunks)
+    qdrant = seed_qdrant(chunks)
+
+    from scripts import api
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    api.load_env = lambda: None  # The environment above is complete; never read .env
+    api.init_qdrant_client = lambda: qdrant
+
+    server = AppServer(api.app)
+    base_url = server.start()
+
+    queries = [q["query"] for q in load_labeled_queries()]
+    scenario_fns = build_scenarios(queries, chapters_in(chunks) or ["chapter-1"])
+
+    results = []
+    try:
+        email = asyncio.run(sign_up(base_url)) if "auth" in scenarios else None
+        for name in scenarios:
+            for concurrency in args.concurrency:
+                row = asyncio.run(run_level(
+                    base_url, scenario_fns[name], concurrency, args.requests, args.warmup, email
+                ))
+                results.append({"scenario": name, **row})
+                print(f"{name:<12} c={concurrency:<4} {row['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {row['p50_ms']:>8.1f}ms  p99 {row['p99_ms']:>8.1f}ms  "
+                      f"errors {row['errors']}", file=sys.stderr)
+    finally:
+        server.stop()
+        cohere_server.stop()
+        openai_server.stop()
+
+    report = {
+        "config": {
+            "chunks": len(chunks),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "embed_latency_ms": args.embed_latency_ms,
+            "llm_first_token_ms": args.llm_first_token_ms,
+            "llm_token_ms": args.llm_token_ms,
+            "llm_tokens": args.llm_tokens,
+            "skipped": [s for s in args.scenarios if s not in scenarios],
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-latency sweep for HNSW build and search parameters
+
+Copies the live book_vectors points into scratch collections built with
+each (m, ef_construct) pair, then queries them with each hnsw_ef value
+and compares the results against exact search on the same collection.
+Queries are chunk vectors sampled from the corpus and held out of the
+scratch collections, so no Cohere calls are needed and no query finds
+itself: a self-match is always the exact top hit and an easy one for
+HNSW, which would inflate recall.
+
+Scratch collections use a tiny indexing_threshold so the HNSW graph is
+actually built: at book scale the default threshold keeps every segment
+below it and Qdrant falls back to a full scan.
+
+Usage:
+    python benchmarks/bench_hnsw_recall.py
+    python benchmarks/bench_hnsw_recall.py --m 8 16 32 --ef-construct 64 128 --hnsw-ef 16 32 64 128
+    python benchmarks/bench_hnsw_recall.py --queries 200 --top-k 5 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CollectionStatus,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PointStruct,
+    SearchParams,
+    VectorParams,
+)
+
+from common import REPO_ROOT, percentile
+
+
+SOURCE_COLLECTION = "book_vectors"
+SCRATCH_PREFIX = "book_vectors_bench"
+SCROLL_LIMIT = 256
+
+
+def load_corpus(qdrant: QdrantClient) -> List[PointStruct]:
+    """Read every point (vector + payload) from the live collection."""
+    points = []
+    offset = None
+    while True:
+        batch, offset = qdrant.scroll(
+            collection_name=SOURCE_COLLECTION,
+            limit=SCROLL_LIMIT,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        points.extend(PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in batch)
+        if offset is None:
+            break
+    return points
+
+
+def build_scratch_collection(
+    qdrant: QdrantClient,
+    points: List[PointStruct],
+    m: int,
+    ef_construct: int
+) -> str:
+    """Create a scratch collection with the given HNSW config and wait for its index."""
+    name = f"{SCRATCH_PREFIX}_m{m}_ef{ef_construct}"
+    if qdrant.collection_exists(name):
+        qdrant.delete_collection(name)
+
+    qdrant.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=len(points[0].vector), distance=Distance.COSINE),
+        hnsw_config=HnswConfigDiff(m=m, ef_construct=ef_construct, full_scan_threshold=1),
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=1)
+    )
+    qdrant.upload_points(collection_name=name, points=points, batch_size=256, wait=True)
+
+    while qdrant.get_collection(name).status != CollectionStatus.GREEN:
+        time.sleep(0.5)
+    return name
+
+
+def sweep(
+    qdrant: QdrantClient,
+    collection: str,
+    queries: List[List[float]],
+    top_k: int,
+    hnsw_efs: List[int]
+) -> List[Dict]:
+    """Measure recall@k and latency for each hnsw_ef against exact search."""
+    truth = []
+    exact_latencies = []
+    for vector in queries:
+        start = time.perf_counter()
+        result = qdrant.query_points(
+            collection_name=collection,
+            query=vector,
+            limit=top_k,
+            search_params=SearchParams(exact=True),
+            with_payload=False
+        )
+        exact_latencies.append((time.perf_counter() - start) * 1000)
+        truth.append({p.id for p in result.points})
+
+    rows = [{
+        "hnsw_ef": "exact",
+        "recall": 1.0,
+        "p50_ms": round(percentile(exact_latencies, 50), 2),
+        "p95_ms": round(percentile(exact_latencies, 95), 2),
+    }]
+
+    for hnsw_ef in hnsw_efs:
+        hits = 0
+        latencies = []
+        for vector, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = qdrant.query_points(
+                collection_name=collection,
+                query=vector,
+                limit=top_k,
+                search_params=SearchParams(hnsw_ef=hnsw_ef),
+                with_payload=False
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected & {p.id for p in result.points})
+
+        rows.append({
+            "hnsw_ef": hnsw_ef,
+            "recall": round(hits / (len(queries) * top_k), 4),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+        })
+    return rows
+
+
+def main() -> None:
+    """Run the (m, ef_construct) x hnsw_ef sweep and print a table or JSON."""
+    parser = argparse.ArgumentParser(description="HNSW recall-vs-latency sweep")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[8, 16, 32, 64, 128])
+    parser.add_argument("--queries", type=int, default=100, help="Number of held-out query vectors")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep scratch collections afterwards")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    env_path = REPO_ROOT / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+    qdrant = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+
+    points = load_corpus(qdrant)
+    random.Random(args.seed).shuffle(points)
+    held_out = min(args.queries, len(points) - args.top_k)
+    queries = [p.vector for p in points[:held_out]]
+    points = points[held_out:]
+    if not args.json:
+        print(f"Corpus: {len(points)} points indexed, {len(queries)} held-out queries, top_k={args.top_k}")
+
+    results = []
+    for m in args.m:
+        for ef_construct in args.ef_construct:
+            collection = build_scratch_collection(qdrant, points, m, ef_construct)
+            for row in sweep(qdrant, collection, queries, args.top_k, args.hnsw_ef):
+                row = {"m": m, "ef_construct": ef_construct, **row}
+                results.append(row)
+                if not args.json:
+                    print(f"m={m:<3} ef_construct={ef_construct:<4} hnsw_ef={row['hnsw_ef']!s:<6} "
+                          f"recall@{args.top_k}={row['recall']:.4f}  "
+                          f"p50={row['p50_ms']:.2f}ms  p95={row['p95_ms']:.2f}ms")
+            if not args.keep:
+                qdrant.delete_collection(collection)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation of the chat re-ranking stage
+
+Compares sending the plain dense top-5 chunks to the LLM against
+re-ranking a wider dense candidate pool (scripts/rerank_utils.py) and
+sending only the top 2 or 3. Reports recall of the labeled chunks, the
+share of queries with at least one relevant chunk in context (hit rate),
+context size, and re-ranking latency with a cold and a warm score cache.
+
+The question this answers: does the re-ranked top 2-3 keep (or beat) the
+hit rate and recall of the dense top 5 at roughly half the context?
+
+Usage:
+    python benchmarks/bench_rerank.py --offline
+    python benchmarks/bench_rerank.py --offline --reranker lexical cross-encoder --json
+"""
+
+import argparse
+import json
+import time
+
+from common import percentile
+from retrieval import DenseIndex, embed_queries, load_corpus, load_labeled_queries, resolve_relevant
+from scripts.rerank_utils import RERANKERS, ScoreCache, create_reranker
+from scripts.search_utils import BM25Index
+
+
+CONTEXT_CANDIDATES = 20  # Same as scripts/api.py
+BASELINE_TOP_K = 5  # DEFAULT_TOP_K in scripts/api.py
+
+
+def evaluate(name, contexts, relevants, latencies=None):
+    """Summarize one strategy from its per-query contexts."""
+    recalls, hits, chars = [], [], []
+    for context, relevant in zip(contexts, relevants):
+        found = {r["chunk_id"] for r in context} & relevant
+        recalls.append(len(found) / len(relevant) if relevant else 0.0)
+        hits.append(1.0 if found else 0.0)
+        chars.append(sum(len(r["snippet"]) for r in context))
+
+    row = {
+        "strategy": name,
+        "chunks": max(len(c) for c in contexts),
+        "recall": round(sum(recalls) / len(recalls), 4),
+        "hit_rate": round(sum(hits) / len(hits), 4),
+        "avg_context_chars": round(sum(chars) / len(chars), 1),
+    }
+    if latencies:
+        cold, warm = latencies
+        row["cold_p50_ms"] = round(percentile(cold, 50), 3)
+        row["warm_p50_ms"] = round(percentile(warm, 50), 3)
+    return row
+
+
+def main() -> None:
+    """Evaluate dense top-k against re-ranked top-k and print a table or JSON."""
+    parser = argparse.ArgumentParser(description="Evaluate the chat re-ranking stage")
+    parser.add_argument("--reranker", nargs="+", default=["lexical"], choices=RERANKERS[1:])
+    parser.add_argument("--keep", type=int, nargs="+", default=[2, 3], help="Chunks kept after re-ranking")
+    parser.add_argument("--candidates", type=int, default=CONTEXT_CANDIDATES)
+    parser.add_argument("--offline", action="store_true", help="Use cached corpus and embeddings only")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    documents, vectors = load_corpus(offline=args.offline)
+    queries = load_labeled_queries()
+    query_vectors = embed_queries([q["query"] for q in queries], offline=args.offline)
+    relevants = [resolve_relevant(q, documents) for q in queries]
+
+    dense_index = DenseIndex(documents, vectors)
+    pools = [dense_index.search(v, args.candidates) for v in query_vectors]
+
+    summary = [evaluate(f"dense-top{BASELINE_TOP_K}", [pool[:BASELINE_TOP_K] for pool in pools], relevants)]
+    for keep in args.keep:
+        summary.append(evaluate(f"dense-top{keep}", [pool[:keep] for pool in pools], relevants))
+
+    idf = BM25Index(documents).term_idf()
+    for kind in args.reranker:
+        reranker = create_reranker(kind, idf=idf)
+        for keep in args.keep:
+            # Fresh cache per row so the cold pass really is cold
+            reranker.cache = ScoreCache(reranker.cache.max_size)
+            latencies = ([], [])
+            for pass_latencies in latencies:
+                contexts = []
+                for query, pool in zip(queries, pools):
+                    start = time.perf_counter()
+                    contexts.append(reranker.rerank(query["query"], pool, keep))
+                    pass_latencies.append((time.perf_counter() - start) * 1000)
+            summary.append(evaluate(f"{reranker.name}-top{keep}", contexts, relevants, latencies))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{len(documents)} chunks, {len(queries)} labeled queries, {args.candidates} candidates")
+    print(f"{'strategy':<22} {'chunks':>6} {'recall':>8} {'hit rate':>9} {'chars':>8} {'cold ms':>8} {'warm ms':>8}")
+    for row in summary:
+        cold = f"{row['cold_p50_ms']:>8.3f}" if "cold_p50_ms" in row else f"{'-':>8}"
+        warm = f"{row['warm_p50_ms']:>8.3f}" if "warm_p50_ms" in row else f"{'-':>8}"
+        print(f"{row['strategy']:<22} {row['chunks']:>6} {row['recall']:>8.4f} {row['hit_rate']:>9.4f} "
+              f"{row['avg_context_chars']:>8.1f} {cold} {warm}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline comparison of dense, sparse (BM25) and hybrid (RRF) retrieval
+
+Runs the labeled queries in queries.json through the same BM25 index and
+fusion code the API uses (scripts/search_utils.py) and a NumPy stand-in
+for the Qdrant dense search, then reports recall@k, MRR and per-query
+latency for each mode. Query embedding time is excluded.
+
+The first run pulls vectors from Qdrant and query embeddings from Cohere
+into benchmarks/.cache; --offline runs use only that cache.
+
+Usage:
+    python benchmarks/bench_retrieval_modes.py
+    python benchmarks/bench_retrieval_modes.py --offline --top-k 5 --json
+"""
+
+import argparse
+import json
+import time
+
+from common import percentile
+from retrieval import (
+    DenseIndex,
+    embed_queries,
+    load_corpus,
+    load_labeled_queries,
+    recall_at_k,
+    reciprocal_rank,
+    resolve_relevant,
+)
+from scripts.search_utils import BM25Index, reciprocal_rank_fusion
+
+
+HYBRID_CANDIDATES = 20  # Same as scripts/api.py
+
+
+def main() -> None:
+    """Evaluate each retrieval mode and print a summary table or JSON."""
+    parser = argparse.ArgumentParser(description="Compare dense, sparse and hybrid retrieval")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--offline", action="store_true", help="Use cached corpus and embeddings only")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    documents, vectors = load_corpus(offline=args.offline)
+    queries = load_labeled_queries()
+    query_vectors = embed_queries([q["query"] for q in queries], offline=args.offline)
+
+    dense_index = DenseIndex(documents, vectors)
+    bm25_index = BM25Index(documents)
+    candidates = max(args.top_k, HYBRID_CANDIDATES)
+
+    retrievers = {
+        "dense": lambda q, v: dense_index.search(v, args.top_k),
+        "sparse": lambda q, v: bm25_index.search(q, args.top_k),
+        "hybrid": lambda q, v: reciprocal_rank_fusion(
+            [dense_index.search(v, candidates), bm25_index.search(q, candidates)],
+            args.top_k
+        ),
+    }
+
+    summary = []
+    for mode, retrieve in retrievers.items():
+        recalls, rrs, latencies = [], [], []
+        for query, vector in zip(queries, query_vectors):
+            relevant = resolve_relevant(query, documents)
+            start = time.perf_counter()
+            results = retrieve(query["query"], vector)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ranked = [r["chunk_id"] for r in results]
+            recalls.append(recall_at_k(ranked, relevant, args.top_k))
+            rrs.append(reciprocal_rank(ranked, relevant))
+
+        summary.append({
+            "mode": mode,
+            f"recall@{args.top_k}": round(sum(recalls) / len(recalls), 4),
+            "mrr": round(sum(rrs) / len(rrs), 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        })
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{len(documents)} chunks, {len(queries)} labeled queries, top_k={args.top_k}")
+    print(f"{'mode':<8} {'recall@' + str(args.top_k):>10} {'MRR':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in summary:
+        print(f"{row['mode']:<8} {row[f'recall@{args.top_k}']:>10.4f} {row['mrr']:>8.4f} "
+              f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality and latency regression harness for the search path
+
+Runs the labeled queries in queries.json (labels are chunk_ids or
+source_path + phrase pairs) through the search path and reports
+recall@k, MRR and nDCG@k next to per-query latency, per retrieval mode.
+
+- live (default): scripts/api.py's own embed_query, vector_search,
+  keyword_search and hybrid_search against the configured Cohere and
+  Qdrant, so embedding time is measured too
+- --offline: local equivalents (NumPy dense index over the cached
+  vectors, the API's BM25 index and fusion) with cached query embeddings
+
+Every run is stored as JSON under benchmarks/results/ (run metadata with
+the git commit, the summary and every query's ranking), so a change to
+chunking, embeddings or search parameters can be compared with earlier
+runs: --compare diffs against the latest stored run of the same source,
+or against a given results file.
+
+Usage:
+    python benchmarks/bench_search_quality.py --offline
+    python benchmarks/bench_search_quality.py --mode dense hybrid --label chunk-512 --compare
+    python benchmarks/bench_search_quality.py --offline --compare benchmarks/results/search-quality-20250101-120000.json
+"""
+
+import argparse
+import json
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from common import REPO_ROOT, percentile
+from retrieval import (
+    QUERIES_PATH,
+    DenseIndex,
+    embed_queries,
+    load_corpus,
+    load_labeled_queries,
+    ndcg_at_k,
+    recall_at_k,
+    reciprocal_rank,
+    resolve_relevant,
+)
+from scripts.search_utils import BM25Index, reciprocal_rank_fusion
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+RESULTS_PREFIX = "search-quality"
+MODES = ["dense", "sparse", "hybrid"]
+HYBRID_CANDIDATES = 20  # Same as scripts/api.py
+DEFAULT_KS = [1, 3, 5, 10]
+COMPARED_METRICS = ["mrr", "ndcg", "search_p50_ms", "search_p95_ms"]
+
+
+# =============================================================================
+# Retrievers
+# =============================================================================
+
+def offline_retrievers(documents, vectors, queries, top_k: int) -> tuple:
+    """(embed(i, text), {mode: search(text, vector)}) over the local cache."""
+    query_vectors = embed_queries([q["query"] for q in queries], offline=True)
+    dense_index = DenseIndex(documents, vectors)
+    bm25_index = BM25Index(documents)
+    candidates = max(top_k, HYBRID_CANDIDATES)
+
+    retrievers = {
+        "dense": lambda text, vector: dense_index.search(vector, top_k),
+        "sparse": lambda text, vector: bm25_index.search(text, top_k),
+        "hybrid": lambda text, vector: reciprocal_rank_fusion(
+            [dense_index.search(vector, candidates), bm25_index.search(text, candidates)],
+            top_k
+        ),
+    }
+    return (lambda i, text: query_vectors[i]), retrievers
+
+
+def live_retrievers(modes, top_k: int) -> tuple:
+    """(embed(i, text), {mode: search(text, vector)}) through scripts/api.py."""
+    from scripts import api
+
+    api.load_env()
+    api.cohere_client = api.init_cohere_client()
+    api.qdrant_client = api.init_qdrant_client()
+    if set(modes) & {"sparse", "hybrid"}:
+        api.bm25_index = api.build_bm25_index_from_qdrant(api.qdrant_client, api.COLLECTION_NAME)
+
+    retrievers = {
+        "dense": lambda text, vector: api.vector_search(vector, top_k),
+        "sparse": lambda text, vector: api.keyword_search(text, top_k),
+        "hybrid": lambda text, vector: api.hybrid_search(text, vector, top_k),
+    }
+    return (lambda i, text: api.embed_query(text)), retrievers
+
+
+# =============================================================================
+# Evaluation
+# =============================================================================
+
+def evaluate_mode(mode, search, embed, queries, relevants, top_k: int, ks) -> tuple:
+    """Return (summary row, per-query rows) for one retrieval mode."""
+    rows = []
+    for i, (query, relevant) in enumerate(zip(queries, relevants)):
+        start = time.perf_counter()
+        vector = embed(i, query["query"]) if mode != "sparse" else None
+        embed_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        results = search(query["query"], vector)
+        search_ms = (time.perf_counter() - start) * 1000
+
+        ranked = [r["chunk_id"] for r in results]
+        first_hit = next((rank for rank, cid in enumerate(ranked, 1) if cid in relevant), None)
+        rows.append({
+            "id": query.get("id"),
+            "query": query["query"],
+            "relevant": sorted(relevant),
+            "ranked": ranked,
+            "first_relevant_rank": first_hit,
+            "recall": {str(k): round(recall_at_k(ranked, relevant, k), 4) for k in ks},
+            "rr": round(reciprocal_rank(ranked, relevant), 4),
+            "ndcg": round(ndcg_at_k(ranked, relevant, top_k), 4),
+            "embed_ms": round(embed_ms, 3),
+            "search_ms": round(search_ms, 3),
+        })
+
+    def mean(values):
+        return round(sum(values) / len(values), 4) if values else 0.0
+
+    search_ms = [r["search_ms"] for r in rows]
+    embed_ms = [r["embed_ms"] for r in rows]
+    summary = {
+        "mode": mode,
+        **{f"recall@{k}": mean([r["recall"][str(k)] for r in rows]) for k in ks},
+        "mrr": mean([r["rr"] for r in rows]),
+        "ndcg": mean([r["ndcg"] for r in rows]),
+        "misses": sum(1 for r in rows if r["first_relevant_rank"] is None),
+        "search_p50_ms": round(percentile(search_ms, 50), 3),
+        "search_p95_ms": round(percentile(search_ms, 95), 3),
+        "search_p99_ms": round(percentile(search_ms, 99), 3),
+        "embed_p50_ms": round(percentile(embed_ms, 50), 3),
+        "embed_p95_ms": round(percentile(embed_ms, 95), 3),
+    }
+    return summary, rows
+
+
+def git_commit() -> str:
+    """Short HEAD commit (with -dirty for uncommitted changes), or "unknown"."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_run(report: dict) -> Path:
+    """Write a run to benchmarks/results/ and return its path."""
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    path = RESULTS_DIR / f"{RESULTS_PREFIX}-{stamp}.json"
+    suffix = 1
+    while path.exists():
+        suffix += 1
+        path = RESULTS_DIR / f"{RESULTS_PREFIX}-{stamp}-{suffix}.json"
+    path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def find_baseline(source: str, exclude: Path = None):
+    """Latest stored run with the same source (live/offline), or None."""
+    for path in sorted(RESULTS_DIR.glob(f"{RESULTS_PREFIX}-*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        if path == exclude:
+            continue
+        report = json.loads(path.read_text(encoding="utf-8"))
+        if report["run"]["source"] == source:
+            return path
+    return None
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """Per-mode metric deltas of report against baseline (modes in both only)."""
+    base_rows = {row["mode"]: row for row in baseline["summary"]}
+    metrics = [m for m in report["summary"][0] if m.startswith("recall@")] + COMPARED_METRICS
+    deltas = []
+    for row in report["summary"]:
+        base = base_rows.get(row["mode"])
+        if base is None:
+            continue
+        for metric in metrics:
+            if metric in row and metric in base:
+                deltas.append({
+                    "mode": row["mode"],
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": row[metric],
+                    "delta": round(row[metric] - base[metric], 4),
+                })
+    return deltas
+
+
+def main() -> None:
+    """Evaluate the search path, store the run and print a summary (and comparison)."""
+    parser = argparse.ArgumentParser(description="Search quality and latency regression harness")
+    parser.add_argument("--mode", dest="modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--top-k", type=int, default=10, help="Results retrieved per query (nDCG cutoff)")
+    parser.add_argument("--k", dest="ks", type=int, nargs="+", default=DEFAULT_KS, help="Recall cutoffs")
+    parser.add_argument("--queries", type=Path, default=QUERIES_PATH, help="Labeled query set")
+    parser.add_argument("--label", default="", help="Free-form note stored with the run (e.g. the change tested)")
+    parser.add_argument("--offline", action="store_true", help="Use local indexes with cached corpus and embeddings")
+    parser.add_argument("--compare", nargs="?", const="latest", metavar="RESULTS_JSON",
+                        help="Diff against a stored run (default: latest run with the same source)")
+    parser.add_argument("--no-save", action="store_true", help="Do not store this run")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    ks = sorted(k for k in set(args.ks) if k <= args.top_k)
+    queries = load_labeled_queries(args.queries)
+    documents, vectors = load_corpus(offline=args.offline)
+    relevants = [resolve_relevant(q, documents) for q in queries]
+    unresolved = [q.get("id") or q["query"] for q, rel in zip(queries, relevants) if not rel]
+
+    source = "offline" if args.offline else "live"
+    if args.offline:
+        embed, retrievers = offline_retrievers(documents, vectors, queries, args.top_k)
+    else:
+        embed, retrievers = live_retrievers(args.modes, args.top_k)
+
+    summary, per_query = [], {}
+    for mode in args.modes:
+        row, rows = evaluate_mode(mode, retrievers[mode], embed, queries, relevants, args.top_k, ks)
+        summary.append(row)
+        per_query[mode] = rows
+
+    report = {
+        "run": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "label": args.label,
+            "source": source,
+            "top_k": args.top_k,
+            "ks": ks,
+            "queries_file": str(args.queries),
+            "queries": len(queries),
+            "unresolved_queries": unresolved,
+            "corpus_chunks": len(documents),
+        },
+        "summary": summary,
+        "queries": per_query,
+    }
+    saved = None if args.no_save else save_run(report)
+
+    deltas, baseline_path = None, None
+    if args.compare:
+        baseline_path = find_baseline(source, exclude=saved) if args.compare == "latest" else Path(args.compare)
+        if baseline_path is not None:
+            deltas = compare(report, json.loads(baseline_path.read_text(encoding="utf-8")))
+
+    if args.json:
+        print(json.dumps({**report, "saved_to": str(saved) if saved else None,
+                          "baseline": str(baseline_path) if baseline_path else None, "deltas": deltas}, indent=2))
+        return
+
+    print(f"{source}: {len(documents)} chunks, {len(queries)} labeled queries, top_k={args.top_k}")
+    if unresolved:
+        print(f"warning: no relevant chunk found for {', '.join(unresolved)}")
+    recall_cols = [f"recall@{k}" for k in ks]
+    print(f"{'mode':<8} " + " ".join(f"{c:>10}" for c in recall_cols)
+          + f" {'MRR':>8} {'nDCG':>8} {'misses':>7} {'p50 ms':>9} {'p95 ms':>9} {'embed p50':>10}")
+    for row in summary:
+        print(f"{row['mode']:<8} " + " ".join(f"{row[c]:>10.4f}" for c in recall_cols)
+              + f" {row['mrr']:>8.4f} {row['ndcg']:>8.4f} {row['misses']:>7} "
+              f"{row['search_p50_ms']:>9.3f} {row['search_p95_ms']:>9.3f} {row['embed_p50_ms']:>10.3f}")
+    if saved:
+        print(f"\nSaved to {saved.relative_to(REPO_ROOT)}")
+
+    if args.compare and baseline_path is None:
+        print("No earlier run to compare against")
+    elif deltas is not None:
+        print(f"\nAgainst {baseline_path.name}:")
+        print(f"{'mode':<8} {'metric':<16} {'baseline':>10} {'current':>10} {'delta':>10}")
+        for d in deltas:
+            print(f"{d['mode']:<8} {d['metric']:<16} {d['baseline']:>10.4f} {d['current']:>10.4f} {d['delta']:>+10.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Response serialization and compression cost per endpoint
+
+Builds a representative response body for each hot endpoint with the
+API's own response models and measures:
+
+- serialization CPU: the model_dump(mode="json") FastAPI runs for a
+  response_model, then rendering with the stock JSONResponse (json.dumps)
+  and with ORJSONResponse
+- bytes on the wire: raw JSON, gzip and (if the brotli package is
+  installed) brotli at the levels scripts/compression_utils.py can use,
+  with the CPU time each compression takes
+
+Search, chat and personalize bodies come from the book chapters in docs/;
+translate is Urdu markdown built from a repeated sample, so its
+compression ratio is optimistic. CPU times are process CPU per call
+(time.process_time over --iterations).
+
+Usage:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --content-kb 10 30 --json
+"""
+
+import argparse
+import gzip
+import json
+import time
+
+from common import REPO_ROOT
+from fastapi.responses import JSONResponse, ORJSONResponse
+from scripts import api
+from scripts.compression_utils import BROTLI_QUALITY, GZIP_LEVEL, brotli
+
+
+SNIPPET_CHARS = 800
+URDU_PARAGRAPH = (
+    "انسان نما روبوٹ اپنا توازن برقرار رکھنے کے لیے زیرو مومنٹ پوائنٹ کو سپورٹ پولیگون کے اندر رکھتا ہے، "
+    "جبکہ کنٹرولر مرکزِ کمیت کی منصوبہ بند رفتار کو مسلسل ٹریک کرتا ہے۔ "
+)
+
+
+def chapter_texts() -> list:
+    """(slug, title, markdown) for each chapter in docs/."""
+    chapters = []
+    for path in sorted((REPO_ROOT / "docs").glob("chapter-*/index.md")):
+        text = path.read_text(encoding="utf-8")
+        title = next((line[2:].strip() for line in text.splitlines() if line.startswith("# ")), path.parent.name)
+        chapters.append((path.parent.name, title, text))
+    return chapters
+
+
+def sized(text: str, target_chars: int) -> str:
+    """Repeat text until it is target_chars long."""
+    return (text * (target_chars // max(len(text), 1) + 1))[:target_chars]
+
+
+def build_payloads(content_kb: int) -> dict:
+    """One response model instance per endpoint."""
+    chapters = chapter_texts()
+    snippets = []
+    for slug, title, text in chapters:
+        for i in range(0, len(text), SNIPPET_CHARS):
+            snippets.append((f"{slug}-{i // SNIPPET_CHARS:04d}", slug, title, text[i:i + SNIPPET_CHARS]))
+
+    results = [
+        api.SearchResult(chunk_id=cid, snippet=snippet, source_path=f"docs/{slug}/index.md",
+                         slug=slug, title=title, score=round(0.9 - i * 0.03, 4))
+        for i, (cid, slug, title, snippet) in enumerate(snippets[:10])
+    ]
+    slug, title, text = chapters[0]
+    target_chars = content_kb * 1024
+
+    return {
+        "/search": api.SearchResponse(query="how does a humanoid keep its balance", results=results),
+        "/chat": api.ChatResponse(
+            session_id="6f1c2b4e-8d0a-4c55-9e61-0a7b3c2d1e90",
+            message=sized(text, 3000),
+            sources=[api.Source(chunk_id=r.chunk_id, title=r.title, slug=r.slug, score=r.score) for r in results[:5]],
+            metadata=api.ResponseMetadata(response_time_ms=2140, tokens_used=1830, context_chunks=5,
+                                          context_tokens=1200),
+        ),
+        "/personalize": api.PersonalizeResponse(
+            chapter_slug=slug,
+            original_title=title,
+            # All chapters back to back, so the body is not one chapter repeated
+            personalized_content=sized("\n\n".join(c[2] for c in chapters), target_chars),
+            metadata=api.PersonalizeMetadata(processing_time_ms=9500, tokens_used=6200,
+                                             profile_summary="intermediate programmer, beginner in AI"),
+        ),
+        "/translate": api.TranslateResponse(
+            chapter_id=slug,
+            original_title=title,
+            translated_title="انسان نما روبوٹکس",
+            # Urdu is two bytes per character in UTF-8: aim for the same byte size
+            translated_content=sized("## " + URDU_PARAGRAPH + "\n\n" + URDU_PARAGRAPH * 3 + "\n\n", target_chars // 2),
+            translated_at="2025-01-01T12:00:00Z",
+        ),
+    }
+
+
+def cpu_per_call_us(fn, iterations: int) -> float:
+    """Mean process CPU time of fn() in microseconds."""
+    fn()  # Warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def compressors() -> dict:
+    """name -> compress(bytes) for the encodings and levels compared."""
+    options = {
+        "gzip-1": lambda body: gzip.compress(body, compresslevel=1, mtime=0),
+        f"gzip-{GZIP_LEVEL}": lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+        "gzip-9": lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        for quality in sorted({1, BROTLI_QUALITY, 11}):
+            options[f"br-{quality}"] = lambda body, q=quality: brotli.compress(body, quality=q)
+    return options
+
+
+def measure(model, iterations: int) -> dict:
+    """Serialization CPU and compressed sizes for one response."""
+    content = model.model_dump(mode="json")
+    body = ORJSONResponse(content).body
+    row = {
+        "raw_bytes": len(body),
+        "dump_us": round(cpu_per_call_us(lambda: model.model_dump(mode="json"), iterations), 1),
+        "json_us": round(cpu_per_call_us(lambda: JSONResponse(content).body, iterations), 1),
+        "orjson_us": round(cpu_per_call_us(lambda: ORJSONResponse(content).body, iterations), 1),
+        "compression": {},
+    }
+    assert json.loads(JSONResponse(content).body) == json.loads(body)
+    for name, fn in compressors().items():
+        compressed = fn(body)
+        row["compression"][name] = {
+            "bytes": len(compressed),
+            "ratio": round(len(compressed) / len(body), 4),
+            "cpu_us": round(cpu_per_call_us(lambda: fn(body), max(1, iterations // 10)), 1),
+        }
+    return row
+
+
+def main() -> None:
+    """Measure every endpoint payload and print a table or JSON."""
+    parser = argparse.ArgumentParser(description="JSON serialization and compression cost per endpoint")
+    parser.add_argument("--content-kb", type=int, nargs="+", default=[10, 30],
+                        help="Size of the personalize/translate markdown body")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    report = []
+    for content_kb in args.content_kb:
+        for endpoint, model in build_payloads(content_kb).items():
+            if endpoint in ("/search", "/chat") and content_kb != args.content_kb[0]:
+                continue  # Independent of --content-kb
+            label = endpoint if endpoint in ("/search", "/chat") else f"{endpoint} ({content_kb} KB)"
+            report.append({"endpoint": label, **measure(model, args.iterations)})
+
+    if args.json:
+        print(json.dumps({"brotli": brotli is not None, "results": report}, indent=2))
+        return
+
+    print(f"{'endpoint':<22} {'raw B':>8} {'dump us':>9} {'json us':>9} {'orjson us':>10} {'speedup':>8}")
+    for row in report:
+        print(f"{row['endpoint']:<22} {row['raw_bytes']:>8} {row['dump_us']:>9.1f} {row['json_us']:>9.1f} "
+              f"{row['orjson_us']:>10.1f} {row['json_us'] / max(row['orjson_us'], 0.01):>7.1f}x")
+    print()
+    names = list(report[0]["compression"])
+    print(f"{'endpoint':<22} " + " ".join(f"{n + ' B/us':>18}" for n in names))
+    for row in report:
+        cells = [f"{c['bytes']}/{c['cpu_us']:.0f}" for c in row["compression"].values()]
+        print(f"{row['endpoint']:<22} " + " ".join(f"{c:>18}" for c in cells))
+    if brotli is None:
+        print("\nbrotli not installed: only gzip measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile of the API: import time and time to live / ready
+
+Two measurements, each in fresh interpreters (--runs times, median
+reported):
+
+- import: `python -X importtime -c "import scripts.api"`, parsed into the
+  total import time of scripts.api, self time per top-level package, and
+  the slowest modules by cumulative time (what imports what is in the
+  raw output: --raw)
+- startup: the app under uvicorn in a child process, from spawn until
+  /health/live answers (the port is listening) and until /health/ready
+  returns 200 (every background startup step finished), plus the first
+  /search after that. Upstreams are local: a Qdrant local-mode directory
+  seeded with synthetic chunks, the fake Cohere and OpenAI servers from
+  benchmarks/fakes.py, and an unreachable Postgres, so nothing leaves the
+  machine. The per-step times reported by /health/ready are included.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 5 --top 15 --json
+    python benchmarks/bench_startup.py --skip-startup --raw
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from common import REPO_ROOT, load_script, synthetic_chunks
+from fakes import FakeCohere, FakeOpenAI, hashed_embedding
+from scripts.startup_utils import package_totals, parse_importtime
+
+
+APP_MODULE = "scripts.api"
+UNREACHABLE_DATABASE_URL = "postgresql://bench@127.0.0.1:9/bench"  # Port 9 (discard): refused at once
+POLL_INTERVAL_S = 0.01
+
+# Child process: the app with .env ignored and Qdrant opened from the seeded directory
+CHILD_SCRIPT = """
+import sys
+sys.path.insert(0, {repo!r})
+import uvicorn
+from scripts import api
+
+def local_qdrant():
+    from qdrant_client import QdrantClient
+    return QdrantClient(path={qdrant_path!r})
+
+api.load_env = lambda: None
+api.init_qdrant_client = local_qdrant
+uvicorn.run(api.app, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def child_env(extra: dict = None) -> dict:
+    """Environment for child interpreters: repo on the path, quiet SDK warnings."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT), SAGEMAKER_SUPPRESS_V2_WARNING="1")
+    env.update(extra or {})
+    return env
+
+
+# =============================================================================
+# Import Time
+# =============================================================================
+
+def profile_import() -> tuple:
+    """(rows, raw stderr) of one `python -X importtime` run of the app module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {APP_MODULE}"],
+        cwd=REPO_ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr), result.stderr
+
+
+def import_report(runs: int, top: int) -> tuple:
+    """Median import time of the app and its slowest packages and modules."""
+    totals_ms, profiles, raw = [], [], ""
+    for _ in range(runs):
+        rows, raw = profile_import()
+        app_row = next(row for row in rows if row["module"] == APP_MODULE)
+        totals_ms.append(app_row["cumulative_us"] / 1000)
+        profiles.append(rows)
+
+    # Per-module figures from the median run
+    median_rows = profiles[totals_ms.index(sorted(totals_ms)[len(totals_ms) // 2])]
+    slowest = sorted(median_rows, key=lambda row: row["cumulative_us"], reverse=True)
+    return {
+        "import_ms": round(statistics.median(totals_ms), 1),
+        "runs_ms": [round(ms, 1) for ms in totals_ms],
+        "modules": len(median_rows),
+        "packages": [
+            {"package": name, "self_ms": round(us / 1000, 1)}
+            for name, us in list(package_totals(median_rows).items())[:top]
+        ],
+        "slowest": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1),
+             "self_ms": round(row["self_us"] / 1000, 1)}
+            for row in slowest[:top]
+        ],
+    }, raw
+
+
+# =============================================================================
+# Startup
+# =============================================================================
+
+def seed_qdrant(path: Path, count: int) -> None:
+    """Local-mode Qdrant directory with count synthetic chunks in book_vectors."""
+    import numpy as np
+    from qdrant_client import QdrantClient
+
+    embed_vectors = load_script("embed-vectors.py")
+    chunks = synthetic_chunks(count, chunks_per_doc=max(1, -(-count // 6)))
+    embedded = [{"chunk": chunk, "embedding": hashed_embedding(chunk["text"])} for chunk in chunks]
+    vectors = np.array([item["embedding"] for item in embedded], dtype=np.float32)
+    neighbors = embed_vectors.compute_neighbors([c["chunk_id"] for c in chunks], vectors)
+
+    qdrant = QdrantClient(path=str(path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        embed_vectors.ensure_collection(qdrant)
+        embed_vectors.upsert_vectors(qdrant, embed_vectors.build_vector_points(embedded, neighbors))
+    qdrant.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_startup(qdrant_path: Path, env: dict, timeout: float) -> dict:
+    """Spawn the app once and time live, ready and the first search."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    script = CHILD_SCRIPT.format(repo=str(REPO_ROOT), qdrant_path=str(qdrant_path), port=port)
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", script], cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    row = {"live_ms": None, "ready_ms": None, "first_search_ms": None, "steps": {}}
+    try:
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            deadline = started + timeout
+            while row["ready_ms"] is None:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API exited during startup:\n{process.stderr.read()[-2000:]}")
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(f"API not ready after {timeout}s")
+                try:
+                    if row["live_ms"] is None and client.get("/health/live").status_code == 200:
+                        row["live_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    if row["live_ms"] is not None:
+                        response = client.get("/health/ready")
+                        if response.status_code == 200:
+                            row["ready_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                            row["steps"] = {name: step["ms"] for name, step in response.json()["steps"].items()}
+                        elif response.json().get("status") == "failed":
+                            raise RuntimeError(f"Startup step failed: {response.json()['steps']}")
+                except httpx.TransportError:
+                    pass  # Not listening yet
+                time.sleep(POLL_INTERVAL_S)
+
+            search_started = time.perf_counter()
+            response = client.post("/search", json={"query": "perception planning and control"})
+            response.raise_for_status()
+            row["first_search_ms"] = round((time.perf_counter() - search_started) * 1000, 1)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return row
+
+
+def startup_report(runs: int, chunks: int, timeout: float) -> dict:
+    """Median live / ready / first-search times over runs fresh processes."""
+    cohere_server = FakeCohere(latency_ms=0).start()
+    openai_server = FakeOpenAI(0, 0, 10).start()
+    env = child_env({
+        "COHERE_API_KEY": "bench",
+        "COHERE_BASE_URL": cohere_server.base_url,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai_server.base_url}/v1",
+        "QDRANT_URL": "local",
+        "QDRANT_API_KEY": "bench",
+        "DATABASE_URL": UNREACHABLE_DATABASE_URL,
+        "BETTER_AUTH_SECRET": "bench-secret",
+    })
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            qdrant_path = Path(tmp) / "qdrant"
+            seed_qdrant(qdrant_path, chunks)
+            rows = [measure_startup(qdrant_path, env, timeout) for _ in range(runs)]
+    finally:
+        cohere_server.stop()
+        openai_server.stop()
+
+    report = {
+        key: round(statistics.median(row[key] for row in rows), 1)
+        for key in ("live_ms", "ready_ms", "first_search_ms")
+    }
+    report["steps_ms"] = {
+        name: round(statistics.median(row["steps"][name] for row in rows), 1)
+        for name in rows[0]["steps"]
+    }
+    report["runs"] = rows
+    return report
+
+
+def main() -> None:
+    """Profile imports and startup and print a summary or JSON."""
+    parser = argparse.ArgumentParser(description="API import time and time to live / ready")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Packages and modules listed")
+    parser.add_argument("--chunks", type=int, default=600, help="Synthetic chunks in the seeded Qdrant")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for readiness")
+    parser.add_argument("--skip-startup", action="store_true", help="Only profile imports")
+    parser.add_argument("--raw", action="store_true", help="Print the raw -X importtime output of the last run")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    imports, raw = import_report(args.runs, args.top)
+    startup = None if args.skip_startup else startup_report(args.runs, args.chunks, args.timeout)
+
+    if args.raw:
+        print(raw, file=sys.stderr)
+    if args.json:
+        print(json.dumps({"import": imports, "startup": startup}, indent=2))
+        return
+
+    print(f"import {APP_MODULE}: {imports['import_ms']:.0f}ms median "
+          f"({', '.join(f'{ms:.0f}' for ms in imports['runs_ms'])}), {imports['modules']} modules")
+    print(f"\n{'package':<28} {'self ms':>9}")
+    for row in imports["packages"]:
+        print(f"{row['package']:<28} {row['self_ms']:>9.1f}")
+    print(f"\n{'module':<48} {'cumul ms':>9} {'self ms':>9}")
+    for row in imports["slowest"]:
+        print(f"{row['module']:<48} {row['cumulative_ms']:>9.1f} {row['self_ms']:>9.1f}")
+    if startup:
+        print(f"\nlive after {startup['live_ms']:.0f}ms, ready after {startup['ready_ms']:.0f}ms, "
+              f"first search {startup['first_search_ms']:.0f}ms (median of {args.runs})")
+        print("background steps: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in startup["steps_ms"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the documents table write paths in store-metadata.py
+
+Compares the per-row INSERT, execute_values and COPY + set-based upsert
+strategies on synthetic chunks. Runs against a scratch database: the
+documents table is truncated before every run.
+
+Usage:
+    python benchmarks/bench_store_metadata.py
+    python benchmarks/bench_store_metadata.py --sizes 10000 100000 --methods copy values
+    BENCH_DATABASE_URL=postgresql://localhost/bench python benchmarks/bench_store_metadata.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import psycopg2
+
+from common import load_script, synthetic_chunks
+
+
+DEFAULT_DATABASE_URL = "postgresql://postgres@localhost:5432/bench_rag"
+DEFAULT_SIZES = [10000, 100000]
+
+
+def run_once(store_metadata_module, conn, chunks, method: str) -> float:
+    """Truncate documents, write all chunks with one method and return elapsed seconds."""
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE documents")
+    conn.commit()
+
+    start = time.perf_counter()
+    # Silence per-batch progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        store_metadata_module.store_metadata(conn, chunks, method=method)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Run the benchmark matrix and print rows/sec per method and size."""
+    parser = argparse.ArgumentParser(description="Benchmark documents table write paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--methods", nargs="+", default=["row", "values", "copy"])
+    parser.add_argument(
+        "--max-row-size",
+        type=int,
+        default=10000,
+        help="Skip the per-row method above this many chunks (default: 10000)"
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCH_DATABASE_URL", DEFAULT_DATABASE_URL)
+    if "neon.tech" in database_url:
+        print("Error: refusing to benchmark against Neon - use a local scratch database")
+        sys.exit(1)
+
+    store_metadata_module = load_script("store-metadata.py")
+    conn = psycopg2.connect(database_url)
+    store_metadata_module.create_table(conn)
+
+    results = []
+    for size in args.sizes:
+        chunks = synthetic_chunks(size)
+        for method in args.methods:
+            if method == "row" and size > args.max_row_size:
+                continue
+            elapsed = run_once(store_metadata_module, conn, chunks, method)
+            results.append({
+                "chunks": size,
+                "method": method,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(size / elapsed, 1),
+            })
+            if not args.json:
+                print(f"{size:>8} chunks  {method:<7} {elapsed:8.2f}s  {size / elapsed:>12,.0f} rows/sec")
+
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE documents")
+    conn.commit()
+    conn.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Multi-worker benchmark: per-worker memory and throughput under gunicorn
+
+Runs the app with gunicorn.conf.py for each worker count, in two modes:
+
+- shared: SHARED_DATA=1 (the default for several workers). The master preloads the app,
+  imports the SDKs, loads the tokenizer and writes the /dev/shm snapshot
+  (vectors, BM25 index, chapters) before forking
+- private: SHARED_DATA=0. Every worker imports and loads everything itself
+
+Once /health/ready has answered 200 from every worker pid, hybrid
+/search requests (dense + BM25, RRF) are driven at --concurrency for
+--requests calls and throughput and p50/p99 latency are recorded. Memory
+is read from /proc/<pid>/smaps_rollup for the master and each worker:
+RSS counts shared pages in full in every process, PSS splits them among
+the processes mapping them, USS (private pages) is what a worker alone
+holds. Summed PSS is the real footprint of the deployment.
+
+Upstreams are local as in bench_startup.py: fake Cohere and OpenAI
+servers and an unreachable Postgres. Qdrant local mode locks its
+directory to one process, so each process opens its own copy of the
+seeded directory. Linux only (/proc); throughput only scales with
+workers up to the cores available (reported as cpus).
+
+Usage:
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --workers 1 2 4 --chunks 3000 --requests 400 --json
+    python benchmarks/bench_workers.py --modes shared --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from bench_startup import UNREACHABLE_DATABASE_URL, child_env, free_port, seed_qdrant
+from common import REPO_ROOT, percentile
+from fakes import FakeCohere, FakeOpenAI
+
+
+MODES = {"shared": "1", "private": "0"}
+POLL_INTERVAL_S = 0.05
+QUERIES = [
+    "perception planning and control",
+    "humanoid robot balance",
+    "sensor fusion for physical AI",
+    "reinforcement learning in simulation",
+]
+
+# App module for gunicorn: .env ignored, Qdrant opened from a per-process copy of the seeded directory
+APP_MODULE = """
+import os
+import shutil
+import sys
+sys.path.insert(0, {repo!r})
+from scripts import api
+
+def local_qdrant():
+    from qdrant_client import QdrantClient
+    path = {qdrant_path!r} + f"-{{os.getpid()}}"
+    if not os.path.isdir(path):
+        shutil.copytree({qdrant_path!r}, path)
+    return QdrantClient(path=path)
+
+api.load_env = lambda: None
+api.init_qdrant_client = local_qdrant
+app = api.app
+"""
+
+
+# =============================================================================
+# Processes
+# =============================================================================
+
+def worker_pids(master_pid: int) -> list:
+    """Child pids of the gunicorn master."""
+    try:
+        children = Path(f"/proc/{master_pid}/task/{master_pid}/children").read_text().split()
+    except OSError:
+        return []
+    return [int(pid) for pid in children]
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS, PSS and USS (private clean + dirty) of one process in MB."""
+    fields = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        fields[name] = int(value.split()[0])  # kB
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss_mb": round(fields["Rss"] / 1024, 1),
+        "pss_mb": round(fields["Pss"] / 1024, 1),
+        "uss_mb": round(uss / 1024, 1),
+    }
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, log_path: Path, workers: int, timeout: float) -> float:
+    """Poll /health/ready until workers distinct pids answered 200; return seconds taken."""
+    started = time.perf_counter()
+    ready_pids = set()
+    # A fresh connection per poll so the kernel spreads them over the workers
+    while len(ready_pids) < workers:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited during startup:\n{log_path.read_text()[-3000:]}")
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"{len(ready_pids)}/{workers} workers ready after {timeout}s")
+        try:
+            response = httpx.get(f"{base_url}/health/ready", timeout=10)
+            if response.status_code == 200:
+                ready_pids.add(response.json()["pid"])
+            elif response.json().get("status") == "failed":
+                raise RuntimeError(f"Startup step failed: {response.json()['steps']}")
+        except httpx.TransportError:
+            pass  # Not listening yet
+        time.sleep(POLL_INTERVAL_S)
+    return time.perf_counter() - started
+
+
+# =============================================================================
+# Load
+# =============================================================================
+
+async def drive_search(base_url: str, concurrency: int, requests: int, warmup: int) -> dict:
+    """Hybrid /search calls from concurrency workers; return throughput and latency."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        async def search(i):
+            response = await client.post("/search", json={"query": QUERIES[i % len(QUERIES)], "mode": "hybrid"})
+            return response.status_code
+
+        for i in range(warmup):
+            await search(i)
+
+        latencies, errors = [], 0
+        next_index = 0
+
+        async def worker():
+            nonlocal next_index, errors
+            while next_index < requests:
+                i = next_index
+                next_index += 1
+                start = time.perf_counter()
+                try:
+                    if await search(i) >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def run_config(app_dir: Path, env: dict, mode: str, workers: int, args) -> dict:
+    """Start gunicorn with workers in mode, measure memory and load, stop it."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    log_path = app_dir / f"gunicorn-{mode}-{workers}.log"  # A file: a pipe nobody drains would block the app's logging
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", str(REPO_ROOT / "gunicorn.conf.py"),
+             "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+             "bench_app:app"],
+            cwd=app_dir, env=dict(env, SHARED_DATA=MODES[mode], PYTHONPATH=f"{app_dir}:{REPO_ROOT}"),
+            stdout=log, stderr=subprocess.STDOUT
+        )
+    try:
+        ready_s = wait_ready(base_url, process, log_path, workers, args.timeout)
+        load = asyncio.run(drive_search(base_url, args.concurrency, args.requests, args.warmup))
+        pids = worker_pids(process.pid)
+        if len(pids) != workers:
+            raise RuntimeError(f"Expected {workers} workers, found {len(pids)}:\n{log_path.read_text()[-3000:]}")
+        workers_memory = [memory_mb(pid) for pid in pids]
+        master_memory = memory_mb(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    total = {key: round(master_memory[key] + sum(m[key] for m in workers_memory), 1) for key in master_memory}
+    return {
+        "mode": mode,
+        "workers": workers,
+        "ready_s": round(ready_s, 1),
+        **load,
+        "master": master_memory,
+        "per_worker": {
+            key: round(sum(m[key] for m in workers_memory) / len(workers_memory), 1) for key in master_memory
+        },
+        "total": total,
+    }
+
+
+def main() -> None:
+    """Run every mode and worker count and print a table or JSON."""
+    parser = argparse.ArgumentParser(description="Per-worker memory and throughput under gunicorn")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Data sharing modes")
+    parser.add_argument("--chunks", type=int, default=2000, help="Synthetic chunks in the seeded Qdrant")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=300, help="Measured /search calls per configuration")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured calls first")
+    parser.add_argument("--timeout", type=float, default=180.0, help="Seconds to wait for every worker to be ready")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    cohere_server = FakeCohere(latency_ms=0).start()
+    openai_server = FakeOpenAI(0, 0, 10).start()
+    env = child_env({
+        "COHERE_API_KEY": "bench",
+        "COHERE_BASE_URL": cohere_server.base_url,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai_server.base_url}/v1",
+        "QDRANT_URL": "local",
+        "QDRANT_API_KEY": "bench",
+        "DATABASE_URL": UNREACHABLE_DATABASE_URL,
+        "BETTER_AUTH_SECRET": "bench-secret",
+    })
+    env.pop("SHARED_DATA_DIR", None)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            app_dir = Path(tmp)
+            qdrant_path = app_dir / "qdrant"
+            seed_qdrant(qdrant_path, args.chunks)
+            (app_dir / "bench_app.py").write_text(
+                APP_MODULE.format(repo=str(REPO_ROOT), qdrant_path=str(qdrant_path)), encoding="utf-8"
+            )
+            for mode in args.modes:
+                for workers in args.workers:
+                    rows.append(run_config(app_dir, env, mode, workers, args))
+    finally:
+        cohere_server.stop()
+        openai_server.stop()
+
+    report = {"cpus": os.cpu_count(), "chunks": args.chunks, "concurrency": args.concurrency, "runs": rows}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['cpus']} cpus, {args.chunks} chunks, concurrency {args.concurrency}, hybrid /search")
+    print(f"{'mode':<8} {'workers':>7} {'ready s':>8} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'worker rss':>11} {'worker pss':>11} {'worker uss':>11} {'total pss':>10}")
+    for row in rows:
+        worker = row["per_worker"]
+        print(f"{row['mode']:<8} {row['workers']:>7} {row['ready_s']:>8.1f} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f} {worker['rss_mb']:>11.1f} {worker['pss_mb']:>11.1f} "
+              f"{worker['uss_mb']:>11.1f} {row['total']['pss_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The pipeline scripts in scripts/ use hyphenated file names, so they are
+loaded by path instead of imported as modules.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import List
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def load_script(filename: str) -> ModuleType:
+    """Load a script from scripts/ by file name (e.g. "store-metadata.py")."""
+    path = SCRIPTS_DIR / filename
+    module_name = path.stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_chunks(count: int, text_length: int = 800, chunks_per_doc: int = 1000) -> List[dict]:
+    """Generate chunks shaped like data/chunks.json entries."""
+    filler = ("Physical AI systems couple perception, planning and control. " * 40)[:text_length]
+    chunks = []
+    for i in range(count):
+        doc_number = i // chunks_per_doc + 1
+        chunk_index = i % chunks_per_doc + 1
+        chunks.append({
+            "chunk_id": f"doc-{doc_number:03d}-{chunk_index:04d}",
+            "text": f"{filler} ({i})",
+            "source_path": f"docs/chapter-{doc_number}/index.md",
+            "slug": f"chapter-{doc_number}-index",
+            "title": f"Chapter {doc_number}",
+            "order_index": chunk_index,
+        })
+    return chunks
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
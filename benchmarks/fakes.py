@@ -0,0 +1,196 @@
+"""
+Local stand-ins for the API's upstream services.
+
+- FakeCohere serves POST /v1/embed with deterministic hashed bag-of-words
+  vectors, so queries land near the chunks that share their terms
+- FakeOpenAI serves POST /v1/chat/completions with a configurable time to
+  first token and per-token delay, as one JSON body or as an SSE token
+  stream when the request sets "stream": true
+
+Both are real HTTP servers on 127.0.0.1 (one thread per connection), so
+the SDK clients, connection pools and timeouts in the API are exercised
+as in production. Point the API at them with COHERE_BASE_URL and
+OPENAI_BASE_URL.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+
+EMBED_DIM = 1024  # embed-english-v3.0
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+COMPLETION_WORDS = (
+    "The robot balances by keeping its zero moment point inside the support polygon "
+    "while the controller tracks the planned center of mass trajectory."
+).split()
+
+
+def hashed_embedding(text: str, dim: int = EMBED_DIM) -> List[float]:
+    """Deterministic unit vector for text: each token adds +-1 at a hashed position."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        norm = 1.0
+    return (vector / norm).tolist()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON request handler; routes are provided by subclasses."""
+
+    protocol_version = "HTTP/1.1"
+    server_config: dict = {}
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def send_json(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _FakeServer:
+    """Run a handler class on an ephemeral localhost port in a daemon thread."""
+
+    handler_class = _Handler
+
+    def __init__(self, **config):
+        handler = type(self.handler_class.__name__, (self.handler_class,), {"server_config": config})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "_FakeServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _CohereHandler(_Handler):
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/embed", "/embed"):
+            self.send_json(404, {"message": f"Unknown path {self.path}"})
+            return
+        body = self.read_json()
+        texts = body.get("texts", [])
+        time.sleep(self.server_config.get("latency_ms", 0) / 1000)
+        self.send_json(200, {
+            "response_type": "embeddings_floats",
+            "id": str(uuid.uuid4()),
+            "embeddings": [hashed_embedding(t, self.server_config.get("dim", EMBED_DIM)) for t in texts],
+            "texts": texts,
+            "meta": {"api_version": {"version": "1"}, "billed_units": {"input_tokens": len(texts)}},
+        })
+
+
+class FakeCohere(_FakeServer):
+    """Cohere embed endpoint (COHERE_BASE_URL=<base_url>)."""
+
+    handler_class = _CohereHandler
+
+    def __init__(self, latency_ms: float = 0.0, dim: int = EMBED_DIM):
+        super().__init__(latency_ms=latency_ms, dim=dim)
+
+
+class _OpenAIHandler(_Handler):
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        body = self.read_json()
+        config = self.server_config
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in body.get("messages", []))
+        words = [COMPLETION_WORDS[i % len(COMPLETION_WORDS)] for i in range(config["completion_tokens"])]
+        usage = {
+            "prompt_tokens": prompt_chars // 4,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_chars // 4 + len(words),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "gpt-4o-mini")
+
+        time.sleep(config["first_token_ms"] / 1000)
+        if body.get("stream"):
+            self._stream(completion_id, model, words)
+            return
+
+        time.sleep(config["token_ms"] * len(words) / 1000)
+        self.send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, words: List[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: dict, finish_reason=None) -> None:
+            event = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server_config["token_ms"] / 1000)
+            chunk({"content": word if i == 0 else f" {word}"})
+        chunk({}, finish_reason="stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeOpenAI(_FakeServer):
+    """OpenAI chat completions endpoint (OPENAI_BASE_URL=<base_url>/v1)."""
+
+    handler_class = _OpenAIHandler
+
+    def __init__(self, first_token_ms: float = 300.0, token_ms: float = 5.0, completion_tokens: int = 120):
+        super().__init__(first_token_ms=first_token_ms, token_ms=token_ms, completion_tokens=completion_tokens)
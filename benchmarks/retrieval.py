@@ -0,0 +1,187 @@
+"""
+Offline retrieval fixtures shared by the retrieval benchmarks.
+
+Provides the corpus (chunk payloads + document vectors), cached Cohere
+query embeddings, labeled queries from queries.json, a NumPy stand-in for
+the Qdrant dense search and the ranking metrics (recall@k, MRR, nDCG@k).
+
+Everything fetched from a live service is cached under benchmarks/.cache
+so later runs (and --offline runs) need no network access.
+"""
+
+import json
+import math
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Set
+
+import numpy as np
+from dotenv import load_dotenv
+
+from common import REPO_ROOT
+
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+QUERIES_PATH = Path(__file__).resolve().parent / "queries.json"
+CORPUS_CACHE = CACHE_DIR / "corpus.json"
+VECTORS_CACHE = CACHE_DIR / "doc_vectors.npy"
+QUERY_VECTORS_CACHE = CACHE_DIR / "query_vectors.json"
+
+COLLECTION_NAME = "book_vectors"
+COHERE_MODEL = "embed-english-v3.0"
+SCROLL_LIMIT = 256
+
+
+class OfflineCacheMiss(RuntimeError):
+    """Raised when --offline is set and a cached artifact is missing."""
+
+
+def load_env() -> None:
+    """Load .env if present (credentials are only needed to fill caches)."""
+    env_path = REPO_ROOT / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+
+
+def load_corpus(offline: bool = False) -> tuple:
+    """
+    Return (documents, vectors) for every chunk in the collection.
+
+    documents are result-shaped dicts (chunk_id, snippet, source_path, slug,
+    title, order_index); vectors is an (n, dim) float32 matrix in the same
+    order. Pulled from Qdrant once, then served from the cache.
+    """
+    if CORPUS_CACHE.exists() and VECTORS_CACHE.exists():
+        documents = json.loads(CORPUS_CACHE.read_text(encoding="utf-8"))
+        return documents, np.load(VECTORS_CACHE)
+    if offline:
+        raise OfflineCacheMiss(f"{CORPUS_CACHE} missing - run once without --offline to fill it")
+
+    from qdrant_client import QdrantClient
+
+    load_env()
+    qdrant = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+
+    documents, vectors = [], []
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=SCROLL_LIMIT,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        for point in points:
+            payload = point.payload
+            documents.append({
+                "chunk_id": payload.get("chunk_id", ""),
+                "snippet": payload.get("text", ""),
+                "source_path": payload.get("source_path", ""),
+                "slug": payload.get("slug", ""),
+                "title": payload.get("title"),
+                "order_index": payload.get("order_index", 0),
+            })
+            vectors.append(point.vector)
+        if offset is None:
+            break
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    CACHE_DIR.mkdir(exist_ok=True)
+    CORPUS_CACHE.write_text(json.dumps(documents), encoding="utf-8")
+    np.save(VECTORS_CACHE, matrix)
+    return documents, matrix
+
+
+def embed_queries(texts: List[str], offline: bool = False) -> np.ndarray:
+    """Return query embeddings, calling Cohere only for texts not yet cached."""
+    cache: Dict[str, List[float]] = {}
+    if QUERY_VECTORS_CACHE.exists():
+        cache = json.loads(QUERY_VECTORS_CACHE.read_text(encoding="utf-8"))
+
+    missing = [t for t in texts if t not in cache]
+    if missing:
+        if offline:
+            raise OfflineCacheMiss(f"{len(missing)} query embeddings not cached - run without --offline")
+        import cohere
+
+        load_env()
+        co = cohere.Client(os.getenv("COHERE_API_KEY"))
+        for i in range(0, len(missing), 96):
+            batch = missing[i:i + 96]
+            response = co.embed(texts=batch, model=COHERE_MODEL, input_type="search_query")
+            cache.update(zip(batch, response.embeddings))
+        CACHE_DIR.mkdir(exist_ok=True)
+        QUERY_VECTORS_CACHE.write_text(json.dumps(cache), encoding="utf-8")
+
+    return np.asarray([cache[t] for t in texts], dtype=np.float32)
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_labeled_queries(path: Path = QUERIES_PATH) -> List[dict]:
+    """Load the labeled query set."""
+    return json.loads(path.read_text(encoding="utf-8"))["queries"]
+
+
+def resolve_relevant(query: dict, documents: List[dict]) -> Set[str]:
+    """
+    Resolve a query's labels to chunk_ids in the current corpus.
+
+    Labels are either explicit chunk_ids or (source_path, contains) pairs,
+    which survive re-chunking as long as the phrase stays in one chunk.
+    """
+    relevant = set()
+    for label in query["relevant"]:
+        if "chunk_id" in label:
+            relevant.add(label["chunk_id"])
+            continue
+        phrase = _normalize_text(label["contains"])
+        for doc in documents:
+            if doc["source_path"] == label["source_path"] and phrase in _normalize_text(doc["snippet"]):
+                relevant.add(doc["chunk_id"])
+    return relevant
+
+
+class DenseIndex:
+    """Exact cosine search over the cached document vectors."""
+
+    def __init__(self, documents: List[dict], vectors: np.ndarray):
+        self.documents = documents
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix = vectors / np.maximum(norms, 1e-12)
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[dict]:
+        query = query_vector / max(float(np.linalg.norm(query_vector)), 1e-12)
+        scores = self.matrix @ query
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.documents[i], "score": float(scores[i])} for i in top]
+
+
+def recall_at_k(ranked_ids: List[str], relevant: Set[str], k: int) -> float:
+    """Fraction of relevant chunks found in the first k results."""
+    if not relevant:
+        return 0.0
+    return len(set(ranked_ids[:k]) & relevant) / len(relevant)
+
+
+def reciprocal_rank(ranked_ids: List[str], relevant: Set[str]) -> float:
+    """1 / rank of the first relevant result (0 if none)."""
+    for rank, chunk_id in enumerate(ranked_ids, 1):
+        if chunk_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked_ids: List[str], relevant: Set[str], k: int) -> float:
+    """Binary-relevance nDCG: DCG of the first k results over the ideal DCG."""
+    if not relevant:
+        return 0.0
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, chunk_id in enumerate(ranked_ids[:k], 1) if chunk_id in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal
@@ -0,0 +1,95 @@
+"""
+Gunicorn configuration: several API workers sharing read-mostly data
+
+Usage:
+    gunicorn -c gunicorn.conf.py scripts.api:app
+    WEB_CONCURRENCY=4 PORT=8000 gunicorn -c gunicorn.conf.py scripts.api:app
+
+Workers are uvicorn workers forked from a master that has already
+imported the app (preload_app). Before forking, the master
+(scripts.api.prepare_workers):
+
+- imports the SDKs and loads the tokenizer, then freezes the garbage
+  collector, so workers share those pages copy-on-write instead of each
+  holding its own copy
+- writes the shared data snapshot (scripts/shared_data_utils.py) to
+  /dev/shm: chunk vectors, BM25 index and chapter texts, memory-mapped by
+  every worker through SHARED_DATA_DIR
+
+Each worker still has its own upstream clients, Postgres connection,
+circuit breakers, /metrics counters, generated-content LRU (shared
+through Postgres when it is available) and chat sessions. Sessions are
+in-process, so a follow-up chat turn served by another worker starts a
+new conversation: use one worker (or plain uvicorn) where that matters.
+
+The snapshot is the collection as it was when it was built. Workers
+check it against Qdrant (SHARED_DATA_CHECK_SECONDS); after an alias
+switch or an ingest they stop using it and load from Qdrant themselves.
+To share a fresh one, send the master SIGHUP (kill -HUP <pid>): it
+writes a new snapshot, starts new workers on it and removes the old one.
+
+SHARED_DATA defaults to on with more than one worker (WEB_CONCURRENCY).
+SHARED_DATA=0 turns preloading and the snapshot off: each worker then
+imports and loads everything itself, as with uvicorn --workers.
+"""
+
+import gc
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+SHARED_DATA = os.getenv("SHARED_DATA", "1" if workers > 1 else "0") == "1"
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = SHARED_DATA
+timeout = 120  # /personalize and /translate generations can take tens of seconds
+graceful_timeout = 30
+keepalive = 5
+
+# This module is re-read on SIGHUP, so state that must outlive a reload is kept on the arbiter (server)
+
+
+def share_data(server, directory=None):
+    """Write the snapshot (into directory, default SHARED_DATA_DIR or a new one) and point new workers at it."""
+    from scripts import api
+
+    try:
+        directory = api.prepare_workers(directory)
+    except Exception as e:
+        server.log.warning(f"Shared data unavailable, workers load their own: {e}")
+    else:
+        os.environ["SHARED_DATA_DIR"] = directory
+        if directory != server.configured_snapshot_dir:
+            server.owned_snapshot_dir = directory  # Kept on exit if configured; a temporary one is removed
+        server.log.info(f"Shared data snapshot: {directory}")
+    # Objects that exist now live in pages the workers share; keep the collector from writing to them
+    gc.collect()
+    gc.freeze()
+
+
+def when_ready(server):
+    """Master, after binding and before the first fork: build what workers share."""
+    server.configured_snapshot_dir = os.getenv("SHARED_DATA_DIR")
+    server.owned_snapshot_dir = None
+    if SHARED_DATA:
+        share_data(server)
+
+
+def on_reload(server):
+    """Master, on SIGHUP before the new workers are forked: share a fresh snapshot."""
+    if not SHARED_DATA or not hasattr(server, "configured_snapshot_dir"):
+        return
+    from scripts.shared_data_utils import default_snapshot_dir
+
+    old = server.owned_snapshot_dir
+    directory = default_snapshot_dir()  # Always a new one: the old workers map the old files until they exit
+    share_data(server, directory)
+    if server.owned_snapshot_dir != directory:
+        shutil.rmtree(directory, ignore_errors=True)  # Not built; new workers open the old one and check it
+    elif old:
+        shutil.rmtree(old, ignore_errors=True)  # Mapped pages outlive the unlink
+
+
+def on_exit(server):
+    if getattr(server, "owned_snapshot_dir", None):
+        shutil.rmtree(server.owned_snapshot_dir, ignore_errors=True)
@@ -10,55 +10,197 @@ Usage:
 
 Endpoints:
     GET  /health  - Service health status
+    GET  /health/live - Liveness probe (process up, no dependency checks)
+    GET  /health/ready - Readiness probe (503 until background startup has finished)
     POST /search  - Semantic search for book content
+    POST /search/batch - Semantic search for several queries in one request
+    GET  /chunks/{chunk_id}/related - Related sections from the neighbor graph
+    GET  /stats/embed - Embedding micro-batcher metrics
+    GET  /metrics - Prometheus metrics
+    GET  /personalize/{chapter_slug} - Cached personalization with ETag / 304 support
+    GET  /translate/{chapter_id} - Cached Urdu translation with ETag / 304 support
+    GET  /admin/profile - Time-boxed CPU profile as collapsed stacks (ADMIN_TOKEN)
+    GET  /admin/profile/routes - Sampled CPU time per route (ADMIN_TOKEN, PROFILE_ROUTE_CPU=1)
     POST /chat    - AI agent chat with RAG context
     DELETE /chat/sessions/{session_id} - End chat session
 """
 
+import asyncio
+import hashlib
 import logging
 import os
+import secrets
 import sys
 import time
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-import cohere
-import psycopg2
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel, Field
-from qdrant_client import QdrantClient
+
+if TYPE_CHECKING:  # The SDKs are imported when their client is first built (LazyClient)
+    import cohere
+    import psycopg2
+    from openai import OpenAI
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Filter
 
 # Import auth routes (relative import for package structure)
 from .auth_routes import router as auth_router
 
 # Import personalization utilities
-from .personalization_utils import personalize_chapter_content, VALID_CHAPTER_SLUGS
+from .personalization_utils import (
+    LEARNING_GOALS,
+    PROMPT_VERSION as PERSONALIZE_PROMPT_VERSION,
+    VALID_CHAPTER_SLUGS,
+    personalize_chapter_content,
+    profile_variant,
+)
 
 # Import translation utilities
-from .translation_utils import translate_chapter_content
+from .translation_utils import PROMPT_VERSION as TRANSLATE_PROMPT_VERSION, translate_chapter_content
+
+# Import chapter index and generated-content cache
+from .content_cache_utils import (
+    CONTENT_CACHE_MAX_AGE,
+    ChapterIndex,
+    ContentCache,
+    PostgresContentStore,
+    cache_key,
+    etag_matches,
+    fetch_chapters,
+)
+
+# Import hybrid search utilities
+from .search_utils import BM25Index, build_bm25_index_from_qdrant, reciprocal_rank_fusion
+
+# Import embedding micro-batcher
+from .embed_batcher import EmbedBatcher
+
+# Import re-ranking utilities
+from .rerank_utils import Reranker, create_reranker
+
+# Import metrics instrumentation
+from .metrics_utils import MetricsMiddleware, record_tokens, register_stats, render_metrics, track_stage
+
+# Import request tracing
+from .tracing_utils import TracingMiddleware, install_log_correlation
+
+# Import deadline, circuit breaker and hedging helpers
+from .resilience_utils import (
+    HEDGE_ENABLED,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    GuardedClient,
+    Hedger,
+    is_timeout,
+    whole_seconds,
+)
+
+# Import sampling profiler
+from .profiling_utils import (
+    DEFAULT_PROFILE_INTERVAL_MS,
+    MAX_PROFILE_SECONDS,
+    ROUTE_CPU_ENABLED,
+    RouteAwareExecutor,
+    RouteCPURoute,
+    RouteCPUSampler,
+    SamplingProfiler,
+)
+
+# Import chat context selection utilities
+from .context_utils import (
+    DEFAULT_MMR_LAMBDA,
+    PASSAGE_SEPARATOR,
+    count_tokens,
+    format_passage,
+    get_encoder,
+    merge_adjacent_chunks,
+    mmr_select,
+    pack_context,
+)
 
+# Import response compression
+from .compression_utils import CompressionMiddleware, CompressionStats
 
-# Configure logging
+# Import lazy clients and background startup
+from .startup_utils import LazyClient, StartupTracker, import_modules
+
+# Import the snapshot shared by gunicorn workers
+from .shared_data_utils import SharedSnapshot, VectorTable, build_snapshot, default_snapshot_dir
+
+
+# Configure logging (trace_id groups the log lines of one request)
+install_log_correlation()
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
+    format="%(asctime)s - %(levelname)s - [%(trace_id)s] %(message)s"
 )
 logger = logging.getLogger(__name__)
 
 
 # Constants
-COLLECTION_NAME = "book_vectors"
+COLLECTION_NAME = "book_vectors"  # Alias to book_vectors_v{N} after embed-vectors.py --reindex
 COHERE_MODEL = "embed-english-v3.0"
+COHERE_TIMEOUT_SECONDS = float(os.getenv("COHERE_TIMEOUT_SECONDS", "10"))
 DEFAULT_TOP_K = 5
 MAX_TOP_K = 20
+MAX_HNSW_EF = 512
+HYBRID_CANDIDATES = 20  # Per-retriever candidates fused in hybrid mode
+
+# Embedding micro-batcher constants
+EMBED_BATCH_MAX_SIZE = 32
+EMBED_BATCH_WINDOW_MS = 5.0
+
+# Batch search constants
+MAX_BATCH_QUERIES = 10
+DEFAULT_BATCH_DEADLINE_MS = 10000
+MIN_BATCH_DEADLINE_MS = 2000  # Qdrant timeouts are whole seconds: search needs 1s left after embedding
+MAX_BATCH_DEADLINE_MS = 30000
+
+# Payload fields read back from Qdrant (skips order_index and anything added later)
+SEARCH_PAYLOAD_FIELDS = ["chunk_id", "text", "source_path", "slug", "title"]
+
+# Chat context selection: MMR over a wider candidate pool, then adjacent-chunk merge
+CONTEXT_CANDIDATES = 20
+CONTEXT_MMR_LAMBDA = DEFAULT_MMR_LAMBDA
+CONTEXT_PAYLOAD_FIELDS = SEARCH_PAYLOAD_FIELDS + ["order_index"]
+# Re-ranking of chat candidates: none, lexical or cross-encoder (CPU); opt-in, see benchmarks/bench_rerank.py
+RERANKER = os.getenv("RERANKER", "none")
+RERANK_TOP_K = 3  # Chunks sent to the LLM when a re-ranker is configured (vs. DEFAULT_TOP_K)
+RERANK_CACHE_SIZE = 10000
+# Precomputed neighbor graph (embed-vectors.py stores "neighbors" in each payload)
+DEFAULT_RELATED_LIMIT = 5
+MAX_RELATED_LIMIT = 10
+CHAT_EXPAND_NEIGHBORS = 1  # Neighbors added per selected chunk when chat expand_related is set
+# Token budget for retrieved context in the chat prompt (counted with the OPENAI_MODEL tokenizer)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# Imported in the background after the server starts listening, slowest first
+STARTUP_PRELOAD = ("cohere", "qdrant_client", "openai", "psycopg2", "tiktoken")
+# Workers compare the shared snapshot (gunicorn.conf.py) with the collection this often
+SHARED_DATA_CHECK_SECONDS = float(os.getenv("SHARED_DATA_CHECK_SECONDS", "60"))
+# Admin endpoints (profiling) are disabled unless ADMIN_TOKEN is set
+DEFAULT_PROFILE_SECONDS = 10.0
+
+# Chat deadline: the remaining budget becomes each upstream call's timeout
+DEFAULT_CHAT_DEADLINE_MS = int(os.getenv("CHAT_DEADLINE_MS", "20000"))
+MIN_CHAT_DEADLINE_MS = 2000  # Qdrant timeouts are whole seconds: search needs 1s left after embedding
+MAX_CHAT_DEADLINE_MS = 60000
+# Below this much remaining budget the LLM is skipped and sources are returned without an answer
+MIN_LLM_BUDGET_MS = int(os.getenv("CHAT_MIN_LLM_BUDGET_MS", "1500"))
+DEGRADED_CHAT_MESSAGE = (
+    "I couldn't generate an answer in time. "
+    "These sections of the textbook look most relevant to your question."
+)
 
 # Agent Constants (T008)
 MAX_MESSAGE_LENGTH = 500
@@ -97,6 +239,35 @@ class SearchRequest(BaseModel):
         le=MAX_TOP_K,
         description="Number of results to return (1-20, default 5)"
     )
+    hnsw_ef: Optional[int] = Field(
+        None,
+        ge=1,
+        le=MAX_HNSW_EF,
+        description="HNSW search beam width; higher is more accurate and slower (default: collection setting)"
+    )
+    exact: bool = Field(
+        default=False,
+        description="Bypass the HNSW index and run an exact (brute-force) search"
+    )
+    mode: str = Field(
+        default="dense",
+        description="Retrieval mode: dense (vectors), sparse (BM25 keywords) or hybrid (RRF of both)",
+        pattern="^(dense|sparse|hybrid)$"
+    )
+    slug: Optional[str] = Field(
+        None,
+        max_length=100,
+        description="Only return chunks with this document slug (e.g. chapter-3-index)"
+    )
+    source_path: Optional[str] = Field(
+        None,
+        max_length=255,
+        description="Only return chunks from this source file (e.g. docs/chapter-3/index.md)"
+    )
+    chapter: Optional[str] = Field(
+        None,
+        description="Only return chunks from this chapter (intro, chapter-1 through chapter-6)"
+    )
 
 
 class SearchResult(BaseModel):
@@ -118,12 +289,65 @@ class SearchResponse(BaseModel):
     )
 
 
+class BatchSearchQuery(BaseModel):
+    """One query within a batch search request."""
+    query: str = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Natural language search query"
+    )
+    top_k: int = Field(
+        default=DEFAULT_TOP_K,
+        ge=1,
+        le=MAX_TOP_K,
+        description="Number of results to return for this query (1-20, default 5)"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Several search queries answered with one embed call and one Qdrant round-trip."""
+    queries: List[BatchSearchQuery] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_QUERIES,
+        description=f"Queries to run (1-{MAX_BATCH_QUERIES})"
+    )
+    deadline_ms: int = Field(
+        default=DEFAULT_BATCH_DEADLINE_MS,
+        ge=MIN_BATCH_DEADLINE_MS,
+        le=MAX_BATCH_DEADLINE_MS,
+        description="Time budget shared by the whole batch, in milliseconds"
+    )
+
+
+class BatchSearchResponse(BaseModel):
+    """Per-query search responses, in request order."""
+    results: List[SearchResponse] = Field(
+        default_factory=list,
+        description="One response per query, in request order"
+    )
+
+
+class RelatedChunksResponse(BaseModel):
+    """Precomputed nearest neighbors of a chunk."""
+    chunk_id: str = Field(..., description="Chunk the neighbors belong to")
+    related: List[SearchResult] = Field(
+        default_factory=list,
+        description="Most similar chunks, best first (score is cosine similarity)"
+    )
+
+
 class HealthResponse(BaseModel):
     """Health check response with dependency status."""
     status: str = Field(..., description="Overall status (ok/degraded/error)")
     qdrant: bool = Field(..., description="Qdrant connectivity status")
     postgres: bool = Field(..., description="Postgres connectivity status")
     openai: bool = Field(default=True, description="OpenAI client status")
+    breakers: Dict[str, dict] = Field(
+        default_factory=dict,
+        description="Circuit breaker state per upstream (closed, open or half_open) and counters"
+    )
 
 
 class ErrorResponse(BaseModel):
@@ -225,6 +449,30 @@ class ChatRequest(BaseModel):
         None,
         description="Session identifier for multi-turn conversations"
     )
+    slug: Optional[str] = Field(
+        None,
+        max_length=100,
+        description="Only retrieve context with this document slug"
+    )
+    source_path: Optional[str] = Field(
+        None,
+        max_length=255,
+        description="Only retrieve context from this source file"
+    )
+    chapter: Optional[str] = Field(
+        None,
+        description="Only retrieve context from this chapter (e.g. the page the reader is on)"
+    )
+    expand_related: bool = Field(
+        default=False,
+        description="Add each context chunk's closest related chunk from the precomputed neighbor graph"
+    )
+    deadline_ms: Optional[int] = Field(
+        None,
+        ge=MIN_CHAT_DEADLINE_MS,
+        le=MAX_CHAT_DEADLINE_MS,
+        description="Time budget for the whole request in milliseconds (server default when omitted)"
+    )
 
 
 class Source(BaseModel):
@@ -240,6 +488,16 @@ class ResponseMetadata(BaseModel):
     response_time_ms: int = Field(..., description="Total processing time in milliseconds")
     tokens_used: Optional[int] = Field(None, description="LLM tokens consumed")
     context_chunks: int = Field(..., description="Number of RAG chunks used")
+    context_tokens: Optional[int] = Field(None, description="Tokens of retrieved context in the prompt")
+    degraded: bool = Field(
+        default=False,
+        description="True when the answer was skipped to meet the deadline (sources are still returned)"
+    )
+    degraded_reason: Optional[str] = Field(
+        None,
+        description="Why the answer was skipped: llm_budget (too little time left), llm_timeout "
+                    "or llm_unavailable (OpenAI circuit open)"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -291,10 +549,23 @@ class Session:
 # Global Clients (initialized on startup)
 # =============================================================================
 
-cohere_client: Optional[cohere.Client] = None
-qdrant_client: Optional[QdrantClient] = None
-db_connection: Optional[psycopg2.extensions.connection] = None
-openai_client: Optional[OpenAI] = None
+cohere_client: Optional["cohere.Client"] = None
+qdrant_client: Optional["QdrantClient"] = None
+db_connection: Optional["psycopg2.extensions.connection"] = None
+openai_client: Optional["OpenAI"] = None
+bm25_index: Optional[BM25Index] = None
+embed_batcher: Optional[EmbedBatcher] = None
+reranker: Optional[Reranker] = None
+breakers: Dict[str, CircuitBreaker] = {}
+route_cpu_sampler: Optional[RouteCPUSampler] = None
+chapter_index: Optional[ChapterIndex] = None
+content_cache: Optional[ContentCache] = None
+shared_snapshot: Optional[SharedSnapshot] = None  # Mapped from SHARED_DATA_DIR (gunicorn.conf.py) while current
+shared_vectors: Optional[VectorTable] = None  # Its chunk vectors
+snapshot_watcher: Optional[asyncio.Task] = None
+startup: Optional[StartupTracker] = None
+generation_locks: Dict[str, asyncio.Lock] = {}  # One generation per cache key at a time
+profile_lock = asyncio.Lock()  # One profile capture at a time
 
 # Session Store (T021)
 sessions: Dict[str, Session] = {}
@@ -326,16 +597,24 @@ def load_env() -> None:
     logger.info("Environment loaded: COHERE_API_KEY=***, QDRANT_URL=***, DATABASE_URL=***, OPENAI_API_KEY=***")
 
 
-def init_cohere_client() -> cohere.Client:
-    """Initialize and return Cohere client."""
+def init_cohere_client() -> "cohere.Client":
+    """Initialize and return Cohere client (COHERE_BASE_URL overrides the API host)."""
+    import cohere  # Deferred: by far the slowest import (benchmarks/bench_startup.py)
+
     api_key = os.getenv("COHERE_API_KEY")
-    client = cohere.Client(api_key)
+    client = cohere.Client(
+        api_key,
+        base_url=os.getenv("COHERE_BASE_URL") or None,
+        timeout=COHERE_TIMEOUT_SECONDS  # For calls without a deadline; the SDK default is 300s
+    )
     logger.info("Cohere client initialized")
     return client
 
 
-def init_qdrant_client() -> QdrantClient:
+def init_qdrant_client() -> "QdrantClient":
     """Initialize and return Qdrant client."""
+    from qdrant_client import QdrantClient
+
     url = os.getenv("QDRANT_URL")
     api_key = os.getenv("QDRANT_API_KEY")
     # Use longer timeout for cloud instances (default is 5s which can be too short)
@@ -344,8 +623,32 @@ def init_qdrant_client() -> QdrantClient:
     return client
 
 
-def init_db_connection() -> Optional[psycopg2.extensions.connection]:
+def guard_client(name: str, client, hedged=(), **options) -> GuardedClient:
+    """
+    Wrap an upstream client in its circuit breaker (and hedger, if HEDGE_REQUESTS=1).
+
+    Breaker and hedger counters are exported on /metrics; breaker state is
+    also reported by /health.
+    """
+    breaker = CircuitBreaker(name)
+    breakers[name] = breaker
+    register_stats(
+        f"rag_breaker_{name}",
+        breaker.stats,
+        counters=("calls", "failures", "rejected", "times_opened", "caller_timeouts")
+    )
+
+    hedger = None
+    if HEDGE_ENABLED and hedged:
+        hedger = Hedger(name)
+        register_stats(f"rag_hedge_{name}", hedger.stats, counters=("calls", "hedged", "hedge_wins"))
+    return GuardedClient(client, breaker, hedger, hedged=hedged, **options)
+
+
+def init_db_connection() -> Optional["psycopg2.extensions.connection"]:
     """Initialize and return PostgreSQL connection."""
+    import psycopg2
+
     database_url = os.getenv("DATABASE_URL")
     try:
         conn = psycopg2.connect(database_url, connect_timeout=10)
@@ -357,8 +660,10 @@ def init_db_connection() -> Optional[psycopg2.extensions.connection]:
         return None
 
 
-def init_openai_client() -> OpenAI:
+def init_openai_client() -> "OpenAI":
     """Initialize and return OpenAI client (T006)."""
+    from openai import OpenAI
+
     api_key = os.getenv("OPENAI_API_KEY")
     client = OpenAI(api_key=api_key)
     logger.info("OpenAI client initialized")
@@ -386,7 +691,7 @@ def check_postgres_health() -> bool:
     try:
         if db_connection is None or db_connection.closed:
             return False
-        with db_connection.cursor() as cur:
+        with track_stage("db"), db_connection.cursor() as cur:
             cur.execute("SELECT 1")
             return True
     except Exception as e:
@@ -395,8 +700,29 @@ def check_postgres_health() -> bool:
 
 
 def check_openai_health() -> bool:
-    """Verify OpenAI client is initialized (T051)."""
-    return openai_client is not None
+    """Verify OpenAI client is initialized and its circuit is not open (T051)."""
+    breaker = breakers.get("openai")
+    return openai_client is not None and (breaker is None or breaker.state != "open")
+
+
+# =============================================================================
+# Admin Access
+# =============================================================================
+
+def require_admin(request: Request) -> None:
+    """
+    Allow the request only with the ADMIN_TOKEN bearer token.
+
+    Admin endpoints answer 404 while ADMIN_TOKEN is unset, so they are
+    invisible unless explicitly enabled.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(supplied.strip(), admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 
 # =============================================================================
@@ -405,43 +731,235 @@ def check_openai_health() -> bool:
 
 def embed_query(query: str) -> List[float]:
     """Generate embedding for search query using Cohere."""
+    return embed_queries([query])[0]
+
+
+async def embed_query_batched(query: str, timeout: Optional[float] = None) -> List[float]:
+    """Generate a query embedding through the micro-batcher (shares Cohere calls)."""
+    with track_stage("embed"):
+        if embed_batcher is None:
+            return (await asyncio.to_thread(embed_queries, [query], timeout))[0]
+        try:
+            return await asyncio.wait_for(embed_batcher.embed(query, timeout), timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("embed")
+
+
+def embed_queries(queries: List[str], timeout: Optional[float] = None) -> List[List[float]]:
+    """Generate embeddings for several search queries in one Cohere call."""
     if cohere_client is None:
         raise RuntimeError("Cohere client not initialized")
 
+    request_options = None
+    if timeout is not None:
+        request_options = {"timeout_in_seconds": timeout}  # Used as the httpx timeout, so fractions work
+
     response = cohere_client.embed(
-        texts=[query],
+        texts=queries,
         model=COHERE_MODEL,
-        input_type="search_query"
+        input_type="search_query",
+        request_options=request_options
     )
-    return response.embeddings[0]
+    return response.embeddings
+
+
+def point_to_result(point) -> dict:
+    """Build a search result dict from a Qdrant point (retrieved points score 0)."""
+    payload = point.payload
+    return {
+        "chunk_id": payload.get("chunk_id", ""),
+        "snippet": payload.get("text", ""),
+        "source_path": payload.get("source_path", ""),
+        "slug": payload.get("slug", ""),
+        "title": payload.get("title"),
+        "score": getattr(point, "score", 0.0)
+    }
+
 
+def chunk_id_to_point_id(chunk_id: str) -> int:
+    """Convert chunk_id to deterministic integer for Qdrant using MD5 hash."""
+    hash_bytes = hashlib.md5(chunk_id.encode()).digest()
+    return int.from_bytes(hash_bytes[:8], byteorder='big')
 
-def vector_search(query_vector: List[float], top_k: int) -> List[dict]:
+
+def fetch_chunks(chunk_ids: List[str], timeout: Optional[float] = None) -> Dict[str, dict]:
+    """Fetch chunk payloads by chunk_id (no vector search); missing chunks are omitted."""
+    if qdrant_client is None:
+        raise RuntimeError("Qdrant client not initialized")
+    if not chunk_ids:
+        return {}
+
+    with track_stage("vector_fetch"):
+        points = qdrant_client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=[chunk_id_to_point_id(chunk_id) for chunk_id in chunk_ids],
+            with_payload=CONTEXT_PAYLOAD_FIELDS,
+            timeout=whole_seconds(timeout, "vector_fetch")
+        )
+    return {
+        point.payload.get("chunk_id", ""): {
+            **point_to_result(point),
+            "order_index": point.payload.get("order_index", 0)
+        }
+        for point in points
+    }
+
+
+def get_related_chunks(chunk_id: str, limit: int) -> Optional[List[dict]]:
+    """
+    Return a chunk's precomputed nearest neighbors, best first.
+
+    Reads the "neighbors" payload written by embed-vectors.py, so no vector
+    search runs. Returns None if the chunk does not exist and an empty list
+    if its neighbors have not been computed.
+    """
+    if qdrant_client is None:
+        raise RuntimeError("Qdrant client not initialized")
+
+    with track_stage("vector_fetch"):
+        points = qdrant_client.retrieve(
+            collection_name=COLLECTION_NAME,
+            ids=[chunk_id_to_point_id(chunk_id)],
+            with_payload=["neighbors"]
+        )
+    if not points:
+        return None
+
+    neighbors = (points[0].payload.get("neighbors") or [])[:limit]
+    if not neighbors:
+        logger.warning(f"No precomputed neighbors for {chunk_id}; run embed-vectors.py --neighbors-only")
+        return []
+
+    chunks = fetch_chunks([n["chunk_id"] for n in neighbors])
+    return [
+        {**chunks[n["chunk_id"]], "score": n["score"]}
+        for n in neighbors
+        if n["chunk_id"] in chunks
+    ]
+
+
+def build_search_filters(
+    slug: Optional[str] = None,
+    source_path: Optional[str] = None,
+    chapter: Optional[str] = None
+) -> Optional[Dict[str, List[str]]]:
+    """
+    Translate request filters into payload field -> allowed values.
+
+    A chapter maps to its source files (docs/intro.md or
+    docs/chapter-N/index.md), so it is served by the source_path index.
+    Raises HTTPException(400) for an unknown chapter.
+    """
+    filters: Dict[str, List[str]] = {}
+    if slug:
+        filters["slug"] = [slug]
+    if source_path:
+        filters["source_path"] = [source_path]
+    if chapter:
+        if chapter not in VALID_CHAPTER_SLUGS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid chapter: must be one of {', '.join(VALID_CHAPTER_SLUGS)}"
+            )
+        chapter_paths = [f"docs/{chapter}.md", f"docs/{chapter}/index.md"]
+        if "source_path" in filters:
+            chapter_paths = [p for p in chapter_paths if p in filters["source_path"]]
+        filters["source_path"] = chapter_paths
+    return filters or None
+
+
+def to_qdrant_filter(filters: Optional[Dict[str, List[str]]]) -> Optional["Filter"]:
+    """Build a Qdrant payload filter (all fields must match) from search filters."""
+    from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+    if not filters:
+        return None
+    return Filter(must=[
+        FieldCondition(key=field, match=MatchAny(any=values))
+        for field, values in filters.items()
+    ])
+
+
+def vector_search(
+    query_vector: List[float],
+    top_k: int,
+    hnsw_ef: Optional[int] = None,
+    exact: bool = False,
+    filters: Optional[Dict[str, List[str]]] = None
+) -> List[dict]:
     """Perform semantic similarity search in Qdrant."""
     if qdrant_client is None:
         raise RuntimeError("Qdrant client not initialized")
 
-    results = qdrant_client.query_points(
-        collection_name=COLLECTION_NAME,
-        query=query_vector,
-        limit=top_k,
-        with_payload=True
-    )
+    search_params = None
+    if hnsw_ef is not None or exact:
+        from qdrant_client.models import SearchParams
+
+        search_params = SearchParams(hnsw_ef=hnsw_ef, exact=exact)
+
+    with track_stage("vector_search", limit=top_k):
+        results = qdrant_client.query_points(
+            collection_name=COLLECTION_NAME,
+            query=query_vector,
+            query_filter=to_qdrant_filter(filters),
+            limit=top_k,
+            search_params=search_params,
+            with_payload=SEARCH_PAYLOAD_FIELDS
+        )
 
     # Build results from Qdrant payload (contains all needed fields)
-    search_results = []
-    for point in results.points:
-        payload = point.payload
-        search_results.append({
-            "chunk_id": payload.get("chunk_id", ""),
-            "snippet": payload.get("text", ""),
-            "source_path": payload.get("source_path", ""),
-            "slug": payload.get("slug", ""),
-            "title": payload.get("title"),
-            "score": point.score
-        })
+    return [point_to_result(point) for point in results.points]
+
 
-    return search_results
+def vector_search_batch(
+    query_vectors: List[List[float]],
+    top_ks: List[int],
+    timeout: Optional[float] = None
+) -> List[List[dict]]:
+    """Perform several similarity searches in one Qdrant round-trip."""
+    if qdrant_client is None:
+        raise RuntimeError("Qdrant client not initialized")
+
+    from qdrant_client.models import QueryRequest
+
+    requests = [
+        QueryRequest(query=vector, limit=top_k, with_payload=SEARCH_PAYLOAD_FIELDS)
+        for vector, top_k in zip(query_vectors, top_ks)
+    ]
+    with track_stage("vector_search", queries=len(requests)):
+        responses = qdrant_client.query_batch_points(
+            collection_name=COLLECTION_NAME,
+            requests=requests,
+            timeout=whole_seconds(timeout, "vector_search")
+        )
+    return [[point_to_result(point) for point in response.points] for response in responses]
+
+
+def keyword_search(
+    query: str,
+    top_k: int,
+    filters: Optional[Dict[str, List[str]]] = None
+) -> List[dict]:
+    """Perform BM25 keyword search over the in-process index."""
+    if bm25_index is None:
+        raise RuntimeError("Keyword index not initialized")
+    with track_stage("keyword_search"):
+        return bm25_index.search(query, top_k, filters=filters)
+
+
+def hybrid_search(
+    query: str,
+    query_vector: List[float],
+    top_k: int,
+    hnsw_ef: Optional[int] = None,
+    exact: bool = False,
+    filters: Optional[Dict[str, List[str]]] = None
+) -> List[dict]:
+    """Fuse dense and BM25 candidates with reciprocal rank fusion."""
+    candidates = max(top_k, HYBRID_CANDIDATES)
+    dense_results = vector_search(query_vector, candidates, hnsw_ef=hnsw_ef, exact=exact, filters=filters)
+    sparse_results = keyword_search(query, candidates, filters=filters)
+    return reciprocal_rank_fusion([dense_results, sparse_results], top_k)
 
 
 # =============================================================================
@@ -474,19 +992,157 @@ def cleanup_expired_sessions() -> int:
     return len(expired)
 
 
-def build_context_from_search(search_results: List[dict]) -> str:
-    """Format RAG results for LLM context (T011)."""
-    if not search_results:
-        return ""
+def retrieve_chat_context(
+    query: str,
+    query_vector: List[float],
+    top_k: int,
+    filters: Optional[Dict[str, List[str]]] = None,
+    expand_related: bool = False,
+    deadline: Optional[Deadline] = None
+) -> List[dict]:
+    """
+    Retrieve diverse context passages for chat.
+
+    Fetches CONTEXT_CANDIDATES chunks with their vectors, re-scores them with
+    the re-ranker when one is configured, picks top_k of them by MMR so
+    near-duplicate chunks do not crowd out other material, then merges
+    consecutive chunks of one source file into a single passage.
+
+    With expand_related, each selected chunk's closest precomputed
+    neighbors are added (scored as parent score x similarity) before
+    merging, so the token budget decides whether they make it in.
+
+    With a deadline, the remaining budget is the timeout of each Qdrant call,
+    in whole seconds rounded down (DeadlineExceeded with less than a second
+    left).
+    """
+    if qdrant_client is None:
+        raise RuntimeError("Qdrant client not initialized")
+
+    timeout = deadline.timeout("vector_search") if deadline else None
+    with track_stage("vector_search", limit=max(top_k, CONTEXT_CANDIDATES)):
+        results = qdrant_client.query_points(
+            collection_name=COLLECTION_NAME,
+            query=query_vector,
+            query_filter=to_qdrant_filter(filters),
+            limit=max(top_k, CONTEXT_CANDIDATES),
+            with_payload=CONTEXT_PAYLOAD_FIELDS + (["neighbors"] if expand_related else []),
+            with_vectors=shared_vectors is None,
+            timeout=whole_seconds(timeout, "vector_search")
+        )
+    points = results.points
+    if not points:
+        return []
+    if shared_vectors is None:
+        vectors = [point.vector for point in points]
+    else:
+        vectors = candidate_vectors(points, timeout=deadline.timeout("vector_fetch") if deadline else None)
+        # Points deleted since the search have no vector: leave them out
+        kept = [i for i, vector in enumerate(vectors) if vector is not None]
+        if len(kept) < len(points):
+            points, vectors = [points[i] for i in kept], [vectors[i] for i in kept]
+            if not points:
+                return []
+
+    candidates = [
+        {**point_to_result(point), "order_index": point.payload.get("order_index", 0)}
+        for point in points
+    ]
+    relevance = None
+    if reranker is not None:
+        with track_stage("rerank"):
+            relevance = reranker.score(query, candidates)
+        for candidate, score in zip(candidates, relevance):
+            candidate["score"] = score
+
+    selected = mmr_select(
+        query_vector,
+        vectors,
+        top_k,
+        lambda_mult=CONTEXT_MMR_LAMBDA,
+        relevance=relevance
+    )
+    chunks = [candidates[i] for i in selected]
 
-    context_parts = []
-    for i, result in enumerate(search_results, 1):
-        title = result.get("title") or "Untitled"
-        slug = result.get("slug", "")
-        snippet = result.get("snippet", "")
-        context_parts.append(f"[{i}] {title} (/{slug}):\n{snippet}")
+    if expand_related:
+        chunks += expand_with_neighbors(
+            chunks,
+            [points[i].payload.get("neighbors") or [] for i in selected],
+            timeout=deadline.timeout("vector_fetch") if deadline else None
+        )
+
+    return merge_adjacent_chunks(chunks)
+
+
+def candidate_vectors(points, timeout: Optional[float] = None) -> list:
+    """
+    Vectors of search hits, read from the shared snapshot.
+
+    Points the snapshot lacks (added after it was built) are fetched from
+    Qdrant in one call; the vector of a point deleted since the search is None.
+    """
+    vectors, missing = shared_vectors.lookup([point.id for point in points])
+    if missing:
+        with track_stage("vector_fetch", ids=len(missing)):
+            fetched = qdrant_client.retrieve(
+                collection_name=COLLECTION_NAME,
+                ids=missing,
+                with_payload=False,
+                with_vectors=True,
+                timeout=whole_seconds(timeout, "vector_fetch")
+            )
+        by_id = {point.id: point.vector for point in fetched}
+        vectors = [vector if vector is not None else by_id.get(point.id) for vector, point in zip(vectors, points)]
+    return vectors
+
+
+def expand_with_neighbors(
+    chunks: List[dict],
+    neighbor_lists: List[List[dict]],
+    timeout: Optional[float] = None
+) -> List[dict]:
+    """Return up to CHAT_EXPAND_NEIGHBORS unseen neighbors per chunk, read from the neighbor graph."""
+    seen = {chunk["chunk_id"] for chunk in chunks}
+    wanted: Dict[str, float] = {}
+    for chunk, neighbors in zip(chunks, neighbor_lists):
+        added = 0
+        for neighbor in neighbors:
+            if added == CHAT_EXPAND_NEIGHBORS:
+                break
+            if neighbor["chunk_id"] in seen:
+                continue
+            score = chunk.get("score", 0.0) * neighbor["score"]
+            wanted[neighbor["chunk_id"]] = max(score, wanted.get(neighbor["chunk_id"], 0.0))
+            added += 1
+
+    fetched = fetch_chunks(list(wanted), timeout=timeout)
+    expanded = [{**fetched[cid], "score": score} for cid, score in wanted.items() if cid in fetched]
+    if expanded:
+        logger.info(f"Context expanded with related chunks: {[c['chunk_id'] for c in expanded]}")
+    return expanded
+
+
+def build_context_from_search(
+    search_results: List[dict],
+    token_budget: int = CONTEXT_TOKEN_BUDGET
+) -> tuple[str, List[dict], int]:
+    """
+    Format RAG results for LLM context (T011).
+
+    Passages are packed by score into token_budget (trimmed on sentence
+    boundaries when needed). Returns the context, the passages actually
+    included and the context's token count.
+    """
+    if not search_results:
+        return "", [], 0
 
-    return "\n\n".join(context_parts)
+    with track_stage("context_build"):
+        packed, _ = pack_context(search_results, token_budget, OPENAI_MODEL)
+        context = PASSAGE_SEPARATOR.join(
+            format_passage(i, result) for i, result in enumerate(packed, 1)
+        )
+        context_tokens = count_tokens(context, OPENAI_MODEL)
+    return context, packed, context_tokens
 
 
 def build_prompt(query: str, context: str, conversation_history: List[dict]) -> List[dict]:
@@ -507,28 +1163,41 @@ def build_prompt(query: str, context: str, conversation_history: List[dict]) ->
     return messages
 
 
-def generate_response(messages: List[dict]) -> tuple[str, Optional[int]]:
+def generate_response(messages: List[dict], timeout: Optional[float] = None) -> tuple[str, Optional[int]]:
     """
     Generate response using OpenAI (T013, T042).
 
-    Handles OpenAI-specific errors with appropriate error responses.
+    Handles OpenAI-specific errors with appropriate error responses. With
+    a timeout the call is made once (no SDK retries) and raises
+    DeadlineExceeded when it runs out.
     """
     if openai_client is None:
         raise RuntimeError("OpenAI client not initialized")
 
-    try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1000
-        )
+    from openai import APIConnectionError, APIError, APITimeoutError, RateLimitError
 
-        content = response.choices[0].message.content
-        tokens_used = response.usage.total_tokens if response.usage else None
+    client = openai_client
+    if timeout is not None:
+        client = openai_client.with_options(timeout=timeout, max_retries=0)
+
+    try:
+        with track_stage("llm", model=OPENAI_MODEL) as llm_span:
+            response = client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000
+            )
+            content = response.choices[0].message.content
+            tokens_used = response.usage.total_tokens if response.usage else None
+            llm_span.set_attribute("tokens", tokens_used)
+        record_tokens(tokens_used)
 
         return content, tokens_used
 
+    except APITimeoutError as e:
+        logger.warning(f"OpenAI call timed out after {timeout}s: {e}")
+        raise DeadlineExceeded("llm")
     except RateLimitError as e:
         # T042: Rate limit exceeded
         logger.error(f"OpenAI rate limit exceeded: {e}")
@@ -569,14 +1238,273 @@ def extract_sources(search_results: List[dict]) -> List[Source]:
     return sources
 
 
+# =============================================================================
+# Generated Content Cache (personalize / translate)
+# =============================================================================
+
+def validate_learning_goals(learning_goals: List[str]) -> List[str]:
+    """Return the goals de-duplicated and sorted, or raise 400 for an unknown goal."""
+    for goal in learning_goals:
+        if goal not in LEARNING_GOALS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid learning goal '{goal}': must be one of {', '.join(LEARNING_GOALS)}"
+            )
+    return sorted(set(learning_goals))
+
+
+def load_chapter(chapter_slug: str) -> Dict:
+    """Chapter from the chapter index (reloaded from Qdrant when stale), or 404."""
+    try:
+        chapter = chapter_index.get(chapter_slug)
+    except Exception as e:
+        logger.error(f"Chapter index unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Chapter content is temporarily unavailable")
+    if chapter is None:
+        raise HTTPException(status_code=404, detail=f"Chapter content not found for: {chapter_slug}")
+    return chapter
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Validator and freshness headers for a cached chapter body."""
+    return {"ETag": etag, "Cache-Control": f"public, max-age={CONTENT_CACHE_MAX_AGE}"}
+
+
+async def get_or_generate(key: str, generate) -> tuple:
+    """
+    Return (body, etag, cached) for key, running generate() on a miss.
+
+    Concurrent misses for the same key wait for a single generation
+    instead of each calling the LLM. Cache store reads and writes
+    (Postgres) run in worker threads like the generation itself.
+    """
+    entry = await asyncio.to_thread(content_cache.get_entry, key)
+    if entry is not None:
+        return *entry, True
+    lock = generation_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            if key in content_cache:  # Generated while we waited
+                return *content_cache.get_entry(key), True
+            body = await asyncio.to_thread(generate)
+            etag = await asyncio.to_thread(content_cache.put, key, body)
+            return body, etag, False
+    finally:
+        if not lock.locked():
+            generation_locks.pop(key, None)
+
+
+async def run_generation(label: str, action: str, key: str, generate) -> tuple:
+    """get_or_generate with generation errors mapped to HTTP errors (label/action name the work in messages)."""
+    try:
+        return await get_or_generate(key, generate)
+    except ValueError as e:
+        # Content not found or invalid input
+        logger.warning(f"{label} validation error: {e}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        # OpenAI or other runtime error
+        logger.error(f"{label} runtime error: {e}")
+        raise HTTPException(status_code=500, detail=f"Unable to {action} content. Please try again.")
+    except Exception as e:
+        # Unexpected error
+        logger.error(f"{label} unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred")
+
+
+def personalize_target(chapter_slug: str, profile: UserProfile) -> tuple:
+    """(cache key, generate) of a chapter personalized for profile; raises 400/404."""
+    if chapter_slug not in VALID_CHAPTER_SLUGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid chapter_slug: must be one of {', '.join(VALID_CHAPTER_SLUGS)}"
+        )
+    goals = validate_learning_goals(profile.learning_goals)
+    chapter = load_chapter(chapter_slug)
+    variant = profile_variant(profile.programming_level, profile.hardware_background, goals)
+    key = cache_key("personalize", chapter_slug, variant, chapter["content_hash"], PERSONALIZE_PROMPT_VERSION)
+
+    def generate() -> dict:
+        result = personalize_chapter_content(
+            openai_client=openai_client,
+            qdrant_client=qdrant_client,
+            chapter_slug=chapter_slug,
+            programming_level=profile.programming_level,
+            hardware_background=profile.hardware_background,
+            learning_goals=goals,
+            chapter_data=chapter
+        )
+        return PersonalizeResponse(
+            chapter_slug=result["chapter_slug"],
+            original_title=result["original_title"],
+            personalized_content=result["personalized_content"],
+            metadata=PersonalizeMetadata(
+                processing_time_ms=result["metadata"]["processing_time_ms"],
+                tokens_used=result["metadata"]["tokens_used"],
+                profile_summary=result["metadata"]["profile_summary"]
+            )
+        ).model_dump(mode="json")
+
+    return key, generate
+
+
+def translate_target(chapter_id: str, user_id: str) -> tuple:
+    """(cache key, generate) of a chapter's Urdu translation (the same for every user); raises 400/404."""
+    if chapter_id not in VALID_CHAPTER_SLUGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid chapter_id: must be one of {', '.join(VALID_CHAPTER_SLUGS)}"
+        )
+    chapter = load_chapter(chapter_id)
+    key = cache_key("translate", chapter_id, "ur", chapter["content_hash"], TRANSLATE_PROMPT_VERSION)
+
+    def generate() -> dict:
+        result = translate_chapter_content(
+            openai_client=openai_client,
+            qdrant_client=qdrant_client,
+            chapter_id=chapter_id,
+            user_id=user_id,
+            chapter_data=chapter
+        )
+        return TranslateResponse(
+            chapter_id=result["chapter_id"],
+            original_title=result["original_title"],
+            translated_title=result["translated_title"],
+            translated_content=result["translated_content"],
+            source_language=result["source_language"],
+            target_language=result["target_language"],
+            translated_at=result["translated_at"]
+        ).model_dump(mode="json")
+
+    return key, generate
+
+
 # =============================================================================
 # Application Lifecycle (T011)
 # =============================================================================
 
+def connect_postgres() -> None:
+    """Connect to Postgres and back the content cache with its table (startup step)."""
+    global db_connection
+    db_connection = init_db_connection()  # May be None if DB unavailable
+    if db_connection is None:
+        logger.info("Postgres unavailable - using Qdrant payload only, caching generated content in memory")
+        return
+    content_store = PostgresContentStore(lambda: db_connection)
+    try:
+        content_store.create_schema()
+    except Exception as e:
+        logger.warning(f"Content store unavailable, caching in memory only: {e}")
+        return
+    content_cache.store = content_store
+
+
+def build_search_index(snapshot: Optional[SharedSnapshot] = None) -> None:
+    """
+    Load the BM25 index, then the re-ranker that uses its IDF (startup step).
+
+    The index is mapped from the shared snapshot when there is one, and
+    built from a Qdrant scroll otherwise.
+    """
+    global bm25_index, reranker
+    if snapshot is not None:
+        bm25_index = snapshot.bm25
+    else:
+        bm25_index = build_bm25_index_from_qdrant(qdrant_client, COLLECTION_NAME)  # None disables sparse/hybrid
+    reranker = create_reranker(
+        RERANKER,
+        idf=bm25_index.term_idf() if bm25_index else None,
+        cache_size=RERANK_CACHE_SIZE
+    )
+
+
+def open_shared_snapshot() -> Optional[SharedSnapshot]:
+    """The snapshot at SHARED_DATA_DIR (set by gunicorn.conf.py), or None."""
+    directory = os.getenv("SHARED_DATA_DIR")
+    if not directory:
+        return None
+    try:
+        snapshot = SharedSnapshot.open(directory)
+    except Exception as e:
+        logger.warning(f"Shared data snapshot at {directory} unavailable, loading per worker: {e}")
+        return None
+    logger.info(f"Mapped shared data snapshot {directory}: {snapshot.stats()}")
+    return snapshot
+
+
+def check_shared_snapshot() -> bool:
+    """
+    Whether the shared snapshot still matches the collection.
+
+    A stale one (alias switched or points ingested since it was built)
+    is dropped: context vectors come from Qdrant again and the chapter
+    index reloads. The caller rebuilds the BM25 index. The worker keeps
+    the snapshot if Qdrant cannot be asked.
+    """
+    global shared_snapshot, shared_vectors
+    if shared_snapshot is None:
+        return False
+    try:
+        if shared_snapshot.is_current(qdrant_client):
+            return True
+    except Exception as e:
+        logger.warning(f"Could not check the shared data snapshot, keeping it: {e}")
+        return True
+    logger.warning(f"Shared data snapshot {shared_snapshot.directory} is stale "
+                   f"(built from {shared_snapshot.stats()['collection_version']}); loading from Qdrant "
+                   "in this worker until the gunicorn master rebuilds it (kill -HUP)")
+    shared_snapshot = None
+    shared_vectors = None
+    if chapter_index:
+        chapter_index.expire()
+    return False
+
+
+async def watch_shared_snapshot() -> None:
+    """Check the shared snapshot every SHARED_DATA_CHECK_SECONDS; once stale, rebuild the search index."""
+    while shared_snapshot is not None:
+        await asyncio.sleep(SHARED_DATA_CHECK_SECONDS)
+        if not await asyncio.to_thread(check_shared_snapshot):
+            await asyncio.to_thread(build_search_index)
+
+
+def prepare_workers(directory: Optional[str] = None) -> str:
+    """
+    Load what worker processes can share, before they are forked.
+
+    Called by the gunicorn master (gunicorn.conf.py when_ready, and
+    on_reload to rebuild the snapshot): imports the SDKs and loads the
+    tokenizer so the workers inherit them copy-on-write, and writes the
+    shared data snapshot the workers map into directory (default
+    SHARED_DATA_DIR, else a new one). Returns the snapshot directory.
+    """
+    load_env()
+    import_modules(STARTUP_PRELOAD)
+    get_encoder(OPENAI_MODEL)
+    directory = directory or os.getenv("SHARED_DATA_DIR") or default_snapshot_dir()
+    client = init_qdrant_client()
+    try:
+        build_snapshot(client, COLLECTION_NAME, directory, VALID_CHAPTER_SLUGS)
+    finally:
+        client.close()  # No connections may cross the fork
+    return directory
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize clients on startup, cleanup on shutdown."""
-    global cohere_client, qdrant_client, db_connection, openai_client
+    """
+    Set up clients on startup, cleanup on shutdown.
+
+    Only configuration and cheap objects are set up before the server
+    starts listening. SDK clients are LazyClients, and the slow steps
+    (client builds, Postgres, BM25 index, tokenizer, chapter index) run
+    concurrently in the background; /health/ready reports when they are
+    done. Until then hybrid search and re-ranking are off and Postgres
+    is treated as unavailable, and a request that needs a client builds
+    it itself.
+    """
+    global cohere_client, qdrant_client, openai_client, embed_batcher
+    global route_cpu_sampler, chapter_index, content_cache, shared_snapshot, shared_vectors, snapshot_watcher, startup
 
     logger.info("=" * 50)
     logger.info("RAG Retrieval API Starting")
@@ -584,14 +1512,67 @@ async def lifespan(app: FastAPI):
 
     try:
         load_env()
-        cohere_client = init_cohere_client()
-        qdrant_client = init_qdrant_client()
-        db_connection = init_db_connection()  # May be None if DB unavailable
-        openai_client = init_openai_client()
-        if db_connection:
-            logger.info("All services initialized successfully")
-        else:
-            logger.info("Services initialized (Postgres unavailable - using Qdrant payload only)")
+        lazy_cohere = LazyClient("cohere", init_cohere_client)
+        lazy_qdrant = LazyClient("qdrant", init_qdrant_client)
+        lazy_openai = LazyClient("openai", init_openai_client)
+        cohere_client = guard_client("cohere", lazy_cohere, hedged=("embed",))
+        embed_batcher = EmbedBatcher(
+            embed_queries,
+            max_batch_size=EMBED_BATCH_MAX_SIZE,
+            window_ms=EMBED_BATCH_WINDOW_MS
+        )
+        register_stats(
+            "rag_embed_batcher",
+            lambda: embed_batcher.stats() if embed_batcher else None,
+            counters=("requests", "upstream_calls", "calls_saved", "texts_sent", "errors")
+        )
+        qdrant_client = guard_client(
+            "qdrant",
+            lazy_qdrant,
+            hedged=("query_points", "query_batch_points", "retrieve")
+        )
+        openai_client = guard_client(
+            "openai",
+            lazy_openai,
+            nested=("chat", "completions"),
+            factories=("with_options",)
+        )
+        snapshot = shared_snapshot = open_shared_snapshot()
+        if snapshot is not None:
+            shared_vectors = snapshot.vectors
+            register_stats("rag_shared_data", lambda: shared_snapshot.stats() if shared_snapshot else None)
+        chapter_index = ChapterIndex(
+            lambda: fetch_chapters(qdrant_client, COLLECTION_NAME, VALID_CHAPTER_SLUGS),
+            initial=snapshot.chapters if snapshot else None
+        )
+        content_cache = ContentCache()  # Backed by Postgres once connect_postgres has run
+        register_stats(
+            "rag_content_cache",
+            lambda: content_cache.stats() if content_cache else None,
+            counters=("hits", "store_hits", "misses", "store_errors")
+        )
+        register_stats(
+            "rag_reranker",
+            lambda: reranker.stats() if reranker else None,
+            counters=("cache_hits", "cache_misses")
+        )
+        if ROUTE_CPU_ENABLED:
+            # asyncio.to_thread jobs report the route that started them
+            asyncio.get_running_loop().set_default_executor(RouteAwareExecutor())
+            route_cpu_sampler = RouteCPUSampler().start()
+            logger.info(f"Per-route CPU sampling every {route_cpu_sampler.interval * 1000:.0f}ms")
+        startup = StartupTracker().start({
+            "cohere": lazy_cohere.get,
+            "qdrant": lazy_qdrant.get,
+            "openai": lazy_openai.get,
+            "postgres": connect_postgres,
+            "search_index": lambda: build_search_index(snapshot if check_shared_snapshot() else None),
+            "chapter_index": lambda: chapter_index.get(VALID_CHAPTER_SLUGS[0]),
+            "tokenizer": lambda: get_encoder(OPENAI_MODEL),  # Rather than on the first chat request
+        }, preload=STARTUP_PRELOAD)
+        if snapshot is not None:
+            snapshot_watcher = asyncio.create_task(watch_shared_snapshot())
+        logger.info("Listening; initializing services in the background (see /health/ready)")
     except Exception as e:
         logger.error(f"Startup failed: {e}")
         raise
@@ -599,6 +1580,17 @@ async def lifespan(app: FastAPI):
     yield
 
     # Cleanup
+    if snapshot_watcher:
+        snapshot_watcher.cancel()
+    if startup:
+        await startup.stop()
+    if route_cpu_sampler:
+        route_cpu_sampler.stop()
+        logger.info(f"Route CPU stats: {route_cpu_sampler.stats()}")
+    if embed_batcher:
+        logger.info(f"Embed batcher stats: {embed_batcher.stats()}")
+    if reranker:
+        logger.info(f"Reranker stats: {reranker.stats()}")
     if db_connection and not db_connection.closed:
         db_connection.close()
         logger.info("PostgreSQL connection closed")
@@ -615,6 +1607,25 @@ app = FastAPI(
     version="1.0.0",
     lifespan=lifespan
 )
+# Sync def routes report their route from the threadpool thread running them
+app.router.route_class = RouteCPURoute
+
+# Middleware added later wraps middleware added earlier: CORS is outermost
+
+# Request latency histograms; also labels stage timings and worker-thread CPU with the route
+app.add_middleware(MetricsMiddleware)
+
+# Root span per request (added after MetricsMiddleware so it wraps it)
+app.add_middleware(TracingMiddleware)
+
+# gzip/brotli for large JSON bodies (inside CORS, outside metrics and tracing)
+compression_stats = CompressionStats()
+register_stats(
+    "rag_compression",
+    compression_stats.stats,
+    counters=("responses", "compressed", "bytes_in", "bytes_out", "compress_seconds")
+)
+app.add_middleware(CompressionMiddleware, stats=compression_stats)
 
 # CORS middleware for frontend access
 # Includes localhost (dev), Vercel production, and Vercel preview deployments
@@ -696,6 +1707,14 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         error_type = "upstream_error"
     elif exc.status_code == 503:
         error_type = "service_unavailable"
+    elif exc.status_code == 504:
+        error_type = "timeout"
+    elif exc.status_code == 404:
+        error_type = "not_found"
+    elif exc.status_code == 401:
+        error_type = "unauthorized"
+    elif exc.status_code == 409:
+        error_type = "conflict"
 
     return JSONResponse(
         status_code=exc.status_code,
@@ -718,18 +1737,22 @@ async def generic_exception_handler(request: Request, exc: Exception):
 # =============================================================================
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+def health_check():
     """
     Check service health and dependency connectivity (T051).
 
-    Returns status of Qdrant, Postgres, and OpenAI connections.
+    Returns status of Qdrant, Postgres, and OpenAI connections, and the
+    circuit breaker state of each upstream (an open breaker means calls
+    to it currently fail fast).
     """
     qdrant_ok = check_qdrant_health()
     postgres_ok = check_postgres_health()
     openai_ok = check_openai_health()
+    breaker_states = {name: breaker.stats() for name, breaker in breakers.items()}
+    breakers_closed = all(b["state"] == "closed" for b in breaker_states.values())
 
     # All critical services must be available for "ok" status
-    if qdrant_ok and postgres_ok and openai_ok:
+    if qdrant_ok and postgres_ok and openai_ok and breakers_closed:
         status = "ok"
     elif qdrant_ok and openai_ok:  # Can work without Postgres (uses Qdrant payload)
         status = "degraded"
@@ -742,33 +1765,144 @@ async def health_check():
         status=status,
         qdrant=qdrant_ok,
         postgres=postgres_ok,
-        openai=openai_ok
+        openai=openai_ok,
+        breakers=breaker_states
     )
 
 
-@app.post("/search", response_model=SearchResponse)
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness probe: the process is up and its event loop answers.
+
+    Checks no dependency, so a slow upstream never gets a healthy
+    instance restarted.
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once every background startup step has finished.
+
+    503 while starting (or when a step failed); the body has the status
+    and time of each step either way.
+    """
+    if startup is None:
+        return JSONResponse(status_code=503, content={"status": "starting", "elapsed_ms": 0, "steps": {}})
+    report = {**startup.stats(), "pid": os.getpid()}  # Tells gunicorn workers apart
+    return JSONResponse(status_code=200 if startup.ready else 503, content=report)
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics in text exposition format.
+
+    Request and per-stage latency histograms (labeled by route template and
+    outcome), LLM token counters, and embed batcher / re-ranker cache stats.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/stats/embed")
+async def embed_batcher_stats():
+    """
+    Report embedding micro-batcher metrics.
+
+    calls_saved is the number of Cohere calls avoided by batching;
+    batch_size_histogram and the wait times show what the latency
+    window costs.
+    """
+    if embed_batcher is None:
+        raise HTTPException(status_code=503, detail="Embedding batcher not initialized")
+    return embed_batcher.stats()
+
+
+@app.get("/chunks/{chunk_id}/related", response_model=RelatedChunksResponse, response_class=ORJSONResponse)
+def related_chunks(
+    chunk_id: str,
+    limit: int = Query(DEFAULT_RELATED_LIMIT, ge=1, le=MAX_RELATED_LIMIT, description="Maximum related chunks")
+):
+    """
+    Related sections for a chunk, read from the precomputed neighbor graph.
+
+    The graph is built offline by embed-vectors.py, so this is a payload
+    lookup by id rather than a vector search.
+    """
+    try:
+        related = get_related_chunks(chunk_id, limit)
+    except Exception as e:
+        logger.error(f"Related chunks error: chunk_id={chunk_id}, error={e}")
+        raise HTTPException(status_code=503, detail="Vector store is unreachable")
+
+    if related is None:
+        raise HTTPException(status_code=404, detail=f"Chunk not found: {chunk_id}")
+
+    return RelatedChunksResponse(
+        chunk_id=chunk_id,
+        related=[SearchResult(**result) for result in related]
+    )
+
+
+@app.post("/search", response_model=SearchResponse, response_class=ORJSONResponse)
 async def semantic_search(request: SearchRequest):
     """
     Search book content using natural language queries.
 
-    Generates query embedding, performs vector search, and returns
+    Generates query embedding, performs vector search (or BM25 keyword
+    search, or a fusion of both, depending on mode), and returns
     ranked results with metadata for citations.
     """
     start_time = time.time()
 
     # Log request (T017)
-    logger.info(f"Search request: query='{request.query[:50]}...' top_k={request.top_k}")
+    logger.info(f"Search request: query='{request.query[:50]}...' top_k={request.top_k} "
+                f"mode={request.mode} hnsw_ef={request.hnsw_ef} exact={request.exact} "
+                f"slug={request.slug} source_path={request.source_path} chapter={request.chapter}")
+
+    filters = build_search_filters(request.slug, request.source_path, request.chapter)
+
+    if request.mode != "dense" and bm25_index is None:
+        raise HTTPException(status_code=503, detail="Keyword index is unavailable")
+
+    query_vector = None
+    if request.mode != "sparse":
+        try:
+            # Generate query embedding (T013)
+            query_vector = await embed_query_batched(request.query)
+        except CircuitOpenError as e:
+            logger.warning(f"Embedding skipped: {e}")
+            raise HTTPException(status_code=503, detail="Embedding service is temporarily unavailable")
+        except Exception as e:
+            logger.error(f"Embedding error: {e}")
+            raise HTTPException(status_code=502, detail="Failed to generate query embedding")
 
     try:
-        # Generate query embedding (T013)
-        query_vector = embed_query(request.query)
-    except Exception as e:
-        logger.error(f"Embedding error: {e}")
-        raise HTTPException(status_code=502, detail="Failed to generate query embedding")
-
-    try:
-        # Perform vector search (T014, T016)
-        results = vector_search(query_vector, request.top_k)
+        # Perform retrieval (T014, T016) off the event loop: the Qdrant client blocks
+        if request.mode == "dense":
+            results = await asyncio.to_thread(
+                vector_search,
+                query_vector,
+                request.top_k,
+                hnsw_ef=request.hnsw_ef,
+                exact=request.exact,
+                filters=filters
+            )
+        elif request.mode == "sparse":
+            results = await asyncio.to_thread(keyword_search, request.query, request.top_k, filters=filters)
+        else:
+            results = await asyncio.to_thread(
+                hybrid_search,
+                request.query,
+                query_vector,
+                request.top_k,
+                hnsw_ef=request.hnsw_ef,
+                exact=request.exact,
+                filters=filters
+            )
     except Exception as e:
         logger.error(f"Vector search error: {e}")
         raise HTTPException(status_code=503, detail="Vector store is unreachable")
@@ -786,7 +1920,58 @@ async def semantic_search(request: SearchRequest):
     )
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/search/batch", response_model=BatchSearchResponse, response_class=ORJSONResponse)
+async def semantic_search_batch(request: BatchSearchRequest):
+    """
+    Search book content for several queries at once.
+
+    Embeds all queries in a single Cohere call and runs them through one
+    Qdrant batch query. The remaining share of deadline_ms becomes the
+    timeout of each upstream call; a batch that runs out of time (or whose
+    upstream call times out) fails with 504 rather than returning partial
+    results.
+    """
+    start_time = time.time()
+    deadline = Deadline.from_ms(request.deadline_ms, default_ms=DEFAULT_BATCH_DEADLINE_MS)
+
+    queries = [q.query for q in request.queries]
+    logger.info(f"Batch search request: {len(queries)} queries, deadline_ms={request.deadline_ms}")
+
+    try:
+        with track_stage("embed"):
+            query_vectors = await asyncio.to_thread(embed_queries, queries, deadline.timeout("embed"))
+    except CircuitOpenError as e:
+        logger.warning(f"Batch embedding skipped: {e}")
+        raise HTTPException(status_code=503, detail="Embedding service is temporarily unavailable")
+    except Exception as e:
+        logger.error(f"Batch embedding error: {e}")
+        if is_timeout(e) or deadline.expired:
+            raise HTTPException(status_code=504, detail="Search deadline exceeded")
+        raise HTTPException(status_code=502, detail="Failed to generate query embeddings")
+
+    try:
+        results = await asyncio.to_thread(
+            vector_search_batch,
+            query_vectors,
+            [q.top_k for q in request.queries],
+            timeout=deadline.timeout("vector_search")
+        )
+    except Exception as e:
+        logger.error(f"Batch vector search error: {e}")
+        if is_timeout(e) or deadline.expired:
+            raise HTTPException(status_code=504, detail="Search deadline exceeded")
+        raise HTTPException(status_code=503, detail="Vector store is unreachable")
+
+    elapsed = time.time() - start_time
+    logger.info(f"Batch search completed: {len(queries)} queries in {elapsed:.3f}s")
+
+    return BatchSearchResponse(results=[
+        SearchResponse(query=query, results=[SearchResult(**r) for r in query_results])
+        for query, query_results in zip(queries, results)
+    ])
+
+
+@app.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
 async def chat(request: ChatRequest):
     """
     AI-powered chat endpoint with RAG context retrieval.
@@ -798,11 +1983,27 @@ async def chat(request: ChatRequest):
     T026, T028: Session management integration
     T030-T034: Source attribution
     T035-T038: Logging
+
+    The request deadline (deadline_ms, or CHAT_DEADLINE_MS) is shared by
+    embed, search and LLM: each call's timeout is what is left of it. If
+    less than CHAT_MIN_LLM_BUDGET_MS is left for the LLM, the LLM call
+    times out or its circuit is open, the retrieved sources are returned
+    without an answer (metadata.degraded). Running out before retrieval
+    finishes is a 504; an open Cohere or Qdrant circuit fails fast with 503.
+
+    The blocking SDK calls (Qdrant, OpenAI) and context packing run in
+    worker threads, so concurrent chats overlap instead of queueing on
+    the event loop.
     """
     start_time = time.time()
+    deadline = Deadline.from_ms(request.deadline_ms or DEFAULT_CHAT_DEADLINE_MS, default_ms=DEFAULT_CHAT_DEADLINE_MS)
 
     # T035: Log request at start
-    logger.info(f"Chat request: query='{request.message[:50]}...' session_id={request.session_id}")
+    logger.info(f"Chat request: query='{request.message[:50]}...' session_id={request.session_id} "
+                f"slug={request.slug} source_path={request.source_path} chapter={request.chapter} "
+                f"deadline_ms={int(deadline.budget_s * 1000)}")
+
+    filters = build_search_filters(request.slug, request.source_path, request.chapter)
 
     # T028: Cleanup expired sessions on each request
     cleanup_expired_sessions()
@@ -812,36 +2013,66 @@ async def chat(request: ChatRequest):
 
     try:
         # T016: Step 1 - Generate embedding and perform RAG search
-        query_vector = embed_query(request.message)
-        search_results = vector_search(query_vector, DEFAULT_TOP_K)
+        query_vector = await embed_query_batched(request.message, timeout=deadline.timeout("embed"))
+        # By configuration, not by whether the re-ranker is built yet: the context size stays the same during warm-up
+        context_top_k = RERANK_TOP_K if RERANKER != "none" else DEFAULT_TOP_K
+        search_results = await asyncio.to_thread(
+            retrieve_chat_context,
+            request.message,
+            query_vector,
+            context_top_k,
+            filters=filters,
+            expand_related=request.expand_related,
+            deadline=deadline
+        )
+        context_chunks = sum(len(r.get("chunk_ids", [])) for r in search_results)
 
         # T036: Log RAG results
-        chunk_ids = [r.get("chunk_id", "") for r in search_results]
+        chunk_ids = [r.get("chunk_ids", []) for r in search_results]
         scores = [r.get("score", 0) for r in search_results]
-        logger.info(f"RAG search: {len(search_results)} results, chunk_ids={chunk_ids}, scores={scores}")
+        logger.info(f"RAG search: {context_chunks} chunks in {len(search_results)} passages, "
+                    f"chunk_ids={chunk_ids}, scores={scores}")
 
         # T018: Handle empty RAG results
         if not search_results:
             logger.info("No RAG results found for query")
 
-        # T016: Step 2 - Build context from search results
-        context = build_context_from_search(search_results)
+        # T016: Step 2 - Build context from search results within the token budget
+        context, search_results, context_tokens = await asyncio.to_thread(build_context_from_search, search_results)
+        context_chunks = sum(len(r.get("chunk_ids", [])) for r in search_results)
+        logger.info(f"Context: {context_tokens} tokens (budget {CONTEXT_TOKEN_BUDGET}), "
+                    f"{len(search_results)} passages")
 
         # T016: Step 3 - Build prompt with conversation history
         conversation_history = session.get_history()
         messages = build_prompt(request.message, context, conversation_history)
 
-        # T016: Step 4 - Generate response
-        llm_start_time = time.time()
-        response_text, tokens_used = generate_response(messages)
-        llm_elapsed = time.time() - llm_start_time
-
-        # T037: Log LLM generation
-        logger.info(f"LLM generation: tokens_used={tokens_used}, generation_time={llm_elapsed:.3f}s")
+        # T016: Step 4 - Generate response (or degrade if the deadline leaves too little time)
+        degraded_reason = None
+        llm_budget = deadline.remaining()
+        if llm_budget * 1000 < MIN_LLM_BUDGET_MS:
+            degraded_reason = "llm_budget"
+        else:
+            llm_start_time = time.time()
+            try:
+                response_text, tokens_used = await asyncio.to_thread(generate_response, messages, llm_budget)
+            except DeadlineExceeded:
+                degraded_reason = "llm_timeout"
+            except CircuitOpenError:
+                degraded_reason = "llm_unavailable"
+            llm_elapsed = time.time() - llm_start_time
+
+        if degraded_reason:
+            logger.warning(f"Chat degraded ({degraded_reason}): {deadline.elapsed_ms()}ms of "
+                           f"{int(deadline.budget_s * 1000)}ms used, returning sources only")
+            response_text, tokens_used = DEGRADED_CHAT_MESSAGE, None
+        else:
+            # T037: Log LLM generation
+            logger.info(f"LLM generation: tokens_used={tokens_used}, generation_time={llm_elapsed:.3f}s")
 
-        # T024, T026: Update session with this exchange
-        session.add_turn("user", request.message)
-        session.add_turn("assistant", response_text)
+            # T024, T026: Update session with this exchange
+            session.add_turn("user", request.message)
+            session.add_turn("assistant", response_text)
 
         # T014, T031, T032, T033: Extract sources for response
         sources = extract_sources(search_results)
@@ -851,7 +2082,7 @@ async def chat(request: ChatRequest):
         response_time_ms = int(total_elapsed * 1000)
 
         # T038: Log response time
-        logger.info(f"Chat completed: response_time={response_time_ms}ms, context_chunks={len(search_results)}")
+        logger.info(f"Chat completed: response_time={response_time_ms}ms, context_chunks={context_chunks}")
 
         # T044: Warn if response time exceeds 5 seconds
         if total_elapsed > 5:
@@ -864,13 +2095,22 @@ async def chat(request: ChatRequest):
             metadata=ResponseMetadata(
                 response_time_ms=response_time_ms,
                 tokens_used=tokens_used,
-                context_chunks=len(search_results)
+                context_chunks=context_chunks,
+                context_tokens=context_tokens,
+                degraded=degraded_reason is not None,
+                degraded_reason=degraded_reason
             )
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         # T039: Error logging with context
         logger.error(f"Chat error: session_id={session.session_id}, query='{request.message[:50]}...', error={e}")
+        if isinstance(e, DeadlineExceeded) or deadline.expired:
+            raise HTTPException(status_code=504, detail="Chat deadline exceeded. Please try again.")
+        if isinstance(e, CircuitOpenError):
+            raise HTTPException(status_code=503, detail="Search is temporarily unavailable. Please try again shortly.")
         raise HTTPException(status_code=502, detail="Unable to generate response. Please try again.")
 
 
@@ -889,13 +2129,15 @@ async def delete_session(session_id: str):
         raise HTTPException(status_code=404, detail="Session not found")
 
 
-@app.post("/personalize", response_model=PersonalizeResponse)
+@app.post("/personalize", response_model=PersonalizeResponse, response_class=ORJSONResponse)
 async def personalize_content(request: PersonalizeRequest):
     """
     Personalize chapter content based on user profile.
 
     Takes a chapter slug and user profile, returns personalized content
     adapted to the user's programming level, hardware background, and learning goals.
+    Served from the content cache when this chapter version was already
+    personalized for the same profile.
     """
     start_time = time.time()
 
@@ -904,73 +2146,51 @@ async def personalize_content(request: PersonalizeRequest):
                 f"level={request.user_profile.programming_level}, "
                 f"hardware={request.user_profile.hardware_background}")
 
-    # Validate chapter slug
-    if request.chapter_slug not in VALID_CHAPTER_SLUGS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid chapter_slug: must be one of {', '.join(VALID_CHAPTER_SLUGS)}"
-        )
+    key, generate = await asyncio.to_thread(personalize_target, request.chapter_slug, request.user_profile)
+    body, _, cached = await run_generation("Personalization", "personalize", key, generate)
 
-    # Validate learning goals
-    valid_goals = {"career_transition", "academic", "personal", "upskilling"}
-    for goal in request.user_profile.learning_goals:
-        if goal not in valid_goals:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid learning goal '{goal}': must be one of {', '.join(valid_goals)}"
-            )
-
-    try:
-        # Call personalization utility
-        result = personalize_chapter_content(
-            openai_client=openai_client,
-            qdrant_client=qdrant_client,
-            chapter_slug=request.chapter_slug,
-            programming_level=request.user_profile.programming_level,
-            hardware_background=request.user_profile.hardware_background,
-            learning_goals=request.user_profile.learning_goals
-        )
-
-        # Build response
-        response = PersonalizeResponse(
-            chapter_slug=result["chapter_slug"],
-            original_title=result["original_title"],
-            personalized_content=result["personalized_content"],
-            metadata=PersonalizeMetadata(
-                processing_time_ms=result["metadata"]["processing_time_ms"],
-                tokens_used=result["metadata"]["tokens_used"],
-                profile_summary=result["metadata"]["profile_summary"]
-            )
-        )
-
-        elapsed = time.time() - start_time
-        logger.info(f"Personalization complete: {elapsed:.2f}s")
-
-        return response
-
-    except ValueError as e:
-        # Content not found or invalid input
-        logger.warning(f"Personalization validation error: {e}")
-        raise HTTPException(status_code=404, detail=str(e))
-
-    except RuntimeError as e:
-        # OpenAI or other runtime error
-        logger.error(f"Personalization runtime error: {e}")
-        raise HTTPException(status_code=500, detail="Unable to personalize content. Please try again.")
+    elapsed = time.time() - start_time
+    logger.info(f"Personalization complete: {elapsed:.2f}s (cached={cached})")
+    return body
+
+
+@app.get("/personalize/{chapter_slug}", response_model=PersonalizeResponse, response_class=ORJSONResponse,
+         responses={304: {"description": "Not modified (If-None-Match matched the ETag)"}})
+async def get_personalized_content(
+    request: Request,
+    chapter_slug: str,
+    programming_level: str = Query(..., pattern="^(beginner|intermediate|advanced)$"),
+    hardware_background: str = Query(..., pattern="^(none|hobbyist|professional)$"),
+    learning_goals: List[str] = Query(..., min_length=1, description="Repeat for several goals")
+):
+    """
+    Cacheable personalization of a chapter for a profile.
 
-    except Exception as e:
-        # Unexpected error
-        logger.error(f"Personalization unexpected error: {e}")
-        raise HTTPException(status_code=500, detail="An unexpected error occurred")
+    The strong ETag is a hash of the cached body; a matching
+    If-None-Match gets 304 without the body while it stays cached.
+    """
+    profile = UserProfile(
+        programming_level=programming_level,
+        hardware_background=hardware_background,
+        learning_goals=learning_goals
+    )
+    key, generate = await asyncio.to_thread(personalize_target, chapter_slug, profile)
+    body, etag, cached = await run_generation("Personalization", "personalize", key, generate)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    logger.info(f"Personalize GET: chapter={chapter_slug}, variant={key.split(':')[2]}, cached={cached}")
+    return ORJSONResponse(body, headers=cache_headers(etag))
 
 
-@app.post("/translate", response_model=TranslateResponse)
+@app.post("/translate", response_model=TranslateResponse, response_class=ORJSONResponse)
 async def translate_content_endpoint(request: TranslateRequest):
     """
     Translate chapter content to Urdu.
 
     Takes a chapter ID and user ID, returns translated content with
     proper Urdu text that preserves code blocks and technical terms.
+    Translations do not depend on the user, so every user shares the
+    cached translation of a chapter version.
 
     Feature: 013-urdu-translation
     """
@@ -979,13 +2199,6 @@ async def translate_content_endpoint(request: TranslateRequest):
     # Log request
     logger.info(f"Translate request: chapter={request.chapter_id}, user={request.user_id}")
 
-    # Validate chapter ID
-    if request.chapter_id not in VALID_CHAPTER_SLUGS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid chapter_id: must be one of {', '.join(VALID_CHAPTER_SLUGS)}"
-        )
-
     # Validate user_id is provided
     if not request.user_id or len(request.user_id.strip()) == 0:
         raise HTTPException(
@@ -993,45 +2206,88 @@ async def translate_content_endpoint(request: TranslateRequest):
             detail="User authentication required"
         )
 
-    try:
-        # Call translation utility
-        result = translate_chapter_content(
-            openai_client=openai_client,
-            qdrant_client=qdrant_client,
-            chapter_id=request.chapter_id,
-            user_id=request.user_id
-        )
+    key, generate = await asyncio.to_thread(translate_target, request.chapter_id, request.user_id)
+    body, _, cached = await run_generation("Translation", "translate", key, generate)
 
-        # Build response
-        response = TranslateResponse(
-            chapter_id=result["chapter_id"],
-            original_title=result["original_title"],
-            translated_title=result["translated_title"],
-            translated_content=result["translated_content"],
-            source_language=result["source_language"],
-            target_language=result["target_language"],
-            translated_at=result["translated_at"]
-        )
+    elapsed = time.time() - start_time
+    logger.info(f"Translation complete: {elapsed:.2f}s (cached={cached})")
+    return body
 
-        elapsed = time.time() - start_time
-        logger.info(f"Translation complete: {elapsed:.2f}s")
 
-        return response
+@app.get("/translate/{chapter_id}", response_model=TranslateResponse, response_class=ORJSONResponse,
+         responses={304: {"description": "Not modified (If-None-Match matched the ETag)"}})
+async def get_translated_content(
+    request: Request,
+    chapter_id: str,
+    user_id: str = Query(..., description="Firebase UID of authenticated user (as in POST /translate)")
+):
+    """
+    Cacheable Urdu translation of a chapter.
 
-    except ValueError as e:
-        # Content not found or invalid input
-        logger.warning(f"Translation validation error: {e}")
-        raise HTTPException(status_code=404, detail=str(e))
+    Requires the same user_id as POST /translate. The strong ETag is a
+    hash of the cached body; a matching If-None-Match gets 304 without the
+    body while it stays cached.
 
-    except RuntimeError as e:
-        # OpenAI or other runtime error
-        logger.error(f"Translation runtime error: {e}")
-        raise HTTPException(status_code=500, detail="Unable to translate content. Please try again.")
+    Feature: 013-urdu-translation
+    """
+    if not user_id.strip():
+        raise HTTPException(status_code=401, detail="User authentication required")
 
-    except Exception as e:
-        # Unexpected error
-        logger.error(f"Translation unexpected error: {e}")
-        raise HTTPException(status_code=500, detail="An unexpected error occurred")
+    key, generate = await asyncio.to_thread(translate_target, chapter_id, user_id)
+    body, etag, cached = await run_generation("Translation", "translate", key, generate)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    logger.info(f"Translate GET: chapter={chapter_id}, user={user_id}, cached={cached}")
+    return ORJSONResponse(body, headers=cache_headers(etag))
+
+
+# =============================================================================
+# Admin Endpoints (profiling)
+# =============================================================================
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)])
+async def capture_profile(
+    seconds: float = Query(DEFAULT_PROFILE_SECONDS, gt=0, le=MAX_PROFILE_SECONDS, description="Capture length"),
+    interval_ms: float = Query(DEFAULT_PROFILE_INTERVAL_MS, ge=1, le=100, description="Sampling interval"),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$", description="collapsed or json"),
+    idle: bool = Query(False, description="Include stacks of threads that used no CPU")
+):
+    """
+    Sample every thread's stack for a while and return the profile.
+
+    collapsed (default) is one "frame;frame;frame count" line per stack,
+    as py-spy --format raw writes it, for flamegraph.pl, inferno or
+    speedscope. json returns capture totals and the top functions by self
+    and total samples. The capture runs on a background thread while
+    this request waits, so the traffic being profiled is unaffected.
+    """
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile capture is already running")
+
+    async with profile_lock:
+        profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=idle).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+
+    logger.info(f"Profile captured: {profiler.samples} samples over {seconds}s")
+    if format == "json":
+        return profiler.summary()
+    return PlainTextResponse(profiler.collapsed())
+
+
+@app.get("/admin/profile/routes", dependencies=[Depends(require_admin)])
+async def route_cpu_profile():
+    """
+    CPU time per route since startup from the always-on sampler.
+
+    Requires PROFILE_ROUTE_CPU=1; the same numbers are exported as
+    rag_route_cpu_seconds_total on /metrics.
+    """
+    if route_cpu_sampler is None:
+        raise HTTPException(status_code=503, detail="Per-route CPU sampling is off (set PROFILE_ROUTE_CPU=1)")
+    return route_cpu_sampler.stats()
 
 
 # =============================================================================
@@ -13,7 +13,6 @@ import os
 from enum import Enum
 from typing import List, Optional
 
-import psycopg2
 from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel, EmailStr, Field
 
@@ -24,13 +23,15 @@ from .auth_utils import (
     hash_password,
     verify_password,
 )
+from .metrics_utils import track_stage
+from .profiling_utils import RouteCPURoute
 
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Create router
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], route_class=RouteCPURoute)  # Sign-up/in hash on the threadpool
 
 # Cookie settings
 COOKIE_NAME = "session_token"
@@ -104,7 +105,10 @@ class SessionResponse(BaseModel):
 
 def get_db_connection():
     """Get database connection."""
-    return psycopg2.connect(os.getenv("DATABASE_URL"))
+    import psycopg2  # Deferred to the first auth request: not needed to start serving
+
+    with track_stage("db_connect"):
+        return psycopg2.connect(os.getenv("DATABASE_URL"))
 
 
 def user_to_response(row: tuple) -> UserResponse:
@@ -124,7 +128,7 @@ def user_to_response(row: tuple) -> UserResponse:
 # =============================================================================
 
 @router.post("/sign-up", response_model=AuthResponse, status_code=201)
-async def sign_up(request: SignUpRequest, response: Response):
+def sign_up(request: SignUpRequest, response: Response):
     """
     Register a new user with email, password, and background information.
 
@@ -135,32 +139,35 @@ async def sign_up(request: SignUpRequest, response: Response):
 
     try:
         # Check if email already exists
-        cursor.execute("SELECT id FROM users WHERE email = %s", (request.email,))
+        with track_stage("db", query="select_user_by_email"):
+            cursor.execute("SELECT id FROM users WHERE email = %s", (request.email,))
         if cursor.fetchone():
             raise HTTPException(status_code=409, detail="Email already registered")
 
         # Hash password
-        password_hash = hash_password(request.password)
+        with track_stage("auth_hash"):
+            password_hash = hash_password(request.password)
 
         # Convert learning goals to list of strings
         learning_goals = [goal.value for goal in request.learningGoals]
 
         # Insert new user
-        cursor.execute(
-            """
-            INSERT INTO users (email, password_hash, name, programming_level, hardware_background, learning_goals)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id, email, name, programming_level, hardware_background, learning_goals
-            """,
-            (
-                request.email,
-                password_hash,
-                request.name,
-                request.programmingLevel.value,
-                request.hardwareBackground.value,
-                learning_goals,
-            ),
-        )
+        with track_stage("db", query="insert_user"):
+            cursor.execute(
+                """
+                INSERT INTO users (email, password_hash, name, programming_level, hardware_background, learning_goals)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id, email, name, programming_level, hardware_background, learning_goals
+                """,
+                (
+                    request.email,
+                    password_hash,
+                    request.name,
+                    request.programmingLevel.value,
+                    request.hardwareBackground.value,
+                    learning_goals,
+                ),
+            )
 
         row = cursor.fetchone()
         conn.commit()
@@ -193,7 +200,7 @@ async def sign_up(request: SignUpRequest, response: Response):
 
 
 @router.post("/sign-in", response_model=AuthResponse)
-async def sign_in(request: SignInRequest, response: Response):
+def sign_in(request: SignInRequest, response: Response):
     """
     Authenticate user with email and password.
 
@@ -204,20 +211,23 @@ async def sign_in(request: SignInRequest, response: Response):
 
     try:
         # Get user by email
-        cursor.execute(
-            """
-            SELECT id, email, name, programming_level, hardware_background, learning_goals, password_hash
-            FROM users WHERE email = %s
-            """,
-            (request.email,),
-        )
+        with track_stage("db", query="select_user_by_email"):
+            cursor.execute(
+                """
+                SELECT id, email, name, programming_level, hardware_background, learning_goals, password_hash
+                FROM users WHERE email = %s
+                """,
+                (request.email,),
+            )
         row = cursor.fetchone()
 
         if not row:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         # Verify password (password_hash is last column)
-        if not verify_password(request.password, row[6]):
+        with track_stage("auth_hash"):
+            password_ok = verify_password(request.password, row[6])
+        if not password_ok:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
         user = user_to_response(row[:6])
@@ -247,7 +257,7 @@ async def sign_in(request: SignInRequest, response: Response):
 
 
 @router.get("/session", response_model=SessionResponse)
-async def get_session(request: Request):
+def get_session(request: Request):
     """
     Get current session from cookie.
 
@@ -266,13 +276,14 @@ async def get_session(request: Request):
     cursor = conn.cursor()
 
     try:
-        cursor.execute(
-            """
-            SELECT id, email, name, programming_level, hardware_background, learning_goals
-            FROM users WHERE id = %s
-            """,
-            (payload["sub"],),
-        )
+        with track_stage("db", query="select_user_by_id"):
+            cursor.execute(
+                """
+                SELECT id, email, name, programming_level, hardware_background, learning_goals
+                FROM users WHERE id = %s
+                """,
+                (payload["sub"],),
+            )
         row = cursor.fetchone()
 
         if not row:
@@ -6,18 +6,28 @@ Provides password hashing and JWT token management for the auth system.
 
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 import jwt
-from passlib.context import CryptContext
 
 
 # JWT Configuration
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_DAYS = 7
 
-# Password hashing context - use argon2 (no 72-byte limit like bcrypt)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    Password hashing context - use argon2 (no 72-byte limit like bcrypt).
+
+    Built on the first sign-up or sign-in, so passlib and argon2 are not
+    imported at API startup.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["argon2"], deprecated="auto")
 
 
 def get_secret_key() -> str:
@@ -38,7 +48,7 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
@@ -53,7 +63,7 @@ def verify_password(password: str, password_hash: str) -> bool:
         True if password matches, False otherwise
     """
     try:
-        return pwd_context.verify(password, password_hash)
+        return get_pwd_context().verify(password, password_hash)
     except Exception:
         return False
 
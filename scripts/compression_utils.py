@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Response Compression for the RAG API
+
+This module compresses large JSON and text responses with the encoding the
+client prefers (brotli, then gzip), negotiated from Accept-Encoding:
+
+- Only bodies with a Content-Length of at least COMPRESSION_MIN_BYTES are
+  compressed; small bodies gain little, and streamed bodies (no
+  Content-Length) pass through untouched so tokens are not held back
+- Only textual content types are compressed, and responses that already
+  carry a Content-Encoding are left alone
+- Strong ETags of compressed bodies get the encoding appended ("abc-br"),
+  since the compressed bytes are a different representation
+- brotli is optional: without the brotli package only gzip is offered
+- Counters (bytes in/out, compression CPU time) are available via stats()
+  and exported on /metrics as rag_compression_*
+
+Usage:
+    from scripts.compression_utils import CompressionMiddleware
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+"""
+
+import gzip
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+COMPRESSION_ENABLED = os.getenv("COMPRESSION", "1") == "1"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # 4-5 is the usual choice for dynamic content
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def supported_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first."""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the response encoding for an Accept-Encoding header value.
+
+    Honors q-values (q=0 refuses an encoding, "*" covers unlisted ones);
+    ties go to the server preference (br over gzip). Returns None for
+    identity.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with encoding ("br" or "gzip")."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionStats:
+    """Thread-safe counters of compressed responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_seconds = 0.0
+        self.by_encoding: Dict[str, int] = {}
+
+    def record(self, encoding: Optional[str], bytes_in: int, bytes_out: int, seconds: float) -> None:
+        with self._lock:
+            self.responses += 1
+            if encoding is None:
+                return
+            self.compressed += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.compress_seconds += seconds
+            self.by_encoding[encoding] = self.by_encoding.get(encoding, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "responses": self.responses,
+                "compressed": self.compressed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None,
+                "compress_seconds": round(self.compress_seconds, 6),
+                "by_encoding": dict(self.by_encoding),
+                "encodings": supported_encodings(),
+            }
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing complete textual responses per Accept-Encoding.
+
+    Pure ASGI (not BaseHTTPMiddleware) so the body is handled as raw bytes
+    and streamed responses are forwarded message by message.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, stats: Optional[CompressionStats] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.stats = stats or CompressionStats()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        accept = _header(scope.get("headers", []), b"accept-encoding")
+        encoding = choose_encoding(accept.decode("latin-1")) if accept else None
+        start_message: Optional[dict] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                length = _header(headers, b"content-length")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES) and not _header(headers, b"content-encoding")
+                if compressible:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                # Without Content-Length the body is a stream: never hold it back
+                if not compressible or encoding is None or length is None or int(length) < self.minimum_size:
+                    passthrough = True
+                    self.stats.record(None, 0, 0, 0.0)
+                    await send({**message, "headers": headers})
+                    return
+                start_message = {**message, "headers": headers}
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            # Known-length body (possibly re-chunked by BaseHTTPMiddleware): collect, then compress
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            passthrough = True
+            body = b"".join(chunks)
+            started = time.perf_counter()
+            compressed = compress(body, encoding)
+            self.stats.record(encoding, len(body), len(compressed), time.perf_counter() - started)
+            headers = []
+            for key, value in start_message["headers"]:
+                if key.lower() == b"content-length":
+                    continue
+                if key.lower() == b"etag" and value.startswith(b'"'):
+                    # A strong ETag names one representation: tag the encoded one
+                    value = value[:-1] + b"-" + encoding.encode("latin-1") + b'"'
+                headers.append((key, value))
+            headers += [(b"content-encoding", encoding.encode("latin-1")),
+                        (b"content-length", str(len(compressed)).encode("latin-1"))]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
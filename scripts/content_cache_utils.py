@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Content Cache for Personalized and Translated Chapters
+
+Personalizations and translations only change when the chapter text or the
+prompt changes, so each generated body is cached under a key made of:
+
+    kind : chapter : variant : chapter content hash : prompt version
+
+- ChapterIndex: all chapters from one Qdrant scroll, with a content hash
+  per chapter, refreshed after CHAPTER_INDEX_TTL_SECONDS; validators can be
+  computed without touching Qdrant on every request
+- ContentCache: bounded LRU of generated response bodies, optionally backed
+  by a PostgresContentStore (generated_content table) so entries survive
+  restarts and are shared by workers and the warm-up job
+  (scripts/warm-personalization.py)
+- Strong ETags are a hash of the serialized body, kept with the cache
+  entry: generations are sampled (personalizations at temperature 0.7), so
+  two bodies for the same key differ and must not share a validator.
+  Clients revalidate with If-None-Match and get 304 Not Modified while the
+  body they hold is the cached one
+
+Usage:
+    from scripts.content_cache_utils import ChapterIndex, ContentCache, cache_key, etag_matches
+
+    key = cache_key("translate", "chapter-1", "ur", chapter["content_hash"], PROMPT_VERSION)
+    body, etag = content_cache.get_entry(key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        ...  # 304
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+CONTENT_CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "256"))
+CONTENT_CACHE_MAX_AGE = int(os.getenv("CONTENT_CACHE_MAX_AGE", "3600"))  # Cache-Control max-age (seconds)
+CHAPTER_INDEX_TTL_SECONDS = float(os.getenv("CHAPTER_INDEX_TTL_SECONDS", "300"))
+CONTENT_TABLE = "generated_content"
+ENCODING_SUFFIXES = ("-br", "-gzip")  # Added to ETags by CompressionMiddleware
+SCROLL_PAGE_SIZE = 256
+
+
+def prompt_version(*parts: Any) -> str:
+    """Short hash of everything that shapes a generation (model, prompt templates, revision)."""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def content_hash(text: str) -> str:
+    """Short hash of a chapter's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(kind: str, chapter: str, variant: str, chapter_hash: str, version: str) -> str:
+    """Cache key of one generated body."""
+    return f"{kind}:{chapter}:{variant}:{chapter_hash}:{version}"
+
+
+def etag_for(body: Dict[str, Any]) -> str:
+    """Strong ETag (quoted) of a body; key order does not matter, so it survives a JSONB round trip."""
+    serialized = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return '"' + hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag.
+
+    Uses the weak comparison If-None-Match calls for (W/ is ignored) and
+    accepts the encoding-suffixed variants CompressionMiddleware sends.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix + '"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
+
+
+def chapter_source_prefix(slug: str) -> str:
+    """source_path prefix of a chapter's chunks ("intro" -> "docs/intro")."""
+    return "docs/intro" if slug == "intro" else f"docs/{slug}/"
+
+
+def fetch_chapters(qdrant_client, collection_name: str, slugs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Assemble every chapter in slugs from one scroll over the collection."""
+    payloads = []
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        payloads.extend(point.payload for point in points)
+        if not points or offset is None:
+            break
+    return assemble_chapters(payloads, slugs)
+
+
+def assemble_chapters(payloads: Iterable[Dict[str, Any]], slugs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group chunk payloads into chapters (title, content, chunk_count, content_hash).
+
+    Chunks are ordered by chunk_id and joined as personalization_utils and
+    translation_utils do, so the text (and its hash) matches theirs.
+    """
+    prefixes = {slug: chapter_source_prefix(slug) for slug in slugs}
+    chunks: Dict[str, List[dict]] = {slug: [] for slug in prefixes}
+    for payload in payloads:
+        source_path = payload.get("source_path", "")
+        for slug, prefix in prefixes.items():
+            if source_path.startswith(prefix):
+                chunks[slug].append(payload)
+                break
+
+    chapters = {}
+    for slug, chapter_payloads in chunks.items():
+        if not chapter_payloads:
+            continue
+        chapter_payloads.sort(key=lambda p: p.get("chunk_id", ""))
+        content = "\n\n".join(p.get("text", "") for p in chapter_payloads if p.get("text"))
+        chapters[slug] = {
+            "title": chapter_payloads[0].get("title", f"Chapter: {slug}"),
+            "content": content,
+            "chunk_count": len(chapter_payloads),
+            "content_hash": content_hash(content),
+        }
+    return chapters
+
+
+class ChapterIndex:
+    """Chapter texts and content hashes, reloaded together once older than ttl."""
+
+    def __init__(
+        self,
+        load: Callable[[], Dict[str, Dict[str, Any]]],
+        ttl: float = CHAPTER_INDEX_TTL_SECONDS,
+        initial: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """
+        Args:
+            load: Returns every chapter (fetch_chapters)
+            ttl: Seconds before the next get() reloads
+            initial: Chapters already loaded elsewhere (the shared snapshot), served until ttl passes
+        """
+        self.load = load
+        self.ttl = ttl
+        self._chapters: Dict[str, Dict[str, Any]] = initial or {}
+        self._loaded_at: Optional[float] = time.monotonic() if initial else None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def get(self, slug: str) -> Optional[Dict[str, Any]]:
+        """Chapter dict (title, content, chunk_count, content_hash) or None if unknown."""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.reload()
+        return self._chapters.get(slug)
+
+    def reload(self) -> None:
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.ttl:
+                return  # Another thread reloaded while we waited
+            try:
+                chapters = self.load()
+            except Exception as e:
+                if not self._chapters:
+                    raise
+                # Keep serving the last good index; try again after another ttl
+                logger.warning(f"Chapter index reload failed, keeping previous index: {e}")
+                self._loaded_at = time.monotonic()
+                return
+            changed = sorted(s for s, c in chapters.items()
+                             if self._chapters.get(s, {}).get("content_hash") != c["content_hash"])
+            self._chapters = chapters
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+        if changed:
+            logger.info(f"Chapter index loaded: {len(chapters)} chapters, changed: {', '.join(changed)}")
+
+    def expire(self) -> None:
+        """Reload on the next get (keeping the current chapters until then)."""
+        with self._lock:
+            self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chapters": len(self._chapters),
+            "reloads": self.reloads,
+            "age_s": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None,
+        }
+
+
+class PostgresContentStore:
+    """generated_content table holding cached bodies as JSONB."""
+
+    def __init__(self, connection: Callable[[], Any]):
+        """
+        Args:
+            connection: Returns the psycopg2 connection to use (or None while unavailable)
+        """
+        self.connection = connection
+        self._lock = threading.Lock()  # One cursor at a time on the shared connection
+
+    def _run(self, sql: str, params: tuple = (), fetch: bool = False):
+        conn = self.connection()
+        if conn is None or conn.closed:
+            return None
+        with self._lock:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params)
+                    row = cur.fetchone() if fetch else None
+                conn.commit()
+                return row
+            except Exception:
+                conn.rollback()
+                raise
+
+    def create_schema(self) -> None:
+        self._run(f"""
+            CREATE TABLE IF NOT EXISTS {CONTENT_TABLE} (
+                cache_key TEXT PRIMARY KEY,
+                kind VARCHAR(32) NOT NULL,
+                chapter VARCHAR(64) NOT NULL,
+                body JSONB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._run(f"SELECT body FROM {CONTENT_TABLE} WHERE cache_key = %s", (key,), fetch=True)
+        if row is None:
+            return None
+        return row[0] if isinstance(row[0], dict) else json.loads(row[0])
+
+    def put(self, key: str, body: Dict[str, Any]) -> None:
+        kind, chapter = key.split(":", 2)[:2]
+        self._run(
+            f"""
+            INSERT INTO {CONTENT_TABLE} (cache_key, kind, chapter, body) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (cache_key) DO UPDATE SET body = EXCLUDED.body, created_at = CURRENT_TIMESTAMP
+            """,
+            (key, kind, chapter, json.dumps(body, ensure_ascii=False))
+        )
+
+    def keys(self, kind: str) -> List[str]:
+        """Every stored key of kind (lets batch jobs skip work that is already done)."""
+        conn = self.connection()
+        if conn is None or conn.closed:
+            return []
+        with self._lock, conn.cursor() as cur:
+            cur.execute(f"SELECT cache_key FROM {CONTENT_TABLE} WHERE kind = %s", (kind,))
+            keys = [row[0] for row in cur.fetchall()]
+        conn.commit()
+        return keys
+
+
+class ContentCache:
+    """
+    Bounded LRU of generated bodies, read through to an optional store.
+
+    Each entry keeps its body's ETag, computed once when it enters memory.
+    Store errors are logged and treated as misses: the cache never fails
+    a request.
+    """
+
+    def __init__(self, max_entries: int = CONTENT_CACHE_SIZE, store: Optional[PostgresContentStore] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.store_errors = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """(body, ETag) stored under key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        if self.store is not None:
+            body = None
+            try:
+                body = self.store.get(key)
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"Content store read failed: {e}")
+            if body is not None:
+                with self._lock:
+                    self.store_hits += 1
+                return self._remember(key, body)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, body: Dict[str, Any]) -> str:
+        """Store body under key; returns its ETag."""
+        _, etag = self._remember(key, body)
+        if self.store is not None:
+            try:
+                self.store.put(key, body)
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"Content store write failed: {e}")
+        return etag
+
+    def _remember(self, key: str, body: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        entry = (body, etag_for(body))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def __contains__(self, key: str) -> bool:
+        """Whether key is in memory (no store lookup, not counted)."""
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "store_errors": self.store_errors,
+            }
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Context Selection Utilities for Chat
+
+This module post-processes retrieved chunks before they become LLM context:
+Maximal Marginal Relevance (MMR) picks a diverse subset of the candidates,
+consecutive chunks from the same source file are merged into single
+passages so the prompt does not repeat per-chunk headers for one section,
+and the passages are packed into a token budget.
+
+Token counts come from tiktoken when it is installed and its encoding is
+available; otherwise they are estimated at CHARS_PER_TOKEN characters per
+token.
+
+Usage:
+    from scripts.context_utils import mmr_select, merge_adjacent_chunks, pack_context
+
+    selected = [candidates[i] for i in mmr_select(query_vector, vectors, top_k=5)]
+    passages = merge_adjacent_chunks(selected)
+    packed, tokens = pack_context(passages, token_budget=1500, model="gpt-4o-mini")
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_MMR_LAMBDA = 0.5  # 1.0 = pure relevance, 0.0 = pure diversity
+CHARS_PER_TOKEN = 4  # Fallback estimate when tiktoken is unavailable
+MIN_TRIMMED_TOKENS = 32  # Smaller trimmed passages are dropped rather than sent
+PASSAGE_SEPARATOR = "\n\n"
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def mmr_select(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    top_k: int,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+    relevance: Optional[Sequence[float]] = None
+) -> List[int]:
+    """
+    Pick top_k candidates by Maximal Marginal Relevance.
+
+    Each step chooses the candidate maximizing
+    lambda * sim(query, c) - (1 - lambda) * max(sim(c, already selected)).
+    Similarities are cosine, computed once as a single matrix product; the
+    greedy loop only updates a running max-similarity vector.
+
+    Args:
+        query_vector: Query embedding
+        candidate_vectors: Candidate embeddings, one row per candidate
+        top_k: Number of candidates to select
+        lambda_mult: Relevance/diversity trade-off in [0, 1]
+        relevance: Per-candidate relevance (e.g. re-ranker scores) used
+            instead of sim(query, c)
+
+    Returns:
+        Indices into candidate_vectors in selection order
+    """
+    if len(candidate_vectors) == 0 or top_k <= 0:
+        return []
+
+    candidates = _normalize_rows(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_vector, dtype=np.float32))
+
+    if relevance is None:
+        relevance = candidates @ query
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+    similarity = candidates @ candidates.T
+
+    k = min(top_k, len(candidates))
+    selected = [int(np.argmax(relevance))]
+    max_sim = similarity[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * max_sim
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_sim, similarity[best], out=max_sim)
+
+    return selected
+
+
+def merge_adjacent_chunks(
+    results: List[Dict[str, Any]],
+    separator: str = "\n"
+) -> List[Dict[str, Any]]:
+    """
+    Merge results that are consecutive chunks of the same source file.
+
+    Results need source_path and order_index. Each merged passage keeps the
+    first chunk's fields, joins the snippets in document order, takes the
+    best score of its chunks and lists every merged id in chunk_ids.
+    Passages are returned in the rank order of their best chunk.
+
+    Args:
+        results: Ranked result dicts, best first
+        separator: Text placed between merged snippets
+
+    Returns:
+        Ranked passage dicts
+    """
+    by_source: Dict[str, List[tuple]] = {}
+    for rank, result in enumerate(results):
+        by_source.setdefault(result.get("source_path", ""), []).append((rank, result))
+
+    passages = []
+    for chunks in by_source.values():
+        chunks.sort(key=lambda item: item[1].get("order_index", 0))
+        run = [chunks[0]]
+        for item in chunks[1:]:
+            if item[1].get("order_index", 0) == run[-1][1].get("order_index", 0) + 1:
+                run.append(item)
+            else:
+                passages.append(_merge_run(run, separator))
+                run = [item]
+        passages.append(_merge_run(run, separator))
+
+    passages.sort(key=lambda item: item[0])
+    merged = [passage for _, passage in passages]
+    if len(merged) < len(results):
+        logger.debug(f"Merged {len(results)} chunks into {len(merged)} passages")
+    return merged
+
+
+def _merge_run(run: List[tuple], separator: str) -> tuple:
+    """Collapse a run of (rank, result) pairs into (best rank, passage)."""
+    first = run[0][1]
+    passage = {
+        **first,
+        "snippet": separator.join(result.get("snippet", "") for _, result in run),
+        "score": max(result.get("score", 0.0) for _, result in run),
+        "chunk_ids": [result.get("chunk_id", "") for _, result in run],
+    }
+    passage.pop("vector", None)
+    return min(rank for rank, _ in run), passage
+
+
+@lru_cache(maxsize=None)
+def get_encoder(model: str):
+    """Return the tiktoken encoding for model, or None to use the character estimate."""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed; estimating context tokens from character counts")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The encoding file is downloaded on first use and may be unreachable
+        logger.warning(f"tiktoken encoding for {model} unavailable ({e}); estimating from character counts")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count tokens in text for model."""
+    encoder = get_encoder(model)
+    if encoder is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def format_passage(index: int, result: Dict[str, Any]) -> str:
+    """Format one numbered passage as it appears in the LLM context."""
+    title = result.get("title") or "Untitled"
+    slug = result.get("slug", "")
+    snippet = result.get("snippet", "")
+    return f"[{index}] {title} (/{slug}):\n{snippet}"
+
+
+def trim_to_sentences(text: str, max_tokens: int, model: str) -> str:
+    """Keep the leading whole sentences of text that fit in max_tokens ("" if none do)."""
+    kept = []
+    used = 0
+    for sentence in SENTENCE_BOUNDARY.split(text.strip()):
+        cost = count_tokens(sentence + " ", model)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    return " ".join(kept)
+
+
+def pack_context(
+    results: List[Dict[str, Any]],
+    token_budget: int,
+    model: str,
+    min_trimmed_tokens: int = MIN_TRIMMED_TOKENS
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Choose the passages that fit in a context token budget.
+
+    Passages are taken in descending score order. One that does not fit is
+    trimmed to its leading sentences; if less than min_trimmed_tokens of it
+    would remain it is skipped and smaller passages are still considered.
+
+    Args:
+        results: Passage dicts with snippet, title, slug and score
+        token_budget: Maximum tokens for the formatted context
+        model: Model whose tokenizer is used for counting
+        min_trimmed_tokens: Smallest trimmed snippet worth sending
+
+    Returns:
+        (packed passages in score order, tokens used by the formatted context)
+    """
+    separator_tokens = count_tokens(PASSAGE_SEPARATOR, model)
+    packed: List[Dict[str, Any]] = []
+    used = 0
+
+    for result in sorted(results, key=lambda r: r.get("score", 0.0), reverse=True):
+        overhead = separator_tokens if packed else 0
+        index = len(packed) + 1
+        cost = count_tokens(format_passage(index, result), model)
+        if used + overhead + cost <= token_budget:
+            packed.append(result)
+            used += overhead + cost
+            continue
+
+        header_tokens = count_tokens(format_passage(index, {**result, "snippet": ""}), model)
+        room = token_budget - used - overhead - header_tokens
+        if room < min_trimmed_tokens:
+            continue
+        snippet = trim_to_sentences(result.get("snippet", ""), room, model)
+        if not snippet or count_tokens(snippet, model) < min_trimmed_tokens:
+            continue
+        trimmed = {**result, "snippet": snippet, "trimmed": True}
+        cost = count_tokens(format_passage(index, trimmed), model)
+        if used + overhead + cost <= token_budget:
+            packed.append(trimmed)
+            used += overhead + cost
+
+    if len(packed) < len(results) or any(r.get("trimmed") for r in packed):
+        logger.info(f"Context packed: {len(packed)}/{len(results)} passages, {used}/{token_budget} tokens")
+    return packed, used
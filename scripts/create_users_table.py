@@ -27,6 +27,33 @@ def load_env() -> None:
         sys.exit(1)
 
 
+def create_schema(cursor) -> None:
+    """Create the users table and its email index if they do not exist."""
+    # Create users table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            name VARCHAR(255),
+            programming_level VARCHAR(50) CHECK (
+                programming_level IN ('beginner', 'intermediate', 'advanced')
+            ),
+            hardware_background VARCHAR(50) CHECK (
+                hardware_background IN ('none', 'hobbyist', 'professional')
+            ),
+            learning_goals TEXT[],
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    # Create index for email lookups
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+    """)
+
+
 def create_users_table() -> None:
     """Create users table with personalization fields."""
     load_env()
@@ -35,29 +62,7 @@ def create_users_table() -> None:
     cursor = conn.cursor()
 
     try:
-        # Create users table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                name VARCHAR(255),
-                programming_level VARCHAR(50) CHECK (
-                    programming_level IN ('beginner', 'intermediate', 'advanced')
-                ),
-                hardware_background VARCHAR(50) CHECK (
-                    hardware_background IN ('none', 'hobbyist', 'professional')
-                ),
-                learning_goals TEXT[],
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-
-        # Create index for email lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-        """)
+        create_schema(cursor)
 
         conn.commit()
         print("✓ Users table created successfully")
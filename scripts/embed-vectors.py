@@ -7,22 +7,60 @@ This script:
 2. Generates embeddings using Cohere API (embed-english-v3.0)
 3. Stores vectors in Qdrant Cloud with full metadata payloads
 
+Vectors are uploaded with parallel upload_points workers (over gRPC when
+available). With --no-wait the server acknowledges batches before they
+are applied and a final consistency barrier runs before the summary.
+
+Blue/green re-index: --reindex loads a new versioned collection
+(book_vectors_v{N}) with HNSW indexing deferred, restores indexing, then
+atomically points the book_vectors alias (what the API queries) at it.
+The previous version is kept so --rollback is a single alias swap.
+
+Each chunk's nearest neighbors (cosine, computed in NumPy over all
+vectors) are stored in its "neighbors" payload for the API's related
+sections and chat context expansion. --neighbors-only recomputes them from
+the vectors already in Qdrant without re-embedding.
+
 Usage:
     python scripts/embed-vectors.py
+    python scripts/embed-vectors.py --batch-size 512 --parallel 8 --no-wait
+    python scripts/embed-vectors.py --sequential
+    python scripts/embed-vectors.py --reindex
+    python scripts/embed-vectors.py --list-versions
+    python scripts/embed-vectors.py --rollback
+    python scripts/embed-vectors.py --neighbors-only --neighbors 8
 """
 
+import argparse
 import hashlib
+import importlib.util
 import json
 import os
+import re
 import sys
 import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 import cohere
+import numpy as np
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    CollectionStatus,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    PointStruct,
+    SetPayload,
+    SetPayloadOperation,
+    VectorParams,
+)
 
 
 # Constants
@@ -31,6 +69,27 @@ VECTOR_SIZE = 1024
 BATCH_SIZE = 10
 MAX_RETRIES = 3
 COHERE_MODEL = "embed-english-v3.0"
+UPLOAD_BATCH_SIZE = 256
+UPLOAD_PARALLEL = 4
+CONSISTENCY_TIMEOUT = 300
+GRPC_AVAILABLE = importlib.util.find_spec("grpc") is not None
+
+# HNSW index parameters applied when a collection is created
+HNSW_M = 16
+HNSW_EF_CONSTRUCT = 128
+
+# Payload fields the API filters on (slug/source_path/chapter filters)
+KEYWORD_INDEX_FIELDS = ["slug", "source_path"]
+
+# Precomputed nearest-neighbor graph stored in each point's "neighbors" payload
+NEIGHBORS_K = 5
+NEIGHBORS_BLOCK_SIZE = 1024  # Query rows per similarity block (bounds memory)
+NEIGHBORS_SCROLL_LIMIT = 256
+
+# Blue/green re-indexing: COLLECTION_NAME is an alias over versioned collections
+VERSIONED_COLLECTION_PATTERN = re.compile(rf"^{COLLECTION_NAME}_v(\d+)$")
+DEFERRED_INDEXING_THRESHOLD = 0  # 0 disables HNSW index building during bulk load
+DEFAULT_INDEXING_THRESHOLD = 20000  # Qdrant default (KB of vectors per segment)
 
 
 def load_env() -> None:
@@ -88,11 +147,11 @@ def init_cohere_client() -> cohere.Client:
     return cohere.Client(api_key)
 
 
-def init_qdrant_client() -> QdrantClient:
-    """Initialize and return Qdrant client."""
+def init_qdrant_client(prefer_grpc: bool = GRPC_AVAILABLE) -> QdrantClient:
+    """Initialize and return Qdrant client (gRPC transport when available)."""
     url = os.getenv("QDRANT_URL")
     api_key = os.getenv("QDRANT_API_KEY")
-    return QdrantClient(url=url, api_key=api_key)
+    return QdrantClient(url=url, api_key=api_key, prefer_grpc=prefer_grpc, timeout=60)
 
 
 def embed_with_retry(
@@ -157,68 +216,461 @@ def batch_embed(
     return results
 
 
-def ensure_collection(qdrant: QdrantClient) -> None:
-    """Create book_vectors collection if it doesn't exist."""
+def ensure_collection(
+    qdrant: QdrantClient,
+    hnsw_m: int = HNSW_M,
+    hnsw_ef_construct: int = HNSW_EF_CONSTRUCT
+) -> None:
+    """Create book_vectors collection if it doesn't exist (as collection or alias)."""
     collections = qdrant.get_collections().collections
     collection_names = [c.name for c in collections]
 
-    if COLLECTION_NAME not in collection_names:
+    target = resolve_alias(qdrant)
+    if target:
+        print(f"Alias '{COLLECTION_NAME}' -> '{target}' already exists.")
+        ensure_payload_indexes(qdrant, target)
+    elif COLLECTION_NAME not in collection_names:
         qdrant.create_collection(
             collection_name=COLLECTION_NAME,
             vectors_config=VectorParams(
                 size=VECTOR_SIZE,
                 distance=Distance.COSINE
-            )
+            ),
+            hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct)
         )
-        print(f"Collection '{COLLECTION_NAME}' created.")
+        print(f"Collection '{COLLECTION_NAME}' created (m={hnsw_m}, ef_construct={hnsw_ef_construct}).")
+        ensure_payload_indexes(qdrant, COLLECTION_NAME)
     else:
         print(f"Collection '{COLLECTION_NAME}' already exists.")
+        ensure_payload_indexes(qdrant, COLLECTION_NAME)
+
+
+def ensure_payload_indexes(qdrant: QdrantClient, collection_name: str) -> None:
+    """Create keyword payload indexes for filtered search (no-op if present)."""
+    existing = qdrant.get_collection(collection_name).payload_schema or {}
+    for field in KEYWORD_INDEX_FIELDS:
+        if field in existing:
+            continue
+        qdrant.create_payload_index(
+            collection_name=collection_name,
+            field_name=field,
+            field_schema=PayloadSchemaType.KEYWORD
+        )
+        print(f"  Keyword index on '{field}' created.")
+
+
+# =============================================================================
+# Blue/green collection versions
+# =============================================================================
+
+def versioned_collection_name(version: int) -> str:
+    """Return the physical collection name for a version number."""
+    return f"{COLLECTION_NAME}_v{version}"
+
+
+def list_versions(qdrant: QdrantClient) -> List[int]:
+    """Return the version numbers of all book_vectors_v{N} collections, ascending."""
+    versions = []
+    for collection in qdrant.get_collections().collections:
+        match = VERSIONED_COLLECTION_PATTERN.match(collection.name)
+        if match:
+            versions.append(int(match.group(1)))
+    return sorted(versions)
+
+
+def resolve_alias(qdrant: QdrantClient) -> Optional[str]:
+    """Return the collection the book_vectors alias points to, or None."""
+    for alias in qdrant.get_aliases().aliases:
+        if alias.alias_name == COLLECTION_NAME:
+            return alias.collection_name
+    return None
+
+
+def create_versioned_collection(
+    qdrant: QdrantClient,
+    version: int,
+    hnsw_m: int = HNSW_M,
+    hnsw_ef_construct: int = HNSW_EF_CONSTRUCT
+) -> str:
+    """Create an empty versioned collection with HNSW indexing deferred."""
+    name = versioned_collection_name(version)
+    qdrant.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(
+            size=VECTOR_SIZE,
+            distance=Distance.COSINE
+        ),
+        hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+        optimizers_config=OptimizersConfigDiff(
+            indexing_threshold=DEFERRED_INDEXING_THRESHOLD
+        )
+    )
+    print(f"Collection '{name}' created (indexing deferred, m={hnsw_m}, ef_construct={hnsw_ef_construct}).")
+    ensure_payload_indexes(qdrant, name)
+    return name
+
+
+def restore_indexing(qdrant: QdrantClient, collection_name: str) -> None:
+    """Re-enable HNSW indexing after bulk load and wait for the index build."""
+    qdrant.update_collection(
+        collection_name=collection_name,
+        optimizers_config=OptimizersConfigDiff(
+            indexing_threshold=DEFAULT_INDEXING_THRESHOLD
+        )
+    )
+    print(f"  Indexing restored on '{collection_name}', waiting for optimizers...")
+
+    deadline = time.time() + CONSISTENCY_TIMEOUT
+    while qdrant.get_collection(collection_name).status != CollectionStatus.GREEN:
+        if time.time() > deadline:
+            raise TimeoutError(f"Index build on '{collection_name}' did not finish in {CONSISTENCY_TIMEOUT}s")
+        time.sleep(1)
+    print(f"  '{collection_name}' is green.")
+
+
+def switch_alias(qdrant: QdrantClient, target: str, drop_legacy: bool = False) -> None:
+    """
+    Atomically point the book_vectors alias at target.
+
+    A pre-alias deployment has a real collection named book_vectors, which
+    blocks the alias name. It is only deleted when drop_legacy is set; the
+    delete and the alias creation are then two calls, so there is a brief
+    window without a live collection on that first migration only.
+    """
+    collection_names = [c.name for c in qdrant.get_collections().collections]
+    if COLLECTION_NAME in collection_names:
+        if not drop_legacy:
+            raise RuntimeError(
+                f"A real collection named '{COLLECTION_NAME}' exists. Re-run with "
+                f"--drop-legacy to replace it with an alias to '{target}'."
+            )
+        qdrant.delete_collection(COLLECTION_NAME)
+        print(f"  Legacy collection '{COLLECTION_NAME}' deleted.")
+
+    operations = []
+    previous = resolve_alias(qdrant)
+    if previous:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=COLLECTION_NAME)))
+    operations.append(CreateAliasOperation(
+        create_alias=CreateAlias(collection_name=target, alias_name=COLLECTION_NAME)
+    ))
+    qdrant.update_collection_aliases(change_aliases_operations=operations)
+    print(f"  Alias '{COLLECTION_NAME}': {previous or '(none)'} -> '{target}'")
+
+
+def show_versions(qdrant: QdrantClient) -> None:
+    """Print versioned collections and mark the live one."""
+    live = resolve_alias(qdrant)
+    versions = list_versions(qdrant)
+    if not versions:
+        print("No versioned collections found.")
+    for version in versions:
+        name = versioned_collection_name(version)
+        count = qdrant.count(collection_name=name, exact=True).count
+        marker = "  <- live" if name == live else ""
+        print(f"  v{version}: {name} ({count} points){marker}")
+
+
+def rollback(qdrant: QdrantClient) -> None:
+    """Point the alias back at the newest version older than the live one."""
+    live = resolve_alias(qdrant)
+    match = VERSIONED_COLLECTION_PATTERN.match(live or "")
+    if not match:
+        print(f"Error: alias '{COLLECTION_NAME}' does not point at a versioned collection.")
+        sys.exit(1)
+
+    older = [v for v in list_versions(qdrant) if v < int(match.group(1))]
+    if not older:
+        print(f"Error: no version older than '{live}' to roll back to.")
+        sys.exit(1)
+
+    switch_alias(qdrant, versioned_collection_name(older[-1]))
+
+
+def compute_neighbors(
+    chunk_ids: List[str],
+    vectors: np.ndarray,
+    k: int = NEIGHBORS_K,
+    block_size: int = NEIGHBORS_BLOCK_SIZE
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compute each chunk's k nearest neighbors by cosine similarity.
+
+    All-pairs similarity is computed block by block (block_size rows
+    against the full matrix) so memory stays at block_size x n floats.
+
+    Returns:
+        chunk_id -> [{"chunk_id", "score"}, ...] best first, excluding itself
+    """
+    n = len(chunk_ids)
+    k = min(k, n - 1)
+    if k <= 0:
+        return {chunk_id: [] for chunk_id in chunk_ids}
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    neighbors = {}
+    for start in range(0, n, block_size):
+        block = matrix[start:start + block_size] @ matrix.T
+        rows = np.arange(block.shape[0])
+        block[rows, rows + start] = -np.inf  # Exclude self-matches
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for row in rows:
+            neighbors[chunk_ids[start + row]] = [
+                {"chunk_id": chunk_ids[j], "score": round(float(score), 4)}
+                for j, score in zip(top[row], top_scores[row])
+            ]
+    return neighbors
+
+
+def refresh_neighbors(
+    qdrant: QdrantClient,
+    k: int = NEIGHBORS_K,
+    collection_name: str = COLLECTION_NAME,
+    batch_size: int = UPLOAD_BATCH_SIZE
+) -> None:
+    """Recompute the neighbor graph from stored vectors and write it to the payloads."""
+    chunk_ids, vectors = [], []
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=collection_name,
+            limit=NEIGHBORS_SCROLL_LIMIT,
+            offset=offset,
+            with_payload=["chunk_id"],
+            with_vectors=True
+        )
+        for point in points:
+            chunk_ids.append(point.payload["chunk_id"])
+            vectors.append(point.vector)
+        if offset is None:
+            break
+    print(f"  Loaded {len(chunk_ids)} vectors")
+
+    start_time = time.time()
+    neighbors = compute_neighbors(chunk_ids, np.asarray(vectors, dtype=np.float32), k)
+    print(f"  Computed {k} neighbors per chunk in {time.time() - start_time:.2f}s")
+
+    operations = [
+        SetPayloadOperation(set_payload=SetPayload(
+            payload={"neighbors": neighbors[chunk_id]},
+            points=[chunk_id_to_point_id(chunk_id)]
+        ))
+        for chunk_id in chunk_ids
+    ]
+    for i in range(0, len(operations), batch_size):
+        qdrant.batch_update_points(
+            collection_name=collection_name,
+            update_operations=operations[i:i + batch_size],
+            wait=True
+        )
+    print(f"  Stored neighbors for {len(operations)} chunks")
 
 
 def build_vector_points(
-    embedded_chunks: List[Dict[str, Any]]
+    embedded_chunks: List[Dict[str, Any]],
+    neighbors: Optional[Dict[str, List[Dict[str, Any]]]] = None
 ) -> List[PointStruct]:
     """Build VectorPoint objects with payload for Qdrant."""
     points = []
     for item in embedded_chunks:
         chunk = item["chunk"]
         embedding = item["embedding"]
+        payload = {
+            "chunk_id": chunk["chunk_id"],
+            "text": chunk["text"],
+            "source_path": chunk["source_path"],
+            "slug": chunk["slug"],
+            "title": chunk["title"],
+            "order_index": chunk["order_index"]
+        }
+        if neighbors is not None:
+            payload["neighbors"] = neighbors.get(chunk["chunk_id"], [])
 
         point = PointStruct(
             id=chunk_id_to_point_id(chunk["chunk_id"]),
             vector=embedding,
-            payload={
-                "chunk_id": chunk["chunk_id"],
-                "text": chunk["text"],
-                "source_path": chunk["source_path"],
-                "slug": chunk["slug"],
-                "title": chunk["title"],
-                "order_index": chunk["order_index"]
-            }
+            payload=payload
         )
         points.append(point)
 
     return points
 
 
-def upsert_vectors(qdrant: QdrantClient, points: List[PointStruct]) -> None:
-    """Batch upsert vectors to Qdrant."""
+def upsert_vectors(
+    qdrant: QdrantClient,
+    points: List[PointStruct],
+    collection_name: str = COLLECTION_NAME
+) -> None:
+    """Batch upsert vectors to Qdrant, one acknowledged request at a time."""
     total_batches = (len(points) + BATCH_SIZE - 1) // BATCH_SIZE
+    start_time = time.time()
 
     for i in range(0, len(points), BATCH_SIZE):
         batch = points[i:i + BATCH_SIZE]
         batch_num = i // BATCH_SIZE + 1
 
         qdrant.upsert(
-            collection_name=COLLECTION_NAME,
+            collection_name=collection_name,
             points=batch
         )
 
         print(f"  Batch {batch_num}/{total_batches}: {len(batch)} vectors upserted")
 
+    report_throughput(len(points), time.time() - start_time)
+
+
+def upload_vectors(
+    qdrant: QdrantClient,
+    points: List[PointStruct],
+    batch_size: int = UPLOAD_BATCH_SIZE,
+    parallel: int = UPLOAD_PARALLEL,
+    wait: bool = True,
+    collection_name: str = COLLECTION_NAME
+) -> None:
+    """
+    Upload vectors with parallel upload_points workers.
+
+    With wait=False batches are acknowledged once written to the WAL, so
+    wait_for_consistency() is called before returning.
+    """
+    start_time = time.time()
+
+    qdrant.upload_points(
+        collection_name=collection_name,
+        points=points,
+        batch_size=batch_size,
+        parallel=parallel,
+        max_retries=MAX_RETRIES,
+        wait=wait
+    )
+    print(f"  Uploaded {len(points)} vectors (batch_size={batch_size}, parallel={parallel}, wait={wait})")
+
+    if not wait and points:
+        wait_for_consistency(qdrant, points[-batch_size:], len(points), collection_name=collection_name)
+
+    report_throughput(len(points), time.time() - start_time)
+
+
+def wait_for_consistency(
+    qdrant: QdrantClient,
+    barrier_points: List[PointStruct],
+    expected_count: int,
+    timeout: int = CONSISTENCY_TIMEOUT,
+    collection_name: str = COLLECTION_NAME
+) -> None:
+    """
+    Block until unacknowledged uploads are applied and searchable.
+
+    Re-upserting the final batch with wait=True is idempotent and returns
+    only after every operation queued before it has been applied. The
+    collection is then polled until it reports green (optimizers idle).
+    """
+    qdrant.upsert(collection_name=collection_name, points=barrier_points, wait=True)
+
+    deadline = time.time() + timeout
+    while True:
+        info = qdrant.get_collection(collection_name)
+        count = qdrant.count(collection_name=collection_name, exact=True).count
+        if count >= expected_count and info.status == CollectionStatus.GREEN:
+            print(f"  Consistency barrier passed: {count} points, status {info.status.value}")
+            return
+        if time.time() > deadline:
+            raise TimeoutError(
+                f"Collection not consistent after {timeout}s: "
+                f"{count}/{expected_count} points, status {info.status.value}"
+            )
+        time.sleep(1)
+
+
+def report_throughput(count: int, elapsed: float) -> None:
+    """Print vectors/sec for an upload run."""
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(f"  Stored {count} vectors in {elapsed:.2f}s ({rate:,.0f} vectors/sec)")
+
 
 def main() -> None:
     """Main pipeline orchestration."""
+    parser = argparse.ArgumentParser(
+        description="Generate embeddings and store vectors in Qdrant"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=UPLOAD_BATCH_SIZE,
+        help=f"Points per upload request (default: {UPLOAD_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=UPLOAD_PARALLEL,
+        help=f"Parallel upload workers (default: {UPLOAD_PARALLEL})"
+    )
+    parser.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Don't wait for each batch to be applied; run a consistency barrier at the end"
+    )
+    parser.add_argument(
+        "--no-grpc",
+        action="store_true",
+        help="Use the REST transport even if gRPC is available"
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help=f"Use the original sequential upsert path ({BATCH_SIZE} points per request)"
+    )
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=HNSW_M,
+        help=f"HNSW graph degree for newly created collections (default: {HNSW_M})"
+    )
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        default=HNSW_EF_CONSTRUCT,
+        help=f"HNSW build-time beam width for new collections (default: {HNSW_EF_CONSTRUCT})"
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help=f"Load a new {COLLECTION_NAME}_v{{N}} collection and switch the alias to it"
+    )
+    parser.add_argument(
+        "--drop-legacy",
+        action="store_true",
+        help=f"With --reindex: delete a pre-alias '{COLLECTION_NAME}' collection before switching"
+    )
+    parser.add_argument(
+        "--list-versions",
+        action="store_true",
+        help="List versioned collections and the live alias target"
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Point the alias back at the previous collection version"
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        default=NEIGHBORS_K,
+        help=f"Nearest neighbors stored per chunk; 0 skips the graph (default: {NEIGHBORS_K})"
+    )
+    parser.add_argument(
+        "--neighbors-only",
+        action="store_true",
+        help="Recompute the neighbor graph from vectors already in Qdrant, without re-embedding"
+    )
+    args = parser.parse_args()
+
     print("=" * 50)
     print("Embeddings Generation & Vector Storage Pipeline")
     print("=" * 50)
@@ -229,6 +681,22 @@ def main() -> None:
     load_env()
     print()
 
+    qdrant = init_qdrant_client(prefer_grpc=GRPC_AVAILABLE and not args.no_grpc)
+
+    if args.list_versions:
+        show_versions(qdrant)
+        return
+
+    if args.rollback:
+        print("Rolling back alias...")
+        rollback(qdrant)
+        return
+
+    if args.neighbors_only:
+        print("Refreshing neighbor graph...")
+        refresh_neighbors(qdrant, k=args.neighbors)
+        return
+
     # Load chunks
     print("Loading chunks from data/chunks.json...")
     chunks = load_chunks()
@@ -237,8 +705,17 @@ def main() -> None:
 
     # Initialize clients
     print("Connecting to Qdrant...")
-    qdrant = init_qdrant_client()
-    ensure_collection(qdrant)
+    if args.reindex:
+        versions = list_versions(qdrant)
+        target_collection = create_versioned_collection(
+            qdrant,
+            versions[-1] + 1 if versions else 1,
+            hnsw_m=args.hnsw_m,
+            hnsw_ef_construct=args.hnsw_ef_construct
+        )
+    else:
+        ensure_collection(qdrant, hnsw_m=args.hnsw_m, hnsw_ef_construct=args.hnsw_ef_construct)
+        target_collection = COLLECTION_NAME
     print()
 
     print("Initializing Cohere client...")
@@ -250,24 +727,53 @@ def main() -> None:
     embedded_chunks = batch_embed(co, chunks)
     print()
 
+    # Compute the neighbor graph
+    neighbors = None
+    if args.neighbors > 0:
+        print(f"Computing {args.neighbors} nearest neighbors per chunk...")
+        start_time = time.time()
+        neighbors = compute_neighbors(
+            [item["chunk"]["chunk_id"] for item in embedded_chunks],
+            np.asarray([item["embedding"] for item in embedded_chunks], dtype=np.float32),
+            k=args.neighbors
+        )
+        print(f"Computed neighbors in {time.time() - start_time:.2f}s.")
+        print()
+
     # Build vector points
     print("Building vector points...")
-    points = build_vector_points(embedded_chunks)
+    points = build_vector_points(embedded_chunks, neighbors)
     print(f"Created {len(points)} vector points.")
     print()
 
     # Upsert to Qdrant
     print("Upserting vectors to Qdrant...")
-    upsert_vectors(qdrant, points)
+    if args.sequential:
+        upsert_vectors(qdrant, points, collection_name=target_collection)
+    else:
+        upload_vectors(
+            qdrant,
+            points,
+            batch_size=args.batch_size,
+            parallel=args.parallel,
+            wait=not args.no_wait,
+            collection_name=target_collection
+        )
     print()
 
+    if args.reindex:
+        print("Activating new collection version...")
+        restore_indexing(qdrant, target_collection)
+        switch_alias(qdrant, target_collection, drop_legacy=args.drop_legacy)
+        print()
+
     # Summary
     print("=" * 50)
     print("Summary")
     print("=" * 50)
     print(f"Chunks processed: {len(chunks)}")
     print(f"Vectors stored: {len(points)}")
-    print(f"Collection: {COLLECTION_NAME}")
+    print(f"Collection: {target_collection}")
     print("Done!")
 
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Embedding Micro-batcher for Concurrent Queries
+
+This module coalesces concurrent single-query embedding requests into one
+upstream embed(texts=[...]) call and scatters the vectors back to the
+waiting requests.
+
+Batching adapts to load: when no upstream call is in flight a query is
+sent immediately, so an idle server adds no latency. While a call is in
+flight, new queries collect for up to the latency window (or until the
+batch is full) and go out together.
+
+Each query may carry a timeout (its remaining request budget). The
+upstream call of a batch gets the longest remaining one, so it never
+outlives every waiter, and queries whose waiters already gave up are
+not sent. The call runs in its own context with budget_capped set from
+that same waiter, so the circuit breaker judges a timeout by the budget
+the call actually had, not by whichever request flushed the batch.
+
+Usage:
+    from scripts.embed_batcher import EmbedBatcher
+
+    batcher = EmbedBatcher(embed_queries)
+    vector = await batcher.embed("What is ZMP?", timeout=deadline.timeout("embed"))
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .resilience_utils import budget_capped
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_WINDOW_MS = 5.0
+
+
+class EmbedBatcher:
+    """Adaptive micro-batcher in front of a blocking batch embed function."""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str], Optional[float]], List[List[float]]],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        window_ms: float = DEFAULT_WINDOW_MS
+    ):
+        """
+        Args:
+            embed_fn: Blocking function embedding a list of texts with a timeout in
+                seconds (None: the client's default), run in a thread
+            max_batch_size: Flush as soon as this many distinct texts are pending
+            window_ms: Longest time a query waits for others while a call is in flight
+        """
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.window_ms = window_ms
+
+        # (text, future, enqueued at, expires at or None, budget capped) per waiting query
+        self._pending: List[Tuple[str, asyncio.Future, float, Optional[float], bool]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+        self._tasks: Set[asyncio.Task] = set()  # Dispatches in flight (the loop only keeps weak references)
+
+        # Metrics
+        self.requests = 0
+        self.upstream_calls = 0
+        self.texts_sent = 0
+        self.errors = 0
+        self.batch_sizes: Counter = Counter()
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    async def embed(self, text: str, timeout: Optional[float] = None) -> List[float]:
+        """
+        Embed one query, sharing the upstream call with concurrent queries.
+
+        timeout bounds the upstream call this query goes out with (see
+        _dispatch); the caller still bounds its own wait.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        now = time.perf_counter()
+        expires_at = now + timeout if timeout is not None else None
+        self._pending.append((text, future, now, expires_at, budget_capped.get()))
+        self.requests += 1
+
+        if self._in_flight == 0 or len({entry[0] for entry in self._pending}) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything pending as one upstream call."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future, float, Optional[float], bool]]) -> None:
+        """Run the blocking embed call in a thread and resolve the waiting futures."""
+        batch = [entry for entry in batch if not entry[1].done()]  # Waiters that timed out are not embedded
+        if not batch:
+            return
+        # Identical concurrent queries are embedded once
+        texts = list(dict.fromkeys(entry[0] for entry in batch))
+
+        # The call may run as long as the waiter with the most time left; its timeout
+        # is the caller's (budget-capped) only if that waiter's budget was capped
+        now = time.perf_counter()
+        if any(entry[3] is None for entry in batch):
+            timeout, capped = None, False
+        else:
+            longest = max(batch, key=lambda entry: entry[3])
+            timeout, capped = max(longest[3] - now, 0.001), longest[4]
+        context = contextvars.copy_context()
+        context.run(budget_capped.set, capped)
+
+        for _, _, enqueued, _, _ in batch:
+            wait_ms = (now - enqueued) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.upstream_calls += 1
+        self.texts_sent += len(texts)
+        self.batch_sizes[len(batch)] += 1
+
+        self._in_flight += 1
+        try:
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                None, context.run, self.embed_fn, texts, timeout
+            )
+            by_text = dict(zip(texts, embeddings))
+            for text, future, _, _, _ in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Batched embed call failed for {len(texts)} texts: {e}")
+            for _, future, _, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight -= 1
+            # Queries that arrived during the call go out now rather than waiting for the timer
+            if self._in_flight == 0 and self._pending:
+                self._flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batching metrics since startup."""
+        return {
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "calls_saved": self.requests - self.upstream_calls,
+            "texts_sent": self.texts_sent,
+            "errors": self.errors,
+            "avg_batch_size": round(self.requests / self.upstream_calls, 2) if self.upstream_calls else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "avg_wait_ms": round(self.total_wait_ms / self.requests, 3) if self.requests else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 3),
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window_ms,
+        }
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Single-pass Ingest into Qdrant and Postgres
+
+This script:
+1. Loads chunks from data/chunks.json once
+2. Fans each batch out concurrently to two sinks:
+   - Qdrant: Cohere embeddings + vector upsert (embed-vectors.py)
+   - Postgres: COPY stream into the documents table (store-metadata.py)
+3. Commits the Postgres transaction only after the Qdrant sink succeeded,
+   and deletes the points it created if the Postgres side fails
+4. Recomputes the neighbor graph ("neighbors" payloads, as
+   embed-vectors.py --neighbors-only), which the upserts leave out
+5. Reconciles the chunk_id sets of both stores against chunks.json
+
+Usage:
+    python scripts/ingest-stores.py
+    python scripts/ingest-stores.py --batch-size 512
+    python scripts/ingest-stores.py --reconcile-only
+"""
+
+import argparse
+import importlib.util
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+from qdrant_client.models import PointIdsList
+
+
+# Constants
+DEFAULT_BATCH_SIZE = 256  # Chunks per dispatched batch: one Qdrant upsert, one slice of the COPY stream
+QUEUE_DEPTH = 8
+SCROLL_LIMIT = 256
+
+_END = object()
+_ABORT = object()
+
+
+def load_script(filename: str) -> ModuleType:
+    """Load a sibling pipeline script by file name (they are hyphenated)."""
+    path = Path(__file__).parent / filename
+    spec = importlib.util.spec_from_file_location(path.stem.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+embed_vectors = load_script("embed-vectors.py")
+store_metadata = load_script("store-metadata.py")
+
+
+class SinkWorker:
+    """
+    Background thread consuming batches from a bounded queue.
+
+    Tracks items written and busy time (wall time minus time spent waiting
+    for input) so per-sink throughput is not skewed by the slower sink.
+    """
+
+    def __init__(self, name: str, target: Callable[["SinkWorker"], None]):
+        self.name = name
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=QUEUE_DEPTH)
+        self.items = 0
+        self.wait_seconds = 0.0
+        self.elapsed = 0.0
+        self.error: Optional[BaseException] = None
+        self._finished = False
+        self._target = target
+        self._thread = threading.Thread(target=self._run, name=f"sink-{name}", daemon=True)
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        try:
+            self._target(self)
+        except BaseException as e:
+            self.error = e
+            # Keep draining so the producer never blocks on a dead sink
+            while not self._finished:
+                self._finished = self.queue.get() in (_END, _ABORT)
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+
+    def batches(self) -> Iterator[Any]:
+        """Yield queued batches until the end marker; raise on abort."""
+        while True:
+            wait_start = time.perf_counter()
+            item = self.queue.get()
+            self.wait_seconds += time.perf_counter() - wait_start
+            self._finished = item is _END or item is _ABORT
+            if item is _END:
+                return
+            if item is _ABORT:
+                raise RuntimeError(f"{self.name} sink aborted")
+            yield item
+
+    @property
+    def busy_seconds(self) -> float:
+        return max(self.elapsed - self.wait_seconds, 0.0)
+
+    def report(self, unit: str) -> str:
+        rate = self.items / self.busy_seconds if self.busy_seconds > 0 else 0.0
+        return (f"{self.name}: {self.items} {unit} in {self.elapsed:.2f}s "
+                f"(busy {self.busy_seconds:.2f}s, {rate:,.0f} {unit}/sec)")
+
+
+def qdrant_sink(qdrant, co, written: List[int]) -> Callable[[SinkWorker], None]:
+    """
+    Build the Qdrant sink: embed each batch and upsert its points.
+
+    Texts go to Cohere in embed_vectors.BATCH_SIZE requests; each batch is
+    one upsert. The ids of upserted points are appended to written.
+    """
+    def run(worker: SinkWorker) -> None:
+        for batch in worker.batches():
+            embeddings = []
+            for i in range(0, len(batch), embed_vectors.BATCH_SIZE):
+                texts = [c["text"] for c in batch[i:i + embed_vectors.BATCH_SIZE]]
+                embeddings.extend(embed_vectors.embed_with_retry(co, texts))
+            points = embed_vectors.build_vector_points(
+                [{"chunk": c, "embedding": e} for c, e in zip(batch, embeddings)]
+            )
+            qdrant.upsert(collection_name=embed_vectors.COLLECTION_NAME, points=points)
+            written.extend(point.id for point in points)
+            worker.items += len(points)
+    return run
+
+
+def postgres_sink(conn) -> Callable[[SinkWorker], None]:
+    """Build the Postgres sink: a single COPY stream fed by the queue."""
+    def rows(worker: SinkWorker) -> Iterator[Dict[str, Any]]:
+        for batch in worker.batches():
+            for chunk in batch:
+                worker.items += 1
+                yield chunk
+
+    def run(worker: SinkWorker) -> None:
+        try:
+            with conn.cursor() as cur:
+                store_metadata.store_metadata_copy(cur, rows(worker))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return run
+
+
+def ingest(conn, qdrant, co, chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> bool:
+    """
+    Stream chunks once to both sinks, batch_size chunks at a time.
+
+    The Postgres COPY is held open until the Qdrant sink finishes, then
+    committed on success or rolled back if Qdrant failed, so a failed run
+    never leaves metadata for chunks that have no vectors. If the Postgres
+    side fails (including its commit) after points were upserted, the
+    points of chunks Postgres did not already have are deleted, so no
+    vectors are left without metadata either. Chunks that were already in
+    both stores keep their new vectors next to their old metadata; rerun
+    the ingest to bring them back in line.
+    """
+    known = postgres_chunk_ids(conn)
+    conn.commit()  # End the read transaction; the COPY gets its own
+    written: List[int] = []
+    qdrant_worker = SinkWorker("qdrant", qdrant_sink(qdrant, co, written))
+    postgres_worker = SinkWorker("postgres", postgres_sink(conn))
+    qdrant_worker.start()
+    postgres_worker.start()
+
+    total_batches = (len(chunks) + batch_size - 1) // batch_size
+    for i in range(0, len(chunks), batch_size):
+        if qdrant_worker.error or postgres_worker.error:
+            break
+        batch = chunks[i:i + batch_size]
+        qdrant_worker.put(batch)
+        postgres_worker.put(batch)
+        batch_num = i // batch_size + 1
+        if batch_num % 10 == 0 or batch_num == total_batches:
+            print(f"  Dispatched batch {batch_num}/{total_batches}")
+
+    qdrant_worker.put(_END)
+    qdrant_worker.join()
+
+    postgres_worker.put(_ABORT if qdrant_worker.error else _END)
+    postgres_worker.join()
+
+    print()
+    print(f"  {qdrant_worker.report('vectors')}")
+    print(f"  {postgres_worker.report('rows')}")
+
+    ok = True
+    for worker in (qdrant_worker, postgres_worker):
+        if worker.error:
+            print(f"  Error in {worker.name} sink: {worker.error}")
+            ok = False
+
+    if postgres_worker.error and written:
+        known_ids = {embed_vectors.chunk_id_to_point_id(chunk_id) for chunk_id in known}
+        created = [point_id for point_id in written if point_id not in known_ids]
+        if created:
+            qdrant.delete(
+                collection_name=embed_vectors.COLLECTION_NAME,
+                points_selector=PointIdsList(points=created),
+                wait=True
+            )
+        print(f"  Postgres failed: deleted {len(created)} new points from Qdrant "
+              f"({len(written) - len(created)} updated points of existing chunks kept)")
+    return ok
+
+
+def qdrant_chunk_ids(qdrant) -> Set[str]:
+    """Collect every chunk_id stored in the Qdrant collection."""
+    chunk_ids = set()
+    offset = None
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=embed_vectors.COLLECTION_NAME,
+            limit=SCROLL_LIMIT,
+            offset=offset,
+            with_payload=["chunk_id"],
+            with_vectors=False
+        )
+        chunk_ids.update(p.payload.get("chunk_id", "") for p in points)
+        if offset is None:
+            break
+    return chunk_ids
+
+
+def postgres_chunk_ids(conn) -> Set[str]:
+    """Collect every chunk_id stored in the documents table."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT chunk_id FROM documents")
+        return {row[0] for row in cur.fetchall()}
+
+
+def reconcile(conn, qdrant, chunks: List[Dict[str, Any]]) -> bool:
+    """Compare chunk_id sets in chunks.json, Qdrant and Postgres."""
+    expected = {c["chunk_id"] for c in chunks}
+    in_qdrant = qdrant_chunk_ids(qdrant)
+    in_postgres = postgres_chunk_ids(conn)
+
+    print(f"  chunks.json: {len(expected)}  qdrant: {len(in_qdrant)}  postgres: {len(in_postgres)}")
+
+    checks = [
+        ("missing from qdrant", expected - in_qdrant),
+        ("missing from postgres", expected - in_postgres),
+        ("orphaned in qdrant (vectors without a postgres row)", in_qdrant - in_postgres),
+        ("orphaned in postgres (rows without qdrant vectors)", in_postgres - in_qdrant),
+    ]
+    consistent = True
+    for label, ids in checks:
+        if ids:
+            consistent = False
+            sample = ", ".join(sorted(ids)[:5])
+            print(f"  {len(ids)} {label}: {sample}{' ...' if len(ids) > 5 else ''}")
+
+    stale = (in_qdrant & in_postgres) - expected
+    if stale:
+        print(f"  Note: {len(stale)} chunk_ids present in both stores but not in chunks.json")
+
+    if consistent:
+        print("  Stores are consistent.")
+    return consistent
+
+
+def main() -> None:
+    """Main pipeline orchestration."""
+    parser = argparse.ArgumentParser(
+        description="Ingest chunks into Qdrant and Postgres in a single pass"
+    )
+    parser.add_argument(
+        "--reconcile-only",
+        action="store_true",
+        help="Skip ingest and only compare chunk_ids across both stores"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Chunks per Qdrant upsert and COPY slice (default {DEFAULT_BATCH_SIZE})"
+    )
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Single-pass Ingest (Qdrant + Postgres)")
+    print("=" * 50)
+    print()
+
+    print("Loading environment...")
+    embed_vectors.load_env()
+    store_metadata.load_env()
+    print()
+
+    print("Loading chunks from data/chunks.json...")
+    chunks = embed_vectors.load_chunks()
+    print(f"Found {len(chunks)} chunks to process.")
+    print()
+
+    print("Connecting to Qdrant and Postgres...")
+    qdrant = embed_vectors.init_qdrant_client()
+    embed_vectors.ensure_collection(qdrant)
+    conn = store_metadata.init_db_connection()
+    store_metadata.create_table(conn)
+    print()
+
+    ok = True
+    if not args.reconcile_only:
+        co = embed_vectors.init_cohere_client()
+        print("Ingesting...")
+        start = time.perf_counter()
+        ok = ingest(conn, qdrant, co, chunks, batch_size=args.batch_size)
+        print(f"  Total: {time.perf_counter() - start:.2f}s")
+        print()
+
+    if ok and not args.reconcile_only:
+        # Upserts replace whole payloads: without this, /chunks/{id}/related is empty for every ingested chunk
+        print("Refreshing neighbor graph...")
+        embed_vectors.refresh_neighbors(qdrant)
+        print()
+
+    print("Reconciling...")
+    consistent = reconcile(conn, qdrant, chunks)
+    print()
+    conn.close()
+
+    print("=" * 50)
+    print("Summary")
+    print("=" * 50)
+    print(f"Chunks: {len(chunks)}")
+    print(f"Ingest: {'ok' if ok else 'failed'}")
+    print(f"Reconciliation: {'consistent' if consistent else 'MISMATCH'}")
+
+    if not (ok and consistent):
+        sys.exit(1)
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics for the RAG API
+
+This module defines the API's latency histograms and counters and the
+helpers that record them:
+
+- rag_request_duration_seconds: whole requests, by endpoint/method/status
+- rag_stage_duration_seconds: pipeline stages (embed, vector_search,
+  context_build, llm, db, auth_hash, ...), by stage/endpoint/outcome
+- rag_llm_tokens_total: OpenAI tokens, by endpoint
+- rag_route_cpu_seconds_total: sampled CPU time, by endpoint (see
+  scripts/profiling_utils.py; only when PROFILE_ROUTE_CPU=1)
+- component stats (embed batcher, re-ranker cache) exported at scrape time
+
+Every stage is also a trace span (scripts/tracing_utils.py), so the same
+track_stage() call feeds both the histograms and the per-request trace.
+
+The endpoint label is the matched route template (e.g. /chunks/{chunk_id}/related),
+set per request by MetricsMiddleware, so stage timings recorded deep in
+the utility modules are attributed to the endpoint that triggered them.
+
+Usage:
+    from scripts.metrics_utils import track_stage
+
+    with track_stage("vector_search"):
+        results = qdrant_client.query_points(...)
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Match
+
+from .tracing_utils import Span, span
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+UNMATCHED_ENDPOINT = "unmatched"
+BACKGROUND_ENDPOINT = "background"  # Work outside any request
+METRICS_PATH = "/metrics"
+
+current_endpoint: ContextVar[str] = ContextVar("current_endpoint", default=BACKGROUND_ENDPOINT)
+
+REQUEST_LATENCY = Histogram(
+    "rag_request_duration_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Latency of a pipeline stage within a request",
+    ["stage", "endpoint", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "rag_llm_tokens_total",
+    "OpenAI tokens consumed",
+    ["endpoint"]
+)
+ROUTE_CPU = Counter(
+    "rag_route_cpu_seconds_total",
+    "CPU time sampled inside route handlers (PROFILE_ROUTE_CPU=1)",
+    ["endpoint"]
+)
+
+
+@contextmanager
+def track_stage(stage: str, endpoint: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Time a block as one stage; outcome is "error" if it raises.
+
+    The block also runs in a trace span named after the stage (attributes
+    are attached to it), which is yielded so callers can add more.
+    """
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        with span(stage, **attributes) as stage_span:
+            yield stage_span
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STAGE_LATENCY.labels(
+            stage=stage,
+            endpoint=endpoint or current_endpoint.get(),
+            outcome=outcome
+        ).observe(time.perf_counter() - start)
+
+
+def record_tokens(tokens: Optional[int], endpoint: Optional[str] = None) -> None:
+    """Add LLM token usage for the current endpoint."""
+    if tokens:
+        LLM_TOKENS.labels(endpoint=endpoint or current_endpoint.get()).inc(tokens)
+
+
+def route_template(request: Request) -> str:
+    """Return the route path template matching a request (bounded label cardinality)."""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ENDPOINT)
+    return UNMATCHED_ENDPOINT
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Record request latency and expose the endpoint label to stage timers."""
+
+    async def dispatch(self, request: Request, call_next):
+        endpoint = route_template(request)
+        if endpoint == METRICS_PATH:
+            return await call_next(request)
+
+        token = current_endpoint.set(endpoint)
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            REQUEST_LATENCY.labels(
+                endpoint=endpoint,
+                method=request.method,
+                status=status
+            ).observe(time.perf_counter() - start)
+            current_endpoint.reset(token)
+
+
+class StatsCollector:
+    """
+    Export a component's stats() dict at scrape time.
+
+    Numeric fields named in counters become <prefix>_<field>_total counters;
+    other numeric fields become <prefix>_<field> gauges. Non-numeric fields
+    are skipped.
+    """
+
+    def __init__(self, prefix: str, stats_fn: Callable[[], Optional[Dict[str, Any]]], counters=()):
+        self.prefix = prefix
+        self.stats_fn = stats_fn
+        self.counters = set(counters)
+
+    def collect(self):
+        try:
+            stats = self.stats_fn()
+        except Exception as e:
+            logger.warning(f"Stats collection failed for {self.prefix}: {e}")
+            return
+        if not stats:
+            return
+        for field, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{field}"
+            if field in self.counters:
+                metric = CounterMetricFamily(name, f"{self.prefix} {field}")
+            else:
+                metric = GaugeMetricFamily(name, f"{self.prefix} {field}")
+            metric.add_metric([], value)
+            yield metric
+
+
+_stats_collectors: Dict[str, StatsCollector] = {}
+
+
+def register_stats(prefix: str, stats_fn: Callable[[], Optional[Dict[str, Any]]], counters=()) -> None:
+    """Register (or replace) a stats() exporter under prefix."""
+    if prefix in _stats_collectors:
+        REGISTRY.unregister(_stats_collectors[prefix])
+    collector = StatsCollector(prefix, stats_fn, counters)
+    REGISTRY.register(collector)
+    _stats_collectors[prefix] = collector
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Return (body, content type) for the Prometheus text exposition."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
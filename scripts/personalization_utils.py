@@ -11,10 +11,14 @@ Usage:
 
 import logging
 import time
-from typing import List, Optional, Dict, Any
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Tuple
 
-from openai import OpenAI
-from qdrant_client import QdrantClient
+if TYPE_CHECKING:  # Type hints only: importing the SDKs is left to whoever builds the clients
+    from openai import OpenAI
+    from qdrant_client import QdrantClient
+
+from .content_cache_utils import prompt_version
+from .metrics_utils import record_tokens, track_stage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -23,6 +27,8 @@ logger = logging.getLogger(__name__)
 COLLECTION_NAME = "book_vectors"
 OPENAI_MODEL = "gpt-4o-mini"
 MAX_CONTENT_TOKENS = 6000  # Leave room for prompt and response
+PERSONALIZATION_TEMPERATURE = 0.7
+PERSONALIZATION_MAX_TOKENS = 4000
 
 # Valid chapter slugs
 VALID_CHAPTER_SLUGS = [
@@ -35,6 +41,11 @@ VALID_CHAPTER_SLUGS = [
     "chapter-6",
 ]
 
+# Profile values (the users table CHECK constraints use the same)
+PROGRAMMING_LEVELS = ["beginner", "intermediate", "advanced"]
+HARDWARE_BACKGROUNDS = ["none", "hobbyist", "professional"]
+LEARNING_GOALS = ["academic", "career_transition", "personal", "upskilling"]
+
 # Personalization prompt template
 PERSONALIZATION_PROMPT = """You are an expert educational content adapter. Your task is to rewrite the following textbook chapter content to be more accessible and relevant for a specific reader.
 
@@ -72,9 +83,36 @@ Original Chapter Content:
 
 Please rewrite this chapter content adapted for the reader's profile. Output ONLY the adapted content in markdown format, no preamble or explanation."""
 
+# Bump PROMPT_REVISION for changes the template does not show (truncation,
+# post-processing); any change here invalidates cached personalizations
+PROMPT_REVISION = 1
+PROMPT_VERSION = prompt_version(
+    OPENAI_MODEL,
+    PERSONALIZATION_PROMPT,
+    PERSONALIZATION_TEMPERATURE,
+    PERSONALIZATION_MAX_TOKENS,
+    PROMPT_REVISION
+)
+
+
+def profile_variant(programming_level: str, hardware_background: str, learning_goals: List[str]) -> str:
+    """
+    Cache variant of a profile, e.g. "beginner.none.academic+personal".
+
+    Goals are de-duplicated and sorted, so the same profile always maps
+    to the same variant.
+    """
+    return f"{programming_level}.{hardware_background}.{'+'.join(sorted(set(learning_goals)))}"
+
+
+def parse_profile_variant(variant: str) -> Tuple[str, str, List[str]]:
+    """Inverse of profile_variant: (programming_level, hardware_background, learning_goals)."""
+    programming_level, hardware_background, goals = variant.split(".", 2)
+    return programming_level, hardware_background, goals.split("+")
+
 
 def get_chapter_content_from_qdrant(
-    qdrant_client: QdrantClient,
+    qdrant_client: "QdrantClient",
     chapter_slug: str
 ) -> Optional[Dict[str, Any]]:
     """
@@ -205,13 +243,47 @@ def build_profile_summary(
     return f"Adapted for {level_desc} with {hardware_desc}, focused on {goals_desc}"
 
 
+def personalization_request(
+    chapter_content: str,
+    programming_level: str,
+    hardware_background: str,
+    learning_goals: List[str]
+) -> Dict[str, Any]:
+    """
+    Chat completion parameters (model, messages, sampling) for one personalization.
+
+    Used for live calls and for Batch API request bodies, so both produce
+    the same generation for a PROMPT_VERSION.
+    """
+    # Truncate content if too long (rough estimate: 4 chars per token)
+    max_chars = MAX_CONTENT_TOKENS * 4
+    if len(chapter_content) > max_chars:
+        logger.warning(f"Chapter content truncated from {len(chapter_content)} to {max_chars} chars")
+        chapter_content = chapter_content[:max_chars] + "\n\n[Content truncated for processing...]"
+
+    # Build the personalization prompt
+    prompt = PERSONALIZATION_PROMPT.format(
+        programming_level=programming_level,
+        hardware_background=hardware_background,
+        learning_goals=", ".join(learning_goals),
+        chapter_content=chapter_content
+    )
+    return {
+        "model": OPENAI_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": PERSONALIZATION_TEMPERATURE,
+        "max_tokens": PERSONALIZATION_MAX_TOKENS,
+    }
+
+
 def personalize_chapter_content(
-    openai_client: OpenAI,
-    qdrant_client: QdrantClient,
+    openai_client: "OpenAI",
+    qdrant_client: "QdrantClient",
     chapter_slug: str,
     programming_level: str,
     hardware_background: str,
-    learning_goals: List[str]
+    learning_goals: List[str],
+    chapter_data: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Personalize chapter content based on user profile.
@@ -223,6 +295,8 @@ def personalize_chapter_content(
         programming_level: User's programming level (beginner/intermediate/advanced)
         hardware_background: User's hardware background (none/hobbyist/professional)
         learning_goals: List of user's learning goals
+        chapter_data: Chapter already loaded (e.g. from the chapter index);
+            fetched from Qdrant when None
 
     Returns:
         Dict with personalized_content, original_title, metadata
@@ -238,43 +312,28 @@ def personalize_chapter_content(
         raise ValueError(f"Invalid chapter_slug: must be one of {', '.join(VALID_CHAPTER_SLUGS)}")
 
     # Fetch chapter content from Qdrant
-    chapter_data = get_chapter_content_from_qdrant(qdrant_client, chapter_slug)
+    if chapter_data is None:
+        with track_stage("chapter_fetch", chapter=chapter_slug):
+            chapter_data = get_chapter_content_from_qdrant(qdrant_client, chapter_slug)
     if not chapter_data:
         raise ValueError(f"Chapter content not found for slug: {chapter_slug}")
 
     original_title = chapter_data["title"]
-    chapter_content = chapter_data["content"]
-
-    # Truncate content if too long (rough estimate: 4 chars per token)
-    max_chars = MAX_CONTENT_TOKENS * 4
-    if len(chapter_content) > max_chars:
-        logger.warning(f"Chapter content truncated from {len(chapter_content)} to {max_chars} chars")
-        chapter_content = chapter_content[:max_chars] + "\n\n[Content truncated for processing...]"
-
-    # Format learning goals for prompt
-    goals_formatted = ", ".join(learning_goals)
-
-    # Build the personalization prompt
-    prompt = PERSONALIZATION_PROMPT.format(
-        programming_level=programming_level,
-        hardware_background=hardware_background,
-        learning_goals=goals_formatted,
-        chapter_content=chapter_content
+    request = personalization_request(
+        chapter_data["content"],
+        programming_level,
+        hardware_background,
+        learning_goals
     )
 
     # Call OpenAI for personalization
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=4000
-        )
+        with track_stage("llm", model=OPENAI_MODEL, purpose="personalize"):
+            response = openai_client.chat.completions.create(**request)
 
         personalized_content = response.choices[0].message.content
         tokens_used = response.usage.total_tokens if response.usage else 0
+        record_tokens(tokens_used)
 
     except Exception as e:
         logger.error(f"OpenAI personalization failed: {e}")
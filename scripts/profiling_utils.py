@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Sampling Profiler for the API Process
+
+This module finds CPU hot spots in the running API without restarting it
+or attaching a native profiler. A background thread samples the Python
+stacks of every thread (sys._current_frames) and the per-thread CPU clocks,
+so samples of idle threads (the event loop waiting in select, pool workers
+waiting for jobs) can be dropped and only on-CPU stacks are kept. Nothing
+needs to hook coroutines: a running coroutine's frames are on its thread's
+stack, so asyncio handlers show up like plain functions.
+
+- SamplingProfiler: time-boxed capture returning collapsed stacks
+  ("frame;frame;frame count" lines, the format py-spy --format raw emits),
+  ready for flamegraph.pl, inferno or speedscope
+- RouteCPUSampler: low-frequency, always-on sampler that attributes each
+  thread's CPU time to a route and exports it as
+  rag_route_cpu_seconds_total. Worker threads report the route they run a
+  job for: RouteAwareExecutor (the event loop's default executor, so
+  asyncio.to_thread) and RouteCPURoute (sync def endpoints, run on the
+  threadpool) read the request's route from the current_endpoint
+  ContextVar, which the job's copied context carries. On the event loop
+  thread the route is the one whose Route.handle frame is on the stack.
+  Work outside route handlers (middleware, background tasks) is counted
+  as "other".
+
+Usage:
+    from scripts.profiling_utils import RouteAwareExecutor, RouteCPURoute, SamplingProfiler
+
+    app.router.route_class = RouteCPURoute  # Before routes are added
+    asyncio.get_running_loop().set_default_executor(RouteAwareExecutor())  # In the lifespan
+
+    profiler = SamplingProfiler(interval=0.005)
+    profiler.start()
+    ...  # let the workload run
+    collapsed = profiler.stop().collapsed()
+
+    curl -H "Authorization: Bearer $ADMIN_TOKEN" "localhost:8000/admin/profile?seconds=15" > api.folded
+    flamegraph.pl api.folded > api.svg
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from starlette.routing import Route
+
+from .metrics_utils import BACKGROUND_ENDPOINT, ROUTE_CPU, current_endpoint
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_PROFILE_INTERVAL_MS = 5.0
+MAX_PROFILE_SECONDS = 60.0
+ROUTE_CPU_ENABLED = os.getenv("PROFILE_ROUTE_CPU", "0") == "1"
+ROUTE_CPU_INTERVAL_MS = float(os.getenv("PROFILE_ROUTE_CPU_INTERVAL_MS", "20"))
+OTHER_ROUTE = "other"
+MAX_STACK_DEPTH = 128
+
+_ROUTE_HANDLE_CODE = Route.handle.__code__
+_sampler_thread_ids: set = set()  # Samplers never sample each other
+_thread_routes: Dict[int, str] = {}  # Route each worker thread is running a job for (run_for_route)
+_PREFIXES = sorted({p for p in sys.path if p}, key=len, reverse=True)
+
+
+def thread_cpu_time(thread_id: int) -> Optional[float]:
+    """CPU seconds used by a thread, or None where per-thread clocks are unsupported."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def frame_label(frame) -> str:
+    """py-spy style frame name: "function (path)" with sys.path prefixes stripped."""
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip("/\\")
+            break
+    return f"{code.co_name} ({filename})"
+
+
+def route_for(frame) -> Optional[str]:
+    """Path template of the route whose handler is on this stack, if any."""
+    depth = 0
+    while frame is not None and depth < MAX_STACK_DEPTH:
+        if frame.f_code is _ROUTE_HANDLE_CODE:
+            route = frame.f_locals.get("self")
+            return getattr(route, "path", None)
+        frame = frame.f_back
+        depth += 1
+    return None
+
+
+def run_for_route(route: Optional[str], fn: Callable, *args, **kwargs) -> Any:
+    """Run fn on this thread with the thread's CPU time attributed to route."""
+    if route is None or route == BACKGROUND_ENDPOINT:
+        return fn(*args, **kwargs)
+    thread_id = threading.get_ident()
+    previous = _thread_routes.get(thread_id)
+    _thread_routes[thread_id] = route
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        if previous is None:
+            _thread_routes.pop(thread_id, None)
+        else:
+            _thread_routes[thread_id] = previous
+
+
+class RouteAwareExecutor(ThreadPoolExecutor):
+    """
+    Thread pool whose jobs carry the route of the request that submitted them.
+
+    Installed as the event loop's default executor, it covers
+    asyncio.to_thread and run_in_executor(None, ...): submit() runs on the
+    loop thread in the submitting task's context.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        super().__init__(max_workers=max_workers, thread_name_prefix="asyncio")
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return super().submit(run_for_route, current_endpoint.get(), fn, *args, **kwargs)
+
+
+class RouteCPURoute(APIRoute):
+    """APIRoute whose sync def endpoint reports its route from the threadpool thread running it."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _reporting_route(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _reporting_route(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)  # FastAPI reads the parameters through __wrapped__
+    def run(*args, **kwargs):
+        return run_for_route(current_endpoint.get(), endpoint, *args, **kwargs)
+    return run
+
+
+def _application_frames() -> Dict[int, Any]:
+    """Innermost frame of every thread except the samplers."""
+    return {tid: frame for tid, frame in sys._current_frames().items() if tid not in _sampler_thread_ids}
+
+
+class _SamplerThread:
+    """Call _sample() every interval seconds on a daemon thread until stopped."""
+
+    name = "sampler"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_cpu: Dict[int, float] = {}
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    def start(self):
+        self._stop.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+        return self
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        _sampler_thread_ids.add(threading.get_ident())
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self._sample()
+                except Exception as e:  # Never let a bad sample kill the sampler
+                    logger.warning(f"{self.name} sample failed: {e}")
+        finally:
+            _sampler_thread_ids.discard(threading.get_ident())
+
+    def _busy_threads(self) -> List[tuple]:
+        """(thread id, innermost frame, CPU seconds since last sample) for threads that ran."""
+        frames = _application_frames()
+        busy = []
+        for thread_id, frame in frames.items():
+            cpu = thread_cpu_time(thread_id)
+            if cpu is None:
+                # No per-thread clock: count one interval per sample (wall-clock sampling)
+                busy.append((thread_id, frame, self.interval))
+                continue
+            last = self._last_cpu.get(thread_id)
+            self._last_cpu[thread_id] = cpu
+            if last is not None and cpu > last:
+                busy.append((thread_id, frame, cpu - last))
+        for thread_id in set(self._last_cpu) - set(frames):
+            del self._last_cpu[thread_id]
+        return busy
+
+    def _sample(self) -> None:
+        raise NotImplementedError
+
+
+class SamplingProfiler(_SamplerThread):
+    """Collect on-CPU stacks of all threads for a time-boxed capture."""
+
+    name = "sampling-profiler"
+
+    def __init__(self, interval: float = DEFAULT_PROFILE_INTERVAL_MS / 1000, include_idle: bool = False):
+        """
+        Args:
+            interval: Seconds between samples
+            include_idle: Keep stacks of threads that used no CPU since the last sample
+        """
+        super().__init__(interval)
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _sample(self) -> None:
+        if self.include_idle:
+            frames = list(_application_frames().items())
+        else:
+            frames = [(tid, frame) for tid, frame, _ in self._busy_threads()]
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in frames:
+            labels = []
+            while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            self.stacks[";".join(reversed(labels))] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one "root;...;leaf count" line each, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 25) -> Dict[str, Any]:
+        """Capture totals and the functions with the most self and total samples."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]  # Drop the thread name
+            if frames:
+                self_counts[frames[-1]] += count
+            for name in set(frames):
+                total_counts[name] += count
+        duration = (self.stopped_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        return {
+            "duration_s": round(duration, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "stack_samples": sum(self.stacks.values()),
+            "top_self": [{"frame": f, "samples": c} for f, c in self_counts.most_common(top)],
+            "top_total": [{"frame": f, "samples": c} for f, c in total_counts.most_common(top)],
+        }
+
+
+class RouteCPUSampler(_SamplerThread):
+    """Always-on sampler attributing per-thread CPU time to the route each thread works for."""
+
+    name = "route-cpu-sampler"
+
+    def __init__(self, interval: float = ROUTE_CPU_INTERVAL_MS / 1000):
+        super().__init__(interval)
+        self.cpu_seconds: Counter = Counter()
+        self.samples: Counter = Counter()
+
+    def _sample(self) -> None:
+        for thread_id, frame, cpu in self._busy_threads():
+            route = _thread_routes.get(thread_id) or route_for(frame) or OTHER_ROUTE
+            self.cpu_seconds[route] += cpu
+            self.samples[route] += 1
+            ROUTE_CPU.labels(endpoint=route).inc(cpu)
+
+    def stats(self) -> Dict[str, Any]:
+        """CPU seconds and sample counts per route since startup."""
+        return {
+            "interval_ms": round(self.interval * 1000, 3),
+            "routes": {
+                route: {"cpu_seconds": round(seconds, 4), "samples": self.samples[route]}
+                for route, seconds in self.cpu_seconds.most_common()
+            },
+        }
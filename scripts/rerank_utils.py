@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Re-ranking Utilities for Chat Context
+
+This module re-scores retrieved candidates against the query on the CPU so
+/chat can send fewer, better chunks to the LLM. Two scorers are available:
+
+- lexical: weighted query-term coverage plus query-bigram matches, blended
+  with the dense retrieval score (no extra dependencies)
+- cross-encoder: a small sentence-transformers CrossEncoder model, used
+  only when sentence-transformers is installed
+
+Scores depend only on the query text and the chunk, so they are cached
+per (query hash, chunk_id) in a bounded LRU.
+
+Usage:
+    from scripts.rerank_utils import create_reranker
+
+    reranker = create_reranker("lexical", idf=bm25_index.term_idf())
+    scores = reranker.score("What is ZMP?", candidates)
+"""
+
+import hashlib
+import logging
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .search_utils import tokenize
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+RERANKERS = ["none", "lexical", "cross-encoder"]
+DEFAULT_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_CACHE_SIZE = 10000
+LEXICAL_BLEND = 0.5  # Weight of the lexical score vs. the dense retrieval score
+BIGRAM_WEIGHT = 0.3  # Share of the lexical score from matched query bigrams
+
+
+def query_hash(query: str) -> str:
+    """Stable cache key for a query (case and whitespace insensitive)."""
+    normalized = " ".join(query.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class ScoreCache:
+    """Bounded LRU of (query hash, chunk_id) -> relevance score."""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[float]:
+        score = self._scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self._scores.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key: Tuple[str, str], score: float) -> None:
+        self._scores[key] = score
+        self._scores.move_to_end(key)
+        while len(self._scores) > self.max_size:
+            self._scores.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class Reranker:
+    """
+    Base re-ranker: caches model scores and blends them with retrieval scores.
+
+    Subclasses implement _score_pairs(query, snippets) returning relevance
+    in 0-1, one per snippet.
+    """
+
+    name = "base"
+    blend = 1.0  # 1.0 ignores the retrieval score entirely
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.cache = ScoreCache(cache_size)
+
+    def _score_pairs(self, query: str, snippets: List[str]) -> List[float]:
+        raise NotImplementedError
+
+    def score(self, query: str, results: List[Dict[str, Any]]) -> List[float]:
+        """Return the re-ranking score of each result for query."""
+        qhash = query_hash(query)
+        model_scores: List[Optional[float]] = [
+            self.cache.get((qhash, r.get("chunk_id", ""))) for r in results
+        ]
+
+        missing = [i for i, s in enumerate(model_scores) if s is None]
+        if missing:
+            fresh = self._score_pairs(query, [results[i].get("snippet", "") for i in missing])
+            for i, score in zip(missing, fresh):
+                model_scores[i] = score
+                self.cache.put((qhash, results[i].get("chunk_id", "")), score)
+
+        return [
+            self.blend * model + (1 - self.blend) * float(r.get("score", 0.0))
+            for model, r in zip(model_scores, results)
+        ]
+
+    def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """Return the top_k results by re-ranking score (stored in rerank_score)."""
+        scored = [
+            {**result, "rerank_score": score}
+            for result, score in zip(results, self.score(query, results))
+        ]
+        scored.sort(key=lambda r: r["rerank_score"], reverse=True)
+        return scored[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache metrics since startup."""
+        lookups = self.cache.hits + self.cache.misses
+        return {
+            "reranker": self.name,
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "cache_hit_rate": round(self.cache.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LexicalReranker(Reranker):
+    """Query-term coverage (IDF weighted) and bigram overlap, blended with the dense score."""
+
+    name = "lexical"
+    blend = LEXICAL_BLEND
+
+    def __init__(self, idf: Optional[Dict[str, float]] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            idf: Term -> IDF weights (e.g. BM25Index.term_idf()); unweighted if None
+            cache_size: Maximum cached (query, chunk) scores
+        """
+        super().__init__(cache_size)
+        self.idf = idf or {}
+        # Terms missing from the corpus vocabulary are as rare as the rarest known term
+        self._default_idf = max(self.idf.values()) if self.idf else 1.0
+
+    def _score_pairs(self, query: str, snippets: List[str]) -> List[float]:
+        query_terms = tokenize(query)
+        if not query_terms:
+            return [0.0] * len(snippets)
+
+        weights = {t: self.idf.get(t, self._default_idf) for t in query_terms}
+        total_weight = sum(weights.values())
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+
+        scores = []
+        for snippet in snippets:
+            doc_terms = tokenize(snippet)
+            doc_set = set(doc_terms)
+            coverage = sum(w for t, w in weights.items() if t in doc_set) / total_weight
+            if query_bigrams:
+                doc_bigrams = set(zip(doc_terms, doc_terms[1:]))
+                bigram_match = len(query_bigrams & doc_bigrams) / len(query_bigrams)
+                coverage = (1 - BIGRAM_WEIGHT) * coverage + BIGRAM_WEIGHT * bigram_match
+            scores.append(coverage)
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    """sentence-transformers CrossEncoder on the CPU; logits mapped to 0-1."""
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER_MODEL, cache_size: int = DEFAULT_CACHE_SIZE):
+        super().__init__(cache_size)
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+        logger.info(f"Cross-encoder loaded: {model_name}")
+
+    def _score_pairs(self, query: str, snippets: List[str]) -> List[float]:
+        logits = self.model.predict([(query, snippet) for snippet in snippets])
+        return [1 / (1 + math.exp(-float(logit))) for logit in logits]
+
+
+def create_reranker(
+    kind: str,
+    idf: Optional[Dict[str, float]] = None,
+    model_name: str = DEFAULT_CROSS_ENCODER_MODEL,
+    cache_size: int = DEFAULT_CACHE_SIZE
+) -> Optional[Reranker]:
+    """
+    Build the configured re-ranker.
+
+    Returns None for "none". A cross-encoder that cannot be loaded (package
+    missing, model unavailable) falls back to the lexical re-ranker.
+    """
+    if kind not in RERANKERS:
+        raise ValueError(f"Unknown reranker {kind!r}: must be one of {', '.join(RERANKERS)}")
+    if kind == "none":
+        return None
+    if kind == "cross-encoder":
+        try:
+            return CrossEncoderReranker(model_name, cache_size=cache_size)
+        except Exception as e:
+            logger.warning(f"Cross-encoder unavailable ({e}); using lexical re-ranker")
+    return LexicalReranker(idf=idf, cache_size=cache_size)
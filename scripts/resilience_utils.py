@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Resilience Utilities for Upstream Calls
+
+This module keeps slow or failing upstreams (Cohere, Qdrant, OpenAI) from
+holding requests and piling up load:
+
+- Deadline: created once per request; each stage asks it for its timeout,
+  so every upstream call gets whatever is left of the budget rather than
+  its SDK default (30s for Qdrant, 10 minutes for OpenAI)
+- CircuitBreaker: per upstream; after consecutive failures it opens and
+  calls fail fast with CircuitOpenError, then after a cool-down one probe
+  call is let through (half-open) to decide whether to close again. A
+  timeout only counts as a failure when the call had its route's full
+  default budget: a client asking for a short deadline_ms must not open
+  the breaker for everyone while the upstream is healthy
+- Hedger: for idempotent reads, sends a second identical request when the
+  first has not answered within the upstream's recent p95 latency and
+  returns whichever finishes first (bounded to a share of calls)
+- GuardedClient: wraps an SDK client so its methods go through a breaker
+  (and, for the listed methods, the hedger) without touching call sites
+
+Usage:
+    from scripts.resilience_utils import CircuitBreaker, Deadline, GuardedClient, Hedger
+
+    deadline = Deadline.from_ms(20000)
+    vector = embed_queries([query], timeout=deadline.timeout("embed"))[0]
+
+    co = GuardedClient(cohere.Client(key), CircuitBreaker("cohere"), Hedger("cohere"), hedged=("embed",))
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+HEDGE_ENABLED = os.getenv("HEDGE_REQUESTS", "0") == "1"
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_DELAY_MS = 50.0
+HEDGE_MAX_DELAY_MS = 2000.0
+HEDGE_MIN_SAMPLES = 20  # Use HEDGE_MAX_DELAY_MS until this many latencies are known
+HEDGE_MAX_RATIO = 0.1  # At most this share of calls is hedged
+LATENCY_WINDOW = 200
+HEDGE_POOL_SIZE = 32
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Set by Deadline.timeout: whether the current request runs on less than its route's default budget
+budget_capped: ContextVar[bool] = ContextVar("budget_capped", default=False)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage starts (or times out) after the request deadline."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before or during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """
+    Absolute point in time by which a request must finish (monotonic clock).
+
+    default_s is the budget the route gives requests that do not ask for
+    one; a shorter budget marks the request's upstream timeouts as the
+    caller's (see budget_capped).
+    """
+
+    def __init__(self, budget_s: float, default_s: Optional[float] = None):
+        self.budget_s = budget_s
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_s
+        self.capped = default_s is not None and budget_s < default_s
+
+    @classmethod
+    def from_ms(cls, budget_ms: float, default_ms: Optional[float] = None) -> "Deadline":
+        return cls(budget_ms / 1000, default_ms / 1000 if default_ms is not None else None)
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def elapsed_ms(self) -> int:
+        return int((time.monotonic() - self.started_at) * 1000)
+
+    def timeout(self, stage: str, cap: Optional[float] = None) -> float:
+        """
+        Timeout in seconds for the next upstream call of stage.
+
+        Raises DeadlineExceeded if the budget is already spent; cap bounds
+        the timeout for stages that should never take the whole budget.
+        Also records in budget_capped whether the caller shortened the
+        budget, for the breakers of the calls that follow.
+        """
+        budget_capped.set(self.capped)
+        left = self.remaining()
+        if left <= 0:
+            raise DeadlineExceeded(stage)
+        return min(left, cap) if cap is not None else left
+
+
+def whole_seconds(timeout: Optional[float], stage: str) -> Optional[int]:
+    """
+    Round a timeout down to whole seconds for APIs that only take ints.
+
+    Rounding down keeps the call inside the budget; with less than a
+    second left it cannot, so DeadlineExceeded is raised instead.
+    """
+    if timeout is None:
+        return None
+    if timeout < 1:
+        raise DeadlineExceeded(stage)
+    return int(timeout)
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the upstream is unhealthy.
+
+    Client errors (HTTP 4xx other than 429) are the caller's fault and do
+    not count against the breaker; timeouts, connection errors, 5xx and
+    rate limiting do.
+    """
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether error, or an error it was raised from, is a timeout (any SDK's)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, (TimeoutError, DeadlineExceeded)) or "Timeout" in type(error).__name__:
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open (retry in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+
+    closed: calls pass; failure_threshold consecutive failures open it.
+    open: calls fail fast until reset_timeout has passed.
+    half_open: one probe call passes; success closes, failure re-opens.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_SECONDS
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.caller_timeouts = 0
+
+    def before_call(self) -> None:
+        """Admit a call or raise CircuitOpenError."""
+        with self._lock:
+            if self.state == OPEN:
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - waited)
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open: probing")
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._probe_in_flight = True
+            self.calls += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                logger.info(f"Circuit {self.name} closed: probe succeeded")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit {self.name} open after {self.consecutive_failures} "
+                                   f"consecutive failures (last: {type(error).__name__}: {error})")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def record_caller_timeout(self) -> None:
+        """A timeout of a budget-capped call: says nothing about the upstream either way."""
+        with self._lock:
+            self.caller_timeouts += 1
+            self._probe_in_flight = False  # Half-open stays half-open: the next call probes
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn through the breaker."""
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if budget_capped.get() and is_timeout(e):
+                self.record_caller_timeout()
+            elif is_upstream_failure(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and counters (state_code: 0 closed, 1 half-open, 2 open)."""
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            return {
+                "state": self.state,
+                "state_code": STATE_CODES[self.state],
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_s": retry_in,
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "caller_timeouts": self.caller_timeouts,
+            }
+
+
+class Hedger:
+    """
+    Send a backup request when the first is slower than the recent p95.
+
+    Both attempts run on a small thread pool; the first success wins and
+    the slower attempt is left to finish in the background. Only use it
+    for idempotent calls.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        min_delay_ms: float = HEDGE_MIN_DELAY_MS,
+        max_delay_ms: float = HEDGE_MAX_DELAY_MS,
+        max_ratio: float = HEDGE_MAX_RATIO,
+        pool_size: int = HEDGE_POOL_SIZE
+    ):
+        self.name = name
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.max_ratio = max_ratio
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=f"hedge-{name}")
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay_ms(self) -> float:
+        """Current hedge delay: p95 of recent latencies, clamped."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return self.max_delay_ms
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * HEDGE_PERCENTILE / 100))]
+        return min(self.max_delay_ms, max(self.min_delay_ms, p95))
+
+    def _timed(self, fn: Callable, args, kwargs) -> Any:
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        with self._lock:
+            self._latencies.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn, hedging it once if it is slower than the current delay."""
+        with self._lock:
+            self.calls += 1
+            may_hedge = self.hedged < self.max_ratio * self.calls
+        primary = self._pool.submit(self._timed, fn, args, kwargs)
+        done, _ = wait([primary], timeout=self.delay_ms() / 1000)
+        if done or not may_hedge:
+            return primary.result()
+
+        with self._lock:
+            self.hedged += 1
+        backup = self._pool.submit(self._timed, fn, args, kwargs)
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is backup:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, hedged, wins = self.calls, self.hedged, self.hedge_wins
+        return {
+            "calls": calls,
+            "hedged": hedged,
+            "hedge_wins": wins,
+            "delay_ms": round(self.delay_ms(), 1),
+        }
+
+
+class GuardedClient:
+    """
+    Proxy an SDK client so every public method call goes through a breaker.
+
+    Methods named in hedged also go through the hedger. Attributes named in
+    nested (resource objects such as OpenAI's chat.completions) are wrapped
+    the same way, and methods named in factories (such as with_options)
+    return wrapped clients, so per-call variants stay guarded.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        breaker: CircuitBreaker,
+        hedger: Optional[Hedger] = None,
+        hedged: Iterable[str] = (),
+        nested: Iterable[str] = (),
+        factories: Iterable[str] = ()
+    ):
+        self._client = client
+        self._breaker = breaker
+        self._hedger = hedger
+        self._hedged = frozenset(hedged)
+        self._nested = frozenset(nested)
+        self._factories = frozenset(factories)
+
+    def _wrap(self, client: Any) -> "GuardedClient":
+        return GuardedClient(client, self._breaker, self._hedger, self._hedged, self._nested, self._factories)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name.startswith("_"):
+            return attr
+        if name in self._nested:
+            return self._wrap(attr)
+        if not callable(attr):
+            return attr
+        if name in self._factories:
+            return lambda *args, **kwargs: self._wrap(attr(*args, **kwargs))
+        if self._hedger is not None and name in self._hedged:
+            return lambda *args, **kwargs: self._breaker.call(self._hedger.call, attr, *args, **kwargs)
+        return lambda *args, **kwargs: self._breaker.call(attr, *args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"GuardedClient({self._client!r}, breaker={self._breaker.name})"
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Search Utilities for Hybrid Retrieval
+
+This module provides an in-process BM25 index over chunk texts and
+reciprocal rank fusion (RRF) for combining it with dense vector results.
+
+The index is a handful of flat NumPy arrays plus the documents packed as
+JSON lines, so it can be saved once and memory-mapped by every worker
+process (see scripts/shared_data_utils.py) instead of being rebuilt per
+worker.
+
+Usage:
+    from scripts.search_utils import BM25Index, reciprocal_rank_fusion
+
+    index = BM25Index(documents)
+    index.save(directory)
+    shared = BM25Index.load(directory)  # Arrays memory-mapped, read-only
+"""
+
+import json
+import logging
+import math
+import re
+from collections import defaultdict
+from collections.abc import Sequence
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+BM25_PAYLOAD_FIELDS = ["chunk_id", "text", "source_path", "slug", "title"]
+
+# Keeps dotted/hyphenated technical terms together (e.g. "sim-to-real", "v2.0")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-_][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how in into is it its of on "
+    "or that the their this to was what when where which why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms, dropping stopwords."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class PackedDocuments(Sequence):
+    """
+    Read-only documents stored as one UTF-8 buffer of JSON lines plus offsets.
+
+    A document is decoded when it is accessed, so the buffer can be a
+    memory-mapped file shared between processes.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray):
+        self._buffer = buffer
+        self._offsets = offsets
+
+    @classmethod
+    def pack(cls, documents: List[Dict[str, Any]]) -> "PackedDocuments":
+        encoded = [json.dumps(doc, ensure_ascii=False).encode("utf-8") for doc in documents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return json.loads(self._buffer[start:end].tobytes())
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index held in memory.
+
+    Posting lists are stored back to back in flat NumPy arrays (document
+    indices and term frequencies, sliced per term by an offsets array), so
+    scoring a query is a handful of vectorized scatter-adds into a dense
+    score array, and the whole index can be saved and memory-mapped.
+    """
+
+    ARRAYS = ("offsets", "doc_ids", "tfs", "idf", "norm", "doc_buffer", "doc_offsets")
+
+    def __init__(self, documents: List[Dict[str, Any]], text_field: str = "snippet"):
+        """
+        Build the index.
+
+        Args:
+            documents: Result-shaped dicts (chunk_id, snippet, source_path, ...)
+            text_field: Key holding the text to index
+        """
+        postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_idx, doc in enumerate(documents):
+            terms = tokenize(doc.get(text_field) or "")
+            lengths[doc_idx] = len(terms)
+            for term in terms:
+                postings[term][doc_idx] = postings[term].get(doc_idx, 0) + 1
+
+        avg_length = float(lengths.mean()) if len(documents) else 0.0
+        # Per-document length normalization, precomputed once
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(avg_length, 1.0))
+
+        terms = list(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=offsets[1:])
+        doc_ids = np.fromiter(chain.from_iterable(postings[t].keys() for t in terms), dtype=np.int32,
+                              count=int(offsets[-1]))
+        tfs = np.fromiter(chain.from_iterable(postings[t].values() for t in terms), dtype=np.float32,
+                          count=int(offsets[-1]))
+        idf = np.array([math.log(1 + (len(documents) - df + 0.5) / (df + 0.5)) for df in np.diff(offsets).tolist()],
+                       dtype=np.float64)
+
+        self._init(terms, offsets, doc_ids, tfs, idf, norm, PackedDocuments.pack(documents))
+        logger.info(f"BM25 index built: {self.doc_count} documents, {len(self._term_ids)} terms")
+
+    def _init(self, terms, offsets, doc_ids, tfs, idf, norm, documents) -> None:
+        self.documents = documents
+        self.doc_count = len(documents)
+        self._term_ids: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self._offsets = offsets
+        self._doc_ids = doc_ids
+        self._tfs = tfs
+        self._idf = idf
+        self._norm = norm
+        self._field_columns: Dict[str, np.ndarray] = {}
+
+    def save(self, directory: Union[str, Path]) -> None:
+        """Write the index as .npy arrays plus terms.json into directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "offsets": self._offsets, "doc_ids": self._doc_ids, "tfs": self._tfs, "idf": self._idf,
+            "norm": self._norm, "doc_buffer": self.documents._buffer, "doc_offsets": self.documents._offsets,
+        }
+        for name in self.ARRAYS:
+            np.save(directory / f"{name}.npy", arrays[name])
+        (directory / "terms.json").write_text(json.dumps(list(self._term_ids), ensure_ascii=False),
+                                              encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True) -> "BM25Index":
+        """
+        Open an index written by save().
+
+        With mmap the arrays are read-only views of the files, so processes
+        loading the same directory share one copy in the page cache; only
+        the term -> id dict is built per process.
+        """
+        directory = Path(directory)
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+                  for name in cls.ARRAYS}
+        terms = json.loads((directory / "terms.json").read_text(encoding="utf-8"))
+        index = cls.__new__(cls)
+        index._init(terms, arrays["offsets"], arrays["doc_ids"], arrays["tfs"], arrays["idf"], arrays["norm"],
+                    PackedDocuments(arrays["doc_buffer"], arrays["doc_offsets"]))
+        return index
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    def term_idf(self) -> Dict[str, float]:
+        """Return the IDF of every indexed term."""
+        return {term: float(self._idf[i]) for term, i in self._term_ids.items()}
+
+    def score(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every document for query."""
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            doc_ids, tfs = self._doc_ids[start:end], self._tfs[start:end]
+            scores[doc_ids] += float(self._idf[term_id]) * tfs * (BM25_K1 + 1) / (tfs + self._norm[doc_ids])
+        return scores
+
+    def filter_mask(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """Boolean mask of documents whose fields match every filter (field -> allowed values)."""
+        mask = np.ones(self.doc_count, dtype=bool)
+        for field, values in filters.items():
+            column = self._field_columns.get(field)
+            if column is None:
+                column = np.array([doc.get(field) for doc in self.documents], dtype=object)
+                self._field_columns[field] = column
+            mask &= np.isin(column, list(values))
+        return mask
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the top_k matching documents with scores normalized to 0-1.
+
+        Documents without any query term are never returned. filters maps a
+        document field to its allowed values, like the Qdrant payload filter.
+        """
+        scores = self.score(query)
+        if filters:
+            scores[~self.filter_mask(filters)] = 0.0
+        matched = int(np.count_nonzero(scores))
+        if matched == 0:
+            return []
+
+        k = min(top_k, matched)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        max_score = float(scores[top[0]])
+
+        return [
+            {**self.documents[i], "score": float(scores[i]) / max_score}
+            for i in top
+        ]
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    top_k: int,
+    k: int = RRF_K,
+    key: str = "chunk_id"
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists with reciprocal rank fusion.
+
+    Each result contributes 1 / (k + rank) per list it appears in. Fused
+    scores are scaled so a document ranked first in every list scores 1.0.
+
+    Args:
+        result_lists: Ranked result dicts, best first
+        top_k: Number of fused results to return
+        k: RRF damping constant
+        key: Field identifying the same document across lists
+
+    Returns:
+        Fused results (first-seen dict for each document) with fused scores
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    first_seen: Dict[str, Dict[str, Any]] = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, 1):
+            doc_key = result.get(key)
+            fused[doc_key] += 1.0 / (k + rank)
+            first_seen.setdefault(doc_key, result)
+
+    max_score = len(result_lists) / (k + 1)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [
+        {**first_seen[doc_key], "score": score / max_score}
+        for doc_key, score in ranked
+    ]
+
+
+def document_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Result-shaped BM25 document from a chunk payload."""
+    return {
+        "chunk_id": payload.get("chunk_id", ""),
+        "snippet": payload.get("text", ""),
+        "source_path": payload.get("source_path", ""),
+        "slug": payload.get("slug", ""),
+        "title": payload.get("title"),
+    }
+
+
+def build_bm25_index_from_qdrant(
+    qdrant_client,
+    collection_name: str,
+    batch_size: int = 256
+) -> Optional[BM25Index]:
+    """
+    Scroll every chunk payload out of Qdrant and index it.
+
+    Returns:
+        BM25Index, or None if the collection is empty or unreachable
+    """
+    documents = []
+    offset = None
+    try:
+        while True:
+            points, offset = qdrant_client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=BM25_PAYLOAD_FIELDS,
+                with_vectors=False
+            )
+            documents.extend(document_from_payload(point.payload) for point in points)
+            if offset is None:
+                break
+    except Exception as e:
+        logger.warning(f"Could not load chunks for BM25 index: {e}")
+        return None
+
+    if not documents:
+        logger.warning("No chunks found for BM25 index")
+        return None
+
+    return BM25Index(documents)
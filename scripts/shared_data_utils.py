@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Shared Read-Mostly Data for Multi-Worker Serving
+
+With several worker processes (gunicorn.conf.py) anything a worker loads
+at startup is loaded, and held, once per worker. This module builds that
+data once, in the gunicorn master before the workers are forked, as a
+snapshot directory every worker memory-maps:
+
+- vectors.npy / point_ids.npy: every chunk vector of the collection, rows
+  sorted by Qdrant point id. Chat context selection (MMR) looks candidate
+  vectors up here instead of downloading them with every query
+- bm25/: the BM25 index (search_utils.BM25Index.save)
+- chapters.json: chapter texts and content hashes, the ChapterIndex's
+  first load
+- manifest.json: written last; a directory without it is incomplete
+
+The directory defaults to a new one in /dev/shm, which is RAM-backed like
+multiprocessing.shared_memory but lets np.load map the files by name, so
+the arrays exist once in memory however many workers map them. The
+snapshot is the collection as it was when it was built, and the manifest
+records which collection version that was (the target of the alias, see
+embed-vectors.py). SharedSnapshot.is_current compares it, and the point
+count, with Qdrant: after an alias switch or an ingest the same point
+ids may hold other vectors, so a stale snapshot must not be served.
+Points added since have no row and are fetched from Qdrant by the
+caller. Neighbor lists are payload fields read from Qdrant per request,
+so a --neighbors-only refresh needs no new snapshot.
+
+Usage:
+    from scripts.shared_data_utils import SharedSnapshot, build_snapshot
+
+    build_snapshot(qdrant_client, "book_vectors", directory, VALID_CHAPTER_SLUGS)  # Once, in the master
+    snapshot = SharedSnapshot.open(directory)  # In each worker
+    vectors, missing = snapshot.vectors.lookup([point.id for point in points])
+    if not snapshot.is_current(qdrant_client):
+        ...  # Re-indexed since: stop using it (api.py) or rebuild it (gunicorn.conf.py on HUP)
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .content_cache_utils import assemble_chapters
+from .search_utils import BM25_PAYLOAD_FIELDS, BM25Index, document_from_payload
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+SHARED_MEMORY_DIR = Path("/dev/shm")
+SNAPSHOT_PAGE_SIZE = 256
+MANIFEST = "manifest.json"
+
+
+class VectorTable:
+    """Vectors by Qdrant point id: a sorted id array and the row-aligned matrix."""
+
+    def __init__(self, point_ids: np.ndarray, vectors: np.ndarray):
+        self.point_ids = point_ids
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.point_ids)
+
+    def lookup(self, point_ids: Sequence[Any]) -> Tuple[List[Optional[np.ndarray]], List[Any]]:
+        """
+        Rows for point_ids, in order, with None where the table has no row.
+
+        Returns the rows and the ids that were not found.
+        """
+        rows: List[Optional[np.ndarray]] = [None] * len(point_ids)
+        numeric = [i for i, pid in enumerate(point_ids) if isinstance(pid, int) and pid >= 0]
+        if numeric and len(self.point_ids):
+            ids = np.array([point_ids[i] for i in numeric], dtype=np.uint64)
+            positions = np.minimum(np.searchsorted(self.point_ids, ids), len(self.point_ids) - 1)
+            for i, position, hit in zip(numeric, positions, self.point_ids[positions] == ids):
+                if hit:
+                    rows[i] = self.vectors[position]
+        missing = [pid for pid, row in zip(point_ids, rows) if row is None]
+        return rows, missing
+
+
+class SharedSnapshot:
+    """A snapshot directory opened read-only, its arrays memory-mapped."""
+
+    def __init__(self, directory: Path, manifest: Dict[str, Any], vectors: VectorTable, bm25: Optional[BM25Index],
+                 chapters: Dict[str, Dict[str, Any]]):
+        self.directory = directory
+        self.manifest = manifest
+        self.vectors = vectors
+        self.bm25 = bm25
+        self.chapters = chapters
+
+    @classmethod
+    def open(cls, directory: Union[str, Path]) -> "SharedSnapshot":
+        """Map a snapshot written by build_snapshot (FileNotFoundError if incomplete)."""
+        directory = Path(directory)
+        manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        vectors = VectorTable(
+            np.load(directory / "point_ids.npy", mmap_mode="r"),
+            np.load(directory / "vectors.npy", mmap_mode="r")
+        )
+        bm25 = BM25Index.load(directory / "bm25") if manifest["bm25_documents"] else None
+        chapters = json.loads((directory / "chapters.json").read_text(encoding="utf-8"))
+        return cls(directory, manifest, vectors, bm25, chapters)
+
+    def is_current(self, qdrant_client) -> bool:
+        """
+        Whether the collection is still the one this snapshot was built from.
+
+        Compares the collection version (alias target) and the point count.
+        Points re-upserted in place under the same version are not detected.
+        """
+        collection_name = self.manifest["collection"]
+        version = collection_version(qdrant_client, collection_name)
+        if version != self.manifest.get("collection_version", collection_name):
+            return False
+        return qdrant_client.count(collection_name, exact=True).count == self.manifest["points"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "collection_version": self.manifest.get("collection_version", self.manifest["collection"]),
+            "points": len(self.vectors),
+            "dim": self.manifest["dim"],
+            "bm25_documents": self.manifest["bm25_documents"],
+            "chapters": len(self.chapters),
+            "age_s": round(time.time() - self.manifest["created_at"], 1),
+        }
+
+
+def collection_version(qdrant_client, collection_name: str) -> str:
+    """The collection an alias named collection_name points to, else collection_name itself."""
+    for alias in qdrant_client.get_aliases().aliases:
+        if alias.alias_name == collection_name:
+            return alias.collection_name
+    return collection_name
+
+
+def default_snapshot_dir() -> str:
+    """New empty directory for a snapshot, in /dev/shm when available."""
+    parent = SHARED_MEMORY_DIR if SHARED_MEMORY_DIR.is_dir() and os.access(SHARED_MEMORY_DIR, os.W_OK) else None
+    return tempfile.mkdtemp(prefix="rag-shared-", dir=parent)
+
+
+def build_snapshot(
+    qdrant_client,
+    collection_name: str,
+    directory: Union[str, Path],
+    chapter_slugs: Iterable[str]
+) -> Dict[str, Any]:
+    """
+    Write a snapshot of the collection from one scroll (payloads and vectors).
+
+    Returns the manifest. Only integer point ids (as embed-vectors.py
+    writes them) get vector rows.
+    """
+    started = time.perf_counter()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / MANIFEST).unlink(missing_ok=True)
+    version = collection_version(qdrant_client, collection_name)  # Before the scroll: a switch during it reads as stale
+
+    payloads, ids, rows = [], [], []
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            limit=SNAPSHOT_PAGE_SIZE,
+            offset=offset,
+            with_payload=BM25_PAYLOAD_FIELDS,
+            with_vectors=True
+        )
+        for point in points:
+            payloads.append(point.payload)
+            if isinstance(point.id, int) and isinstance(point.vector, list):
+                ids.append(point.id)
+                rows.append(point.vector)
+        if not points or offset is None:
+            break
+
+    dim = len(rows[0]) if rows else 0
+    point_ids = np.array(ids, dtype=np.uint64)
+    vectors = np.array(rows, dtype=np.float32).reshape(len(rows), dim)
+    order = np.argsort(point_ids)
+    np.save(directory / "point_ids.npy", point_ids[order])
+    np.save(directory / "vectors.npy", vectors[order])
+    del rows, vectors
+
+    documents = [document_from_payload(payload) for payload in payloads]
+    if documents:
+        BM25Index(documents).save(directory / "bm25")
+    chapters = assemble_chapters(payloads, chapter_slugs)
+    (directory / "chapters.json").write_text(json.dumps(chapters, ensure_ascii=False), encoding="utf-8")
+
+    manifest = {
+        "collection": collection_name,
+        "collection_version": version,
+        "points": len(payloads),
+        "dim": dim,
+        "bm25_documents": len(documents),
+        "created_at": time.time(),
+    }
+    (directory / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    size_mb = sum(f.stat().st_size for f in directory.rglob("*") if f.is_file()) / 1e6
+    logger.info(f"Shared snapshot written to {directory}: {len(payloads)} points, {len(chapters)} chapters, "
+                f"{size_mb:.1f} MB in {time.perf_counter() - started:.1f}s")
+    return manifest
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Startup Utilities for the RAG API
+
+Keeps cold starts short (HuggingFace Spaces starts the container when a
+sleeping Space gets its first request):
+
+- LazyClient: builds an SDK client, importing its package, on first use
+  instead of at module import; importing cohere alone takes seconds
+- StartupTracker: after the server starts listening, imports the deferred
+  packages one after another, then runs the initialization steps (client
+  builds, Postgres connect, BM25 index, tokenizer, chapter index)
+  concurrently in worker threads, timing each one. /health/live answers
+  as soon as the event loop runs; /health/ready only once every step has
+  finished
+- IMPORT_LOCK: held for those imports and for LazyClient builds. Importing
+  packages that share dependencies (cohere and openai both import
+  pydantic.v1) from two threads at once can fail with a module lock
+  deadlock; imports are CPU-bound anyway, so serializing them costs
+  little
+- parse_importtime: turns `python -X importtime` output into per-module
+  and per-package timings (benchmarks/bench_startup.py)
+
+Usage:
+    from scripts.startup_utils import LazyClient, StartupTracker
+
+    qdrant_client = LazyClient("qdrant", init_qdrant_client)
+    startup = StartupTracker().start(
+        {"qdrant": qdrant_client.get, "tokenizer": load_tokenizer},
+        preload=("qdrant_client", "tiktoken")
+    )
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+PENDING, RUNNING, OK, FAILED = "pending", "running", "ok", "failed"
+PRELOAD_STEP = "imports"
+
+IMPORT_LOCK = threading.RLock()
+
+
+class LazyClient:
+    """
+    Proxy that builds its client with factory() on first attribute access.
+
+    Concurrent first uses build the client once, under IMPORT_LOCK since
+    the factory usually imports the SDK; later accesses go straight to the
+    built client.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._client: Any = None
+        self._lock = threading.Lock()
+        self.build_ms: Optional[int] = None
+
+    def get(self) -> Any:
+        """The client, built now if this is its first use."""
+        client = self._client
+        if client is None:
+            with self._lock, IMPORT_LOCK:
+                if self._client is None:
+                    started = time.perf_counter()
+                    self._client = self._factory()
+                    self.build_ms = int((time.perf_counter() - started) * 1000)
+                    logger.info(f"{self._name} client built in {self.build_ms}ms")
+                client = self._client
+        return client
+
+    @property
+    def built(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        return f"LazyClient({self._name}, built={self.built})"
+
+
+class StartupTracker:
+    """
+    Background initialization steps with per-step status and timings.
+
+    Steps are independent callables run concurrently in worker threads
+    once the preload imports are done; a step that depends on another does
+    both in order itself. A failed step is logged and keeps the service
+    not ready.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.completed_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, steps: Dict[str, Callable[[], Any]], preload: Iterable[str] = ()) -> "StartupTracker":
+        """
+        Schedule the preload imports, then steps, on the running event loop.
+
+        Returns immediately. The imports are reported as the "imports" step.
+        """
+        preload = tuple(preload)
+        if preload:
+            self.steps[PRELOAD_STEP] = {"status": PENDING, "ms": None}
+        for name in steps:
+            self.steps[name] = {"status": PENDING, "ms": None}
+        self._task = asyncio.create_task(self._run_all(steps, preload))
+        return self
+
+    async def _run_all(self, steps: Dict[str, Callable[[], Any]], preload: tuple) -> None:
+        if preload:
+            await self._run_step(PRELOAD_STEP, lambda: import_modules(preload))
+        await asyncio.gather(*(self._run_step(name, fn) for name, fn in steps.items()))
+        self.completed_at = time.monotonic()
+        failed = [name for name, step in self.steps.items() if step["status"] == FAILED]
+        timings = ", ".join(f"{name} {step['ms']}ms" for name, step in self.steps.items())
+        if failed:
+            logger.error(f"Startup finished with failed steps: {', '.join(failed)} ({timings})")
+        else:
+            logger.info(f"Startup complete in {self.elapsed_ms()}ms ({timings})")
+
+    async def _run_step(self, name: str, fn: Callable[[], Any]) -> None:
+        self.steps[name]["status"] = RUNNING
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(fn)
+        except Exception as e:
+            logger.error(f"Startup step {name} failed: {e}")
+            self.steps[name].update(status=FAILED, error=str(e))
+        else:
+            self.steps[name]["status"] = OK
+        self.steps[name]["ms"] = int((time.perf_counter() - started) * 1000)
+
+    @property
+    def ready(self) -> bool:
+        return self.completed_at is not None and all(s["status"] == OK for s in self.steps.values())
+
+    @property
+    def failed(self) -> bool:
+        return any(s["status"] == FAILED for s in self.steps.values())
+
+    def elapsed_ms(self) -> int:
+        """Time from creation until completion (or until now, while running)."""
+        end = self.completed_at if self.completed_at is not None else time.monotonic()
+        return int((end - self.started_at) * 1000)
+
+    async def stop(self) -> None:
+        """Cancel unfinished steps (threads already running are left to finish)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        status = "ready" if self.ready else "failed" if self.failed else "starting"
+        return {
+            "status": status,
+            "elapsed_ms": self.elapsed_ms(),
+            "steps": {name: dict(step) for name, step in self.steps.items()},
+        }
+
+
+def import_modules(names: Iterable[str]) -> None:
+    """
+    Import each module in turn under IMPORT_LOCK, logging the slow ones.
+
+    A missing module is skipped: optional packages (tiktoken) are handled
+    where they are used.
+    """
+    with IMPORT_LOCK:
+        for name in names:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logger.warning(f"Preload of {name} skipped: {e}")
+                continue
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            if elapsed_ms >= 100:
+                logger.info(f"Imported {name} in {elapsed_ms}ms")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """
+    Parse `python -X importtime` output.
+
+    Returns one dict per imported module (module, self_us, cumulative_us,
+    depth), in import order. Lines that are not importtime rows (warnings
+    printed during import) are skipped.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # Header row
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        rows.append({
+            "module": stripped,
+            "self_us": self_us,
+            "cumulative_us": cumulative_us,
+            "depth": (len(name) - len(stripped) - 1) // 2,
+        })
+    return rows
+
+
+def package_totals(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Self import time (us) summed per top-level package, largest first."""
+    totals: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + row["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
@@ -8,26 +8,38 @@ This script:
 3. Creates the documents table if it doesn't exist
 4. Stores/updates metadata for each chunk (upsert)
 
+By default rows are streamed into a temporary staging table with
+COPY FROM STDIN and merged into documents with one set-based upsert.
+The execute_values and per-row paths are kept for comparison.
+
 Usage:
     python scripts/store-metadata.py
+    python scripts/store-metadata.py --method values
     python scripts/store-metadata.py --count
     python scripts/store-metadata.py --lookup doc-001-0001
     python scripts/store-metadata.py --source docs/chapter-1/index.md
 """
 
 import argparse
+import csv
+import io
 import json
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import psycopg2
+import psycopg2.extras
 from dotenv import load_dotenv
 
 
 # Constants
-BATCH_SIZE = 10
+BATCH_SIZE = 1000
+STORE_METHODS = ["copy", "values", "row"]
+DEFAULT_STORE_METHOD = "copy"
+DOCUMENT_COLUMNS = ["chunk_id", "source_path", "slug", "title", "order_index", "snippet"]
 
 
 def load_env() -> None:
@@ -113,51 +125,217 @@ def create_table(conn: psycopg2.extensions.connection) -> None:
     conn.commit()
 
 
-def store_metadata(
-    conn: psycopg2.extensions.connection,
-    chunks: List[Dict[str, Any]]
-) -> int:
-    """Store chunk metadata with upsert (ON CONFLICT UPDATE)."""
-    upsert_sql = """
-    INSERT INTO documents (chunk_id, source_path, slug, title, order_index, snippet, created_at)
-    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+UPSERT_SET_CLAUSE = """
     ON CONFLICT (chunk_id) DO UPDATE SET
         source_path = EXCLUDED.source_path,
         slug = EXCLUDED.slug,
         title = EXCLUDED.title,
         order_index = EXCLUDED.order_index,
-        snippet = EXCLUDED.snippet;
+        snippet = EXCLUDED.snippet
+"""
+
+
+def chunk_to_row(chunk: Dict[str, Any]) -> tuple:
+    """Convert a chunk dict to a documents row (DOCUMENT_COLUMNS order)."""
+    return (
+        chunk["chunk_id"],
+        chunk["source_path"],
+        chunk["slug"],
+        chunk.get("title", ""),
+        chunk["order_index"],
+        chunk["text"]
+    )
+
+
+class CopyRowStream(io.TextIOBase):
+    """
+    File-like object that renders rows as CSV on demand for COPY FROM STDIN.
+
+    psycopg2's copy_expert pulls data with read(size), so only one buffer's
+    worth of rows is materialized at a time instead of the whole payload.
+    """
+
+    def __init__(self, rows: Iterable[tuple]):
+        self._rows: Iterator[tuple] = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_ALL, lineterminator="\n")
+        self._pending = ""
+        self.rows_written = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.rows_written += 1
+            if self._buffer.tell() >= 65536:
+                self._pending += self._buffer.getvalue()
+                self._buffer.seek(0)
+                self._buffer.truncate()
+        self._pending += self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+        if size < 0:
+            data, self._pending = self._pending, ""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def store_metadata_copy(
+    cur: psycopg2.extensions.cursor,
+    chunks: Iterable[Dict[str, Any]]
+) -> int:
+    """
+    Stream rows into a temp table with COPY, then upsert them in one statement.
+
+    chunks may be any iterable (e.g. a queue consumer); it is read lazily
+    while COPY is in progress.
+    """
+    columns = ", ".join(DOCUMENT_COLUMNS)
+
+    cur.execute("""
+    CREATE TEMP TABLE documents_staging (
+        chunk_id      VARCHAR(50),
+        source_path   TEXT,
+        slug          VARCHAR(100),
+        title         VARCHAR(255),
+        order_index   INTEGER,
+        snippet       TEXT,
+        seq           BIGSERIAL  -- Arrival order: COPY fills it row by row
+    ) ON COMMIT DROP;
+    """)
+
+    stream = CopyRowStream(chunk_to_row(chunk) for chunk in chunks)
+    cur.copy_expert(
+        f"COPY documents_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+        stream,
+        size=65536
+    )
+    print(f"  COPY: {stream.rows_written} rows staged")
+
+    # DISTINCT ON keeps ON CONFLICT from touching the same chunk_id twice;
+    # seq DESC keeps the last row of a duplicated chunk_id, as the other methods do
+    cur.execute(f"""
+    INSERT INTO documents ({columns}, created_at)
+    SELECT DISTINCT ON (chunk_id) {columns}, NOW()
+    FROM documents_staging
+    ORDER BY chunk_id, seq DESC
+    {UPSERT_SET_CLAUSE};
+    """)
+    print(f"  Upsert: {cur.rowcount} records merged into documents")
+
+    return stream.rows_written
+
+
+def store_metadata_values(
+    cur: psycopg2.extensions.cursor,
+    chunks: List[Dict[str, Any]]
+) -> int:
+    """Upsert rows with multi-row INSERTs of BATCH_SIZE rows each (chunk_ids de-duplicated per page)."""
+    upsert_sql = f"""
+    INSERT INTO documents ({", ".join(DOCUMENT_COLUMNS)}, created_at)
+    VALUES %s
+    {UPSERT_SET_CLAUSE};
     """
 
     total_batches = (len(chunks) + BATCH_SIZE - 1) // BATCH_SIZE
     records_processed = 0
 
+    for i in range(0, len(chunks), BATCH_SIZE):
+        batch = chunks[i:i + BATCH_SIZE]
+        batch_num = i // BATCH_SIZE + 1
+
+        # One row per chunk_id (the last one), or ON CONFLICT would touch the same row twice
+        rows = list({row[0]: row for row in map(chunk_to_row, batch)}.values())
+        psycopg2.extras.execute_values(
+            cur,
+            upsert_sql,
+            rows,
+            template="(%s, %s, %s, %s, %s, %s, NOW())",
+            page_size=BATCH_SIZE
+        )
+        records_processed += len(batch)
+
+        print(f"  Batch {batch_num}/{total_batches}: {len(rows)} records upserted")
+
+    return records_processed
+
+
+def store_metadata_rows(
+    cur: psycopg2.extensions.cursor,
+    chunks: List[Dict[str, Any]]
+) -> int:
+    """Upsert rows one statement at a time (one round-trip per chunk)."""
+    upsert_sql = f"""
+    INSERT INTO documents ({", ".join(DOCUMENT_COLUMNS)}, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    {UPSERT_SET_CLAUSE};
+    """
+
+    total_batches = (len(chunks) + BATCH_SIZE - 1) // BATCH_SIZE
+    records_processed = 0
+
+    for i in range(0, len(chunks), BATCH_SIZE):
+        batch = chunks[i:i + BATCH_SIZE]
+        batch_num = i // BATCH_SIZE + 1
+
+        for chunk in batch:
+            cur.execute(upsert_sql, chunk_to_row(chunk))
+            records_processed += 1
+
+        print(f"  Batch {batch_num}/{total_batches}: {len(batch)} records upserted")
+
+    return records_processed
+
+
+def store_metadata(
+    conn: psycopg2.extensions.connection,
+    chunks: List[Dict[str, Any]],
+    method: str = DEFAULT_STORE_METHOD
+) -> int:
+    """
+    Store chunk metadata with upsert (ON CONFLICT UPDATE).
+
+    Args:
+        conn: Open PostgreSQL connection
+        chunks: Chunks loaded from chunks.json
+        method: "copy" (COPY + set-based upsert), "values" (execute_values
+            pages) or "row" (one INSERT per chunk)
+
+    Returns:
+        Number of records written
+    """
+    writers = {
+        "copy": store_metadata_copy,
+        "values": store_metadata_values,
+        "row": store_metadata_rows,
+    }
+    if method not in writers:
+        raise ValueError(f"Unknown store method '{method}': must be one of {', '.join(STORE_METHODS)}")
+
+    start_time = time.time()
+
     try:
         with conn.cursor() as cur:
-            for i in range(0, len(chunks), BATCH_SIZE):
-                batch = chunks[i:i + BATCH_SIZE]
-                batch_num = i // BATCH_SIZE + 1
-
-                for chunk in batch:
-                    cur.execute(upsert_sql, (
-                        chunk["chunk_id"],
-                        chunk["source_path"],
-                        chunk["slug"],
-                        chunk.get("title", ""),
-                        chunk["order_index"],
-                        chunk["text"]
-                    ))
-                    records_processed += 1
-
-                print(f"  Batch {batch_num}/{total_batches}: {len(batch)} records upserted")
-
+            records_processed = writers[method](cur, chunks)
         conn.commit()
-        return records_processed
     except psycopg2.Error as e:
         conn.rollback()
         print(f"Error storing metadata: {e}")
         raise
 
+    elapsed = time.time() - start_time
+    rate = records_processed / elapsed if elapsed > 0 else float("inf")
+    print(f"  Stored {records_processed} records in {elapsed:.2f}s ({rate:,.0f} rows/sec, method={method})")
+
+    return records_processed
+
 
 def verify_count(conn: psycopg2.extensions.connection) -> int:
     """Return total count of records in documents table."""
@@ -243,6 +421,12 @@ def main() -> None:
         metavar="PATH",
         help="Filter chunks by source_path"
     )
+    parser.add_argument(
+        "--method",
+        choices=STORE_METHODS,
+        default=DEFAULT_STORE_METHOD,
+        help=f"Write strategy for storing metadata (default: {DEFAULT_STORE_METHOD})"
+    )
 
     args = parser.parse_args()
 
@@ -291,7 +475,7 @@ def main() -> None:
     print()
 
     print("Storing metadata...")
-    records = store_metadata(conn, chunks)
+    records = store_metadata(conn, chunks, method=args.method)
     print()
 
     print("Verifying...")
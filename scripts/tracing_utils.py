@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Request Tracing for the RAG API
+
+This module provides lightweight OpenTelemetry-style tracing without a
+collector: spans nest through a contextvar, every request gets a root span
+(continuing an incoming W3C traceparent header when present), and finished
+traces go to a local exporter.
+
+- TRACE_EXPORTER=console logs one indented latency breakdown per trace
+- TRACE_EXPORTER=jsonl appends one JSON object per span to TRACE_FILE
+- TRACE_EXPORTER=none (default) keeps trace IDs in logs but exports nothing
+
+Log records carry trace_id and span_id attributes (see
+install_log_correlation), so log lines from one request can be grouped.
+
+Usage:
+    from scripts.tracing_utils import span
+
+    with span("qdrant.scroll", collection="book_vectors") as s:
+        points = qdrant_client.scroll(...)
+        s.set_attribute("points", len(points))
+
+    python -m scripts.tracing_utils traces.jsonl   # summarize a JSONL trace file
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_HEADER = "X-Trace-Id"
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+NO_TRACE = "-"
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], root: Optional["Span"]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.root = root or self
+        self.attributes: Dict[str, Any] = {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        # Finished spans of the whole trace, collected on the root
+        self.finished: List["Span"] = []
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        self.root.finished.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+# =============================================================================
+# Exporters
+# =============================================================================
+
+class ConsoleExporter:
+    """Log each finished trace as an indented span tree with durations."""
+
+    def export(self, spans: List[Span]) -> None:
+        children: Dict[Optional[str], List[Span]] = {}
+        for s in spans:
+            children.setdefault(s.parent_id, []).append(s)
+        for siblings in children.values():
+            siblings.sort(key=lambda s: s.start_time)
+
+        lines = []
+
+        def walk(parent_id: Optional[str], depth: int) -> None:
+            for s in children.get(parent_id, []):
+                attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+                flag = f" ERROR {s.error}" if s.status == "error" else ""
+                lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.1f}ms {attrs}{flag}".rstrip())
+                walk(s.span_id, depth + 1)
+
+        root = spans[-1]  # The root ends last
+        walk(root.parent_id, 0)
+        logger.info(f"Trace {root.trace_id}:\n" + "\n".join(lines))
+
+
+class JsonlExporter:
+    """Append one JSON object per span to a file."""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        payload = "".join(json.dumps(s.to_dict()) + "\n" for s in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(payload)
+
+
+def create_exporter(kind: str = TRACE_EXPORTER):
+    """Build the configured exporter (None disables export)."""
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "jsonl":
+        return JsonlExporter(TRACE_FILE)
+    if kind != "none":
+        logger.warning(f"Unknown TRACE_EXPORTER {kind!r}; traces will not be exported")
+    return None
+
+
+exporter = create_exporter()
+
+
+def set_exporter(new_exporter) -> None:
+    """Replace the exporter (None disables export)."""
+    global exporter
+    exporter = new_exporter
+
+
+# =============================================================================
+# Spans
+# =============================================================================
+
+@contextmanager
+def span(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    **attributes: Any
+) -> Iterator[Span]:
+    """
+    Run a block inside a span.
+
+    Nests under the current span; with no current span it starts a new
+    trace (continuing trace_id/parent_id when given). The trace is exported
+    when its root span ends.
+    """
+    parent = current_span.get()
+    if parent is not None:
+        s = Span(name, parent.trace_id, parent.span_id, parent.root)
+    else:
+        s = Span(name, trace_id or secrets.token_hex(16), parent_id, None)
+    s.attributes.update(attributes)
+
+    token = current_span.set(s)
+    error: Optional[BaseException] = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        current_span.reset(token)
+        s.end(error)
+        if s.root is s and exporter is not None:
+            try:
+                exporter.export(s.finished)
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the active span, if any."""
+    s = current_span.get()
+    return s.trace_id if s else None
+
+
+def parse_traceparent(header: Optional[str]) -> tuple:
+    """Return (trace_id, parent_span_id) from a W3C traceparent header, or (None, None)."""
+    match = TRACEPARENT_PATTERN.match((header or "").strip().lower())
+    return (match.group(1), match.group(2)) if match else (None, None)
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Wrap each request in a root span and return its trace ID in a header."""
+
+    async def dispatch(self, request: Request, call_next):
+        from .metrics_utils import route_template
+
+        trace_id, parent_id = parse_traceparent(request.headers.get("traceparent"))
+        name = f"{request.method} {route_template(request)}"
+        with span(name, trace_id=trace_id, parent_id=parent_id) as root:
+            response = await call_next(request)
+            root.set_attribute("status", response.status_code)
+            if response.status_code >= 500:
+                root.status = "error"
+            response.headers[TRACE_HEADER] = root.trace_id
+            return response
+
+
+# =============================================================================
+# Log Correlation
+# =============================================================================
+
+def install_log_correlation() -> None:
+    """Give every log record trace_id and span_id attributes ("-" outside a trace)."""
+    base_factory = logging.getLogRecordFactory()
+    if getattr(base_factory, "_adds_trace_ids", False):
+        return
+
+    def factory(*args, **kwargs):
+        record = base_factory(*args, **kwargs)
+        s = current_span.get()
+        record.trace_id = s.trace_id if s else NO_TRACE
+        record.span_id = s.span_id if s else NO_TRACE
+        return record
+
+    factory._adds_trace_ids = True
+    logging.setLogRecordFactory(factory)
+
+
+# =============================================================================
+# Offline Summary
+# =============================================================================
+
+def summarize(path: str) -> None:
+    """Print per-span-name latency totals from a JSONL trace file."""
+    totals: Dict[str, List[float]] = {}
+    traces = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            traces.add(record["trace_id"])
+            totals.setdefault(record["name"], []).append(record["duration_ms"])
+
+    print(f"{len(traces)} traces from {path}")
+    print(f"{'span':<40} {'count':>6} {'avg ms':>10} {'max ms':>10}")
+    for name, durations in sorted(totals.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:<40} {len(durations):>6} {sum(durations) / len(durations):>10.1f} {max(durations):>10.1f}")
+
+
+if __name__ == "__main__":
+    summarize(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE)
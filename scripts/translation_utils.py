@@ -14,10 +14,14 @@ Usage:
 import logging
 import time
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 
-from openai import OpenAI
-from qdrant_client import QdrantClient
+if TYPE_CHECKING:  # Type hints only: importing the SDKs is left to whoever builds the clients
+    from openai import OpenAI
+    from qdrant_client import QdrantClient
+
+from .content_cache_utils import prompt_version
+from .metrics_utils import record_tokens, track_stage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -67,9 +71,14 @@ English: {title}
 
 Urdu translation (just the translated title, no explanation):"""
 
+# Bump PROMPT_REVISION for changes the templates do not show (temperature,
+# post-processing); either change invalidates cached translations
+PROMPT_REVISION = 1
+PROMPT_VERSION = prompt_version(OPENAI_MODEL, TRANSLATION_PROMPT, TITLE_TRANSLATION_PROMPT, PROMPT_REVISION)
+
 
 def get_chapter_content_from_qdrant(
-    qdrant_client: QdrantClient,
+    qdrant_client: "QdrantClient",
     chapter_slug: str
 ) -> Optional[Dict[str, Any]]:
     """
@@ -156,7 +165,7 @@ def get_chapter_content_from_qdrant(
         return None
 
 
-def translate_title(openai_client: OpenAI, title: str) -> str:
+def translate_title(openai_client: "OpenAI", title: str) -> str:
     """
     Translate chapter title to Urdu.
 
@@ -168,14 +177,16 @@ def translate_title(openai_client: OpenAI, title: str) -> str:
         Urdu translated title
     """
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "user", "content": TITLE_TRANSLATION_PROMPT.format(title=title)}
-            ],
-            temperature=0.3,
-            max_tokens=200
-        )
+        with track_stage("llm", model=OPENAI_MODEL, purpose="title"):
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "user", "content": TITLE_TRANSLATION_PROMPT.format(title=title)}
+                ],
+                temperature=0.3,
+                max_tokens=200
+            )
+        record_tokens(response.usage.total_tokens if response.usage else 0)
         return response.choices[0].message.content.strip()
     except Exception as e:
         logger.error(f"Title translation failed: {e}")
@@ -184,10 +195,11 @@ def translate_title(openai_client: OpenAI, title: str) -> str:
 
 
 def translate_chapter_content(
-    openai_client: OpenAI,
-    qdrant_client: QdrantClient,
+    openai_client: "OpenAI",
+    qdrant_client: "QdrantClient",
     chapter_id: str,
-    user_id: str
+    user_id: str,
+    chapter_data: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Translate chapter content from English to Urdu.
@@ -196,7 +208,9 @@ def translate_chapter_content(
         openai_client: Initialized OpenAI client
         qdrant_client: Initialized Qdrant client
         chapter_id: Chapter identifier
-        user_id: User ID (for logging/future caching)
+        user_id: User ID (for logging)
+        chapter_data: Chapter already loaded (e.g. from the chapter index);
+            fetched from Qdrant when None
 
     Returns:
         Dict with translated content, titles, and metadata
@@ -212,7 +226,9 @@ def translate_chapter_content(
         raise ValueError(f"Invalid chapter_id: must be one of {', '.join(VALID_CHAPTER_SLUGS)}")
 
     # Fetch chapter content from Qdrant
-    chapter_data = get_chapter_content_from_qdrant(qdrant_client, chapter_id)
+    if chapter_data is None:
+        with track_stage("chapter_fetch", chapter=chapter_id):
+            chapter_data = get_chapter_content_from_qdrant(qdrant_client, chapter_id)
     if not chapter_data:
         raise ValueError(f"Chapter content not found for id: {chapter_id}")
 
@@ -235,17 +251,19 @@ def translate_chapter_content(
 
     # Call OpenAI for translation
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,  # Lower temperature for more consistent translations
-            max_tokens=4000
-        )
+        with track_stage("llm", model=OPENAI_MODEL, purpose="translate"):
+            response = openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,  # Lower temperature for more consistent translations
+                max_tokens=4000
+            )
 
         translated_content = response.choices[0].message.content
         tokens_used = response.usage.total_tokens if response.usage else 0
+        record_tokens(tokens_used)
 
     except Exception as e:
         logger.error(f"OpenAI translation failed: {e}")
@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Pre-generate Personalized Chapters into the Content Cache
+
+The personalization space is finite: 7 chapters x 3 programming levels x
+3 hardware backgrounds x 15 non-empty learning-goal sets (945 variants).
+This script generates every variant (or, with --top N, the N most common
+profiles in the users table, for every chapter) and stores the results in
+the generated_content table the API reads, so first views are cache hits.
+
+Two ways to generate:
+- live (default): chat completions on a thread pool, limited to --rpm
+  requests per minute, with retries on rate limits and timeouts
+- Batch API (about half the cost, results within 24h):
+  --batch-file writes the requests as Batch API JSONL, --submit uploads
+  it and creates the batch, --collect stores the finished results
+
+Runs resume: variants whose cache key is already stored are skipped, so
+an interrupted run (or a chapter/prompt change, which changes the keys)
+only generates what is missing. --mock swaps OpenAI for a local stand-in
+(including the Batch API) and --store-file writes to a JSONL file instead
+of Postgres, so the job can be tested without credentials.
+
+Usage:
+    python scripts/warm-personalization.py --dry-run
+    python scripts/warm-personalization.py --concurrency 4 --rpm 120
+    python scripts/warm-personalization.py --top 20
+    python scripts/warm-personalization.py --batch-file data/warm-batch.jsonl --submit
+    python scripts/warm-personalization.py --batch-file data/warm-batch.jsonl --collect
+    python scripts/warm-personalization.py --mock --store-file /tmp/warm.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+from dotenv import load_dotenv
+from openai import APIConnectionError, APITimeoutError, InternalServerError, OpenAI, RateLimitError
+from qdrant_client import QdrantClient
+
+# The shared utilities use package-relative imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.content_cache_utils import PostgresContentStore, cache_key, fetch_chapters  # noqa: E402
+from scripts.personalization_utils import (  # noqa: E402
+    HARDWARE_BACKGROUNDS,
+    LEARNING_GOALS,
+    PROGRAMMING_LEVELS,
+    PROMPT_VERSION,
+    VALID_CHAPTER_SLUGS,
+    build_profile_summary,
+    parse_profile_variant,
+    personalization_request,
+    profile_variant,
+)
+
+
+# Constants
+COLLECTION_NAME = "book_vectors"
+KIND = "personalize"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPM = 60
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 2.0
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def load_env(need_qdrant: bool, need_database: bool, need_openai: bool) -> None:
+    """Load environment variables from .env file (if present) and check what this run needs."""
+    env_path = Path(__file__).parent.parent / ".env"
+    if env_path.exists():
+        load_dotenv(env_path)
+
+    required_vars = ["QDRANT_URL", "QDRANT_API_KEY"] if need_qdrant else []
+    if need_database:
+        required_vars.append("DATABASE_URL")
+    if need_openai:
+        required_vars.append("OPENAI_API_KEY")
+    missing = [v for v in required_vars if not os.getenv(v)]
+    if missing:
+        print(f"Error: Missing environment variables: {', '.join(missing)}")
+        sys.exit(1)
+
+
+# =============================================================================
+# Variants
+# =============================================================================
+
+def all_profiles() -> List[Tuple[str, str, List[str]]]:
+    """Every (level, hardware, goals) combination with at least one goal."""
+    goal_sets = [
+        list(goals)
+        for size in range(1, len(LEARNING_GOALS) + 1)
+        for goals in itertools.combinations(LEARNING_GOALS, size)
+    ]
+    return [
+        (level, hardware, goals)
+        for level in PROGRAMMING_LEVELS
+        for hardware in HARDWARE_BACKGROUNDS
+        for goals in goal_sets
+    ]
+
+
+def top_profiles(conn, top: int) -> List[Tuple[str, str, List[str]]]:
+    """The top most common complete profiles in the users table, most common first."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT programming_level, hardware_background, learning_goals
+            FROM users
+            WHERE programming_level IS NOT NULL
+              AND hardware_background IS NOT NULL
+              AND cardinality(learning_goals) > 0
+        """)
+        rows = cur.fetchall()
+
+    counts: Counter = Counter()
+    for level, hardware, goals in rows:
+        goals = [g for g in goals if g in LEARNING_GOALS]
+        if goals:
+            counts[profile_variant(level, hardware, goals)] += 1
+    print(f"  {len(rows)} users with a complete profile, {len(counts)} distinct profiles")
+    return [parse_profile_variant(variant) for variant, _ in counts.most_common(top)]
+
+
+def plan_variants(chapters: Dict[str, Dict[str, Any]], profiles) -> List[Dict[str, Any]]:
+    """One work item per (chapter, profile), keyed like the API's content cache."""
+    items = []
+    for slug in VALID_CHAPTER_SLUGS:
+        chapter = chapters.get(slug)
+        if chapter is None:
+            print(f"  Warning: no content for {slug} in Qdrant, skipping")
+            continue
+        for level, hardware, goals in profiles:
+            variant = profile_variant(level, hardware, goals)
+            items.append({
+                "key": cache_key(KIND, slug, variant, chapter["content_hash"], PROMPT_VERSION),
+                "chapter_slug": slug,
+                "original_title": chapter["title"],
+                "programming_level": level,
+                "hardware_background": hardware,
+                "learning_goals": sorted(set(goals)),
+            })
+    return items
+
+
+def result_body(item: Dict[str, Any], content: str, tokens_used: int, processing_time_ms: int) -> Dict[str, Any]:
+    """Cached body in the API's PersonalizeResponse shape."""
+    return {
+        "chapter_slug": item["chapter_slug"],
+        "original_title": item["original_title"],
+        "personalized_content": content,
+        "metadata": {
+            "processing_time_ms": processing_time_ms,
+            "tokens_used": tokens_used,
+            "profile_summary": build_profile_summary(
+                item["programming_level"],
+                item["hardware_background"],
+                item["learning_goals"]
+            ),
+        },
+    }
+
+
+# =============================================================================
+# Stores
+# =============================================================================
+
+class JsonlContentStore:
+    """Local stand-in for PostgresContentStore: one {"key", "body"} object per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._bodies: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._bodies[record["key"]] = record["body"]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._bodies.get(key)
+
+    def put(self, key: str, body: Dict[str, Any]) -> None:
+        with self._lock:
+            self._bodies[key] = body
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "body": body}, ensure_ascii=False) + "\n")
+
+    def keys(self, kind: str) -> List[str]:
+        return [key for key in self._bodies if key.startswith(f"{kind}:")]
+
+
+# =============================================================================
+# Live generation
+# =============================================================================
+
+class RateLimiter:
+    """Spaces out request starts to at most rpm per minute across threads."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def generate_one(client, item: Dict[str, Any], chapter_content: str, limiter: RateLimiter) -> Dict[str, Any]:
+    """Generate one variant, retrying rate limits and transient errors with backoff."""
+    request = personalization_request(
+        chapter_content,
+        item["programming_level"],
+        item["hardware_background"],
+        item["learning_goals"]
+    )
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        limiter.acquire()
+        start_time = time.time()
+        try:
+            response = client.chat.completions.create(**request)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+            print(f"  {type(e).__name__} on {item['key']} (attempt {attempt}), retrying in {delay:.0f}s")
+            time.sleep(delay)
+            continue
+        tokens_used = response.usage.total_tokens if response.usage else 0
+        return result_body(item, response.choices[0].message.content, tokens_used,
+                           int((time.time() - start_time) * 1000))
+
+
+def run_live(client, store, items, chapters, concurrency: int, rpm: float) -> Tuple[int, int]:
+    """Generate items concurrently and store each result as it finishes; returns (done, failed)."""
+    limiter = RateLimiter(rpm)
+    done = failed = tokens = 0
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(generate_one, client, item, chapters[item["chapter_slug"]]["content"], limiter): item
+            for item in items
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                body = future.result()
+                store.put(item["key"], body)
+            except Exception as e:
+                failed += 1
+                print(f"  Failed {item['key']}: {e}")
+                continue
+            done += 1
+            tokens += body["metadata"]["tokens_used"]
+            if done % 10 == 0 or done == len(items):
+                elapsed = time.time() - start_time
+                print(f"  {done}/{len(items)} stored ({tokens:,} tokens, {done / elapsed * 60:.1f}/min)")
+    return done, failed
+
+
+# =============================================================================
+# Batch API
+# =============================================================================
+
+def write_batch_file(path: Path, items, chapters) -> None:
+    """Write the Batch API input JSONL and a state file with each request's variant."""
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            body = personalization_request(
+                chapters[item["chapter_slug"]]["content"],
+                item["programming_level"],
+                item["hardware_background"],
+                item["learning_goals"]
+            )
+            f.write(json.dumps({"custom_id": item["key"], "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                               ensure_ascii=False) + "\n")
+    save_state(path, {"items": {item["key"]: item for item in items}})
+    print(f"  Wrote {len(items)} requests to {path}")
+
+
+def state_path(batch_file: Path) -> Path:
+    return batch_file.with_name(batch_file.name + ".state.json")
+
+
+def load_state(batch_file: Path) -> Dict[str, Any]:
+    path = state_path(batch_file)
+    if not path.exists():
+        print(f"Error: {path} not found; write the batch file first (--batch-file without --collect)")
+        sys.exit(1)
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_state(batch_file: Path, state: Dict[str, Any]) -> None:
+    state_path(batch_file).write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def submit_batch(client, batch_file: Path) -> None:
+    """Upload the input file and create the batch; the batch id goes into the state file."""
+    state = load_state(batch_file)
+    with open(batch_file, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+    state.update({"batch_id": batch.id, "input_file_id": uploaded.id, "submitted_at": time.time()})
+    save_state(batch_file, state)
+    print(f"  Submitted batch {batch.id} ({len(state['items'])} requests); run --collect later")
+
+
+def collect_batch(client, store, batch_file: Path) -> Tuple[int, int]:
+    """Store the results of a finished batch; returns (stored, failed)."""
+    state = load_state(batch_file)
+    if "batch_id" not in state:
+        print("Error: batch not submitted yet (use --submit)")
+        sys.exit(1)
+    batch = client.batches.retrieve(state["batch_id"])
+    counts = batch.request_counts
+    print(f"  Batch {batch.id}: {batch.status} ({counts.completed}/{counts.total} completed, {counts.failed} failed)")
+    if batch.status != "completed" or not batch.output_file_id:
+        return 0, 0
+
+    stored = failed = 0
+    output = client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        item = state["items"].get(record["custom_id"])
+        response = record.get("response") or {}
+        if item is None or record.get("error") or response.get("status_code") != 200:
+            failed += 1
+            print(f"  Failed {record['custom_id']}: {record.get('error') or response.get('status_code')}")
+            continue
+        body = response["body"]
+        tokens_used = (body.get("usage") or {}).get("total_tokens", 0)
+        store.put(item["key"], result_body(item, body["choices"][0]["message"]["content"], tokens_used, 0))
+        stored += 1
+    return stored, failed
+
+
+# =============================================================================
+# Local mock of the OpenAI API
+# =============================================================================
+
+class MockOpenAI:
+    """
+    Offline stand-in for the OpenAI client parts this job uses.
+
+    Chat completions return a short deterministic text. Batches run at
+    creation time and keep their files under state_dir, so --submit and
+    --collect work across runs.
+    """
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = state_dir
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = body["messages"][-1]["content"]
+        content = f"[mock personalization]\n\n{prompt[-400:]}"
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def _complete(self, **body):
+        completion = self._completion(body)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=completion["choices"][0]["message"]["content"]))],
+            usage=SimpleNamespace(total_tokens=completion["usage"]["total_tokens"])
+        )
+
+    def _create_file(self, file, purpose: str):
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        (self.state_dir / file_id).write_bytes(file.read())
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id: str):
+        return SimpleNamespace(text=(self.state_dir / file_id).read_text(encoding="utf-8"))
+
+    def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str):
+        lines = []
+        for line in self._file_content(input_file_id).text.splitlines():
+            request = json.loads(line)
+            lines.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": self._completion(request["body"])},
+                "error": None,
+            }, ensure_ascii=False))
+        output_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        (self.state_dir / output_id).write_text("\n".join(lines) + "\n", encoding="utf-8")
+        batch = {"id": f"batch_mock_{uuid.uuid4().hex[:12]}", "status": "completed",
+                 "output_file_id": output_id, "total": len(lines)}
+        (self.state_dir / f"{batch['id']}.json").write_text(json.dumps(batch), encoding="utf-8")
+        return self._retrieve_batch(batch["id"])
+
+    def _retrieve_batch(self, batch_id: str):
+        batch = json.loads((self.state_dir / f"{batch_id}.json").read_text(encoding="utf-8"))
+        return SimpleNamespace(
+            id=batch["id"],
+            status=batch["status"],
+            output_file_id=batch["output_file_id"],
+            request_counts=SimpleNamespace(total=batch["total"], completed=batch["total"], failed=0)
+        )
+
+
+def main() -> None:
+    """Plan the variants, skip stored ones and generate the rest."""
+    parser = argparse.ArgumentParser(
+        description="Pre-generate personalized chapters into the API's content cache"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=0,
+        help="Only the N most common profiles in the users table (default: every profile)"
+    )
+    parser.add_argument(
+        "--chapters",
+        nargs="+",
+        choices=VALID_CHAPTER_SLUGS,
+        help="Only these chapters (default: all)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Parallel live requests (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=DEFAULT_RPM,
+        help=f"Live requests per minute across all workers (default: {DEFAULT_RPM})"
+    )
+    parser.add_argument(
+        "--batch-file",
+        type=Path,
+        help="Write the missing variants as Batch API JSONL here instead of calling the API live"
+    )
+    parser.add_argument(
+        "--submit",
+        action="store_true",
+        help="With --batch-file: write it, upload it and create the batch"
+    )
+    parser.add_argument(
+        "--collect",
+        action="store_true",
+        help="With --batch-file: store the results of the batch submitted from it"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Regenerate variants that are already stored"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many variants are planned, stored and missing"
+    )
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Use a local mock instead of the OpenAI API (no credentials or cost)"
+    )
+    parser.add_argument(
+        "--store-file",
+        type=Path,
+        help="Store results in this JSONL file instead of Postgres (for testing)"
+    )
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Personalization Cache Warm-up")
+    print("=" * 50)
+    print()
+
+    print("Loading environment...")
+    load_env(
+        need_qdrant=not args.collect,
+        need_database=args.store_file is None or args.top > 0,
+        need_openai=not args.mock and not args.dry_run
+    )
+    conn = psycopg2.connect(os.getenv("DATABASE_URL"), connect_timeout=10) if os.getenv("DATABASE_URL") else None
+    if args.store_file:
+        store = JsonlContentStore(args.store_file)
+    else:
+        store = PostgresContentStore(lambda: conn)
+        store.create_schema()
+    if args.mock:
+        client = MockOpenAI((args.batch_file or args.store_file or Path("data/warm-mock")).with_suffix(".mock"))
+    else:
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None)
+    print()
+
+    if (args.submit or args.collect) and not args.batch_file:
+        print("Error: --submit and --collect need --batch-file")
+        sys.exit(1)
+    if args.collect:
+        print("Collecting batch results...")
+        stored, failed = collect_batch(client, store, args.batch_file)
+        print(f"  Stored {stored} variants, {failed} failed")
+        return
+
+    print("Loading chapters from Qdrant...")
+    qdrant = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY"), timeout=60)
+    chapters = fetch_chapters(qdrant, COLLECTION_NAME, args.chapters or VALID_CHAPTER_SLUGS)
+    print(f"  {len(chapters)} chapters, prompt version {PROMPT_VERSION}")
+
+    if args.top:
+        print(f"Reading the {args.top} most common profiles from the users table...")
+        profiles = top_profiles(conn, args.top)
+    else:
+        profiles = all_profiles()
+    items = plan_variants(chapters, profiles)
+    stored_keys = set() if args.force else set(store.keys(KIND))
+    missing = [item for item in items if item["key"] not in stored_keys]
+    print(f"  {len(items)} variants planned, {len(items) - len(missing)} already stored, {len(missing)} to generate")
+    print()
+
+    if args.dry_run or not missing:
+        return
+
+    if args.batch_file:
+        print("Writing Batch API input...")
+        write_batch_file(args.batch_file, missing, chapters)
+        if args.submit:
+            print("Submitting batch...")
+            submit_batch(client, args.batch_file)
+        return
+
+    print(f"Generating {len(missing)} variants ({args.concurrency} workers, {args.rpm:g} requests/min)...")
+    start_time = time.time()
+    done, failed = run_live(client, store, missing, chapters, args.concurrency, args.rpm)
+    print()
+    print(f"Stored {done} variants in {time.time() - start_time:.1f}s, {failed} failed"
+          + (" (rerun to retry them)" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
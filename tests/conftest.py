@@ -0,0 +1,14 @@
+"""
+Shared setup for the unit tests.
+
+The tests import the API's helper modules as the scripts package, so the
+repository root goes on sys.path (as in benchmarks/common.py).
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
@@ -0,0 +1,113 @@
+"""Unit tests for scripts/content_cache_utils.py."""
+
+import pytest
+
+from scripts.content_cache_utils import ChapterIndex, ContentCache, etag_for, etag_matches
+
+ETAG = etag_for({"chapter_id": "intro", "translated_content": "روبوٹ"})
+
+
+# =============================================================================
+# If-None-Match
+# =============================================================================
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    f"W/{ETAG}",
+    f" {ETAG} ",
+    f'"other", {ETAG}',
+    f'W/"other",W/{ETAG}',
+    ETAG[:-1] + '-br"',  # As sent back after CompressionMiddleware
+    ETAG[:-1] + '-gzip"',
+    f"W/{ETAG[:-1]}-gzip\"",
+    "*",
+    " * ",
+])
+def test_etag_matches(header):
+    assert etag_matches(header, ETAG)
+
+
+@pytest.mark.parametrize("header", [
+    None,
+    "",
+    '"other"',
+    ETAG[1:-1],  # Unquoted
+    ETAG[:-1] + '-deflate"',
+    ETAG[:-1] + '-br-gzip"',
+    '"x", W/"y"',
+    f"*, {ETAG[:-2]}\"",  # * only matches on its own
+])
+def test_etag_does_not_match(header):
+    assert not etag_matches(header, ETAG)
+
+
+def test_etags_differ_by_body():
+    # Two generations for the same cache key (sampled at temperature 0.7)
+    assert etag_for({"content": "a"}) != etag_for({"content": "b"})
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+
+
+def test_etag_ignores_key_order():
+    # JSONB does not keep key order, so a body read back from Postgres must keep its ETag
+    assert etag_for({"a": 1, "b": [1, 2]}) == etag_for({"b": [1, 2], "a": 1})
+
+
+# =============================================================================
+# Content cache
+# =============================================================================
+
+class DictStore:
+    """In-memory stand-in for PostgresContentStore that reorders keys as JSONB does."""
+
+    def __init__(self):
+        self.bodies = {}
+
+    def get(self, key):
+        body = self.bodies.get(key)
+        return dict(sorted(body.items())) if body is not None else None
+
+    def put(self, key, body):
+        self.bodies[key] = body
+
+
+def test_cache_entry_keeps_the_etag_of_its_body():
+    cache = ContentCache(max_entries=1, store=DictStore())
+    body = {"translated_content": "روبوٹ", "chapter_id": "intro"}
+
+    etag = cache.put("translate:intro:ur:h1:v1", body)
+    assert etag == etag_for(body)
+    assert cache.get_entry("translate:intro:ur:h1:v1") == (body, etag)
+
+    cache.put("translate:other:ur:h1:v1", {"chapter_id": "other"})  # Evicts the first entry
+    assert cache.get_entry("translate:intro:ur:h1:v1")[1] == etag  # Read back from the store
+    assert cache.stats()["store_hits"] == 1
+
+
+def test_cache_miss():
+    cache = ContentCache()
+    assert cache.get_entry("missing") is None
+    assert cache.get("missing") is None
+    assert cache.stats()["misses"] == 2
+
+
+# =============================================================================
+# Chapter index
+# =============================================================================
+
+def test_chapter_index_expire_reloads_on_next_get():
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"intro": {"title": "Intro", "content": "v2", "chunk_count": 1, "content_hash": "h2"}}
+
+    index = ChapterIndex(load, ttl=3600, initial={
+        "intro": {"title": "Intro", "content": "v1", "chunk_count": 1, "content_hash": "h1"}
+    })
+    assert index.get("intro")["content"] == "v1"
+    assert loads == []
+
+    index.expire()
+    assert index.get("intro")["content"] == "v2"
+    assert index.get("intro")["content"] == "v2"
+    assert loads == [1]
@@ -0,0 +1,128 @@
+"""Unit tests for scripts/context_utils.py."""
+
+import pytest
+
+from scripts import context_utils
+from scripts.context_utils import format_passage, mmr_select, pack_context
+
+MODEL = "gpt-4o-mini"
+
+
+@pytest.fixture(autouse=True)
+def character_token_counts(monkeypatch):
+    """Count tokens as ceil(characters / 4) so budgets are exact and no tokenizer download is needed."""
+    monkeypatch.setattr(context_utils, "get_encoder", lambda model: None)
+
+
+def tokens(text: str) -> int:
+    return context_utils.count_tokens(text, MODEL)
+
+
+def passage(chunk_id, snippet, score):
+    return {"chunk_id": chunk_id, "snippet": snippet, "title": "Balance", "slug": "locomotion", "score": score}
+
+
+# =============================================================================
+# MMR
+# =============================================================================
+
+def test_mmr_skips_duplicate_vectors():
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.1], [1.0, 0.1], [1.0, 0.1], [0.6, 0.8]]
+
+    # Second pick: a duplicate scores 0.3 * 0.995 - 0.7 * 1.0 = -0.40,
+    # the distinct vector 0.3 * 0.6 - 0.7 * 0.68 = -0.29
+    assert mmr_select(query, candidates, top_k=2, lambda_mult=0.3) == [0, 3]
+    # With most weight on relevance the duplicate still wins
+    assert mmr_select(query, candidates, top_k=2, lambda_mult=0.9) == [0, 1]
+
+
+def test_mmr_selects_each_duplicate_at_most_once():
+    selected = mmr_select([1.0, 0.0], [[1.0, 0.0]] * 3, top_k=3)
+    assert sorted(selected) == [0, 1, 2]
+
+
+def test_mmr_pure_relevance_keeps_similarity_order():
+    candidates = [[0.0, 1.0], [1.0, 0.2], [1.0, 0.0], [1.0, 0.5]]
+    assert mmr_select([1.0, 0.0], candidates, top_k=4, lambda_mult=1.0) == [2, 1, 3, 0]
+
+
+def test_mmr_uses_given_relevance():
+    candidates = [[1.0, 0.0], [0.0, 1.0]]
+    assert mmr_select([1.0, 0.0], candidates, top_k=1, relevance=[0.1, 0.9]) == [1]
+
+
+def test_mmr_edge_cases():
+    assert mmr_select([1.0, 0.0], [], top_k=3) == []
+    assert mmr_select([1.0, 0.0], [[1.0, 0.0]], top_k=0) == []
+    assert mmr_select([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], top_k=5) == [0, 1]
+
+
+# =============================================================================
+# Context packing
+# =============================================================================
+
+def test_pack_context_fits_exactly_at_budget():
+    results = [passage("a", "x" * 200, 0.9), passage("b", "y" * 200, 0.8)]
+    budget = tokens(format_passage(1, results[0])) + tokens(context_utils.PASSAGE_SEPARATOR) \
+        + tokens(format_passage(2, results[1]))
+
+    packed, used = pack_context(results, budget, MODEL)
+    assert [r["chunk_id"] for r in packed] == ["a", "b"]
+    assert used == budget
+    assert not any(r.get("trimmed") for r in packed)
+
+
+def test_pack_context_one_token_short_drops_what_cannot_be_trimmed():
+    results = [passage("a", "x" * 200, 0.9), passage("b", "y" * 200, 0.8)]  # No sentence boundaries
+    budget = tokens(format_passage(1, results[0])) + tokens(context_utils.PASSAGE_SEPARATOR) \
+        + tokens(format_passage(2, results[1])) - 1
+
+    packed, used = pack_context(results, budget, MODEL)
+    assert [r["chunk_id"] for r in packed] == ["a"]
+    assert used == tokens(format_passage(1, results[0]))
+
+
+def test_pack_context_takes_passages_in_score_order():
+    results = [passage("low", "x" * 80, 0.2), passage("high", "y" * 80, 0.9)]
+    packed, _ = pack_context(results, 10_000, MODEL)
+    assert [r["chunk_id"] for r in packed] == ["high", "low"]
+
+
+def test_pack_context_trims_to_whole_sentences():
+    sentences = [f"Sentence {i} is about the zero moment point and balance." for i in range(20)]
+    first = passage("a", "x" * 100, 0.9)
+    second = passage("b", " ".join(sentences), 0.8)
+    budget = tokens(format_passage(1, first)) + 150
+
+    packed, used = pack_context([first, second], budget, MODEL, min_trimmed_tokens=10)
+
+    assert [r["chunk_id"] for r in packed] == ["a", "b"]
+    trimmed = packed[1]
+    assert trimmed["trimmed"] is True
+    assert trimmed["snippet"].endswith(".")
+    assert second["snippet"].startswith(trimmed["snippet"])
+    assert len(trimmed["snippet"]) < len(second["snippet"])
+    assert used <= budget
+    assert "trimmed" not in second  # The input dict is left alone
+
+
+def test_pack_context_skips_too_short_trim_and_keeps_smaller_passages():
+    long_text = " ".join(f"Sentence number {i} about walking robots." for i in range(30))
+    results = [
+        passage("first", "x" * 100, 0.9),
+        passage("long", long_text, 0.8),
+        passage("short", "Short.", 0.1),
+    ]
+    # Room for the first passage and the short one, but under min_trimmed_tokens for the long one
+    budget = tokens(format_passage(1, results[0])) + 2 * tokens(context_utils.PASSAGE_SEPARATOR) \
+        + tokens(format_passage(2, results[2])) + 5
+
+    packed, used = pack_context(results, budget, MODEL, min_trimmed_tokens=32)
+    assert [r["chunk_id"] for r in packed] == ["first", "short"]
+    assert used <= budget
+
+
+def test_pack_context_empty_and_zero_budget():
+    assert pack_context([], 1000, MODEL) == ([], 0)
+    assert pack_context([passage("a", "text.", 1.0)], 0, MODEL) == ([], 0)
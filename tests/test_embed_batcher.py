@@ -0,0 +1,223 @@
+"""Unit tests for scripts/embed_batcher.py."""
+
+import asyncio
+import threading
+
+import pytest
+
+from scripts.embed_batcher import EmbedBatcher
+from scripts.resilience_utils import CLOSED, OPEN, CircuitBreaker, Deadline
+
+
+class GatedEmbed:
+    """Blocking embed function whose calls wait for release(); records every batch of texts and its timeout."""
+
+    def __init__(self):
+        self.calls = []
+        self.timeouts = []
+        self.started = threading.Semaphore(0)
+        self._gate = threading.Event()
+
+    def __call__(self, texts, timeout=None):
+        self.calls.append(list(texts))
+        self.timeouts.append(timeout)
+        self.started.release()
+        self._gate.wait(5)
+        return [[float(len(text)), float(i)] for i, text in enumerate(texts)]
+
+    def release(self):
+        self._gate.set()
+
+    async def wait_started(self):
+        assert await asyncio.to_thread(self.started.acquire, True, 5)
+
+
+def test_idle_query_is_sent_immediately():
+    async def run():
+        embed = GatedEmbed()
+        embed.release()
+        batcher = EmbedBatcher(embed, window_ms=10_000)  # A wait for the window would time the test out
+        vector = await asyncio.wait_for(batcher.embed("zmp"), timeout=5)
+        return embed, batcher, vector
+
+    embed, batcher, vector = asyncio.run(run())
+    assert embed.calls == [["zmp"]]
+    assert vector == [3.0, 0.0]
+    assert batcher.stats()["upstream_calls"] == 1
+
+
+def test_queries_during_a_call_share_the_next_one():
+    async def run():
+        embed = GatedEmbed()
+        batcher = EmbedBatcher(embed, window_ms=10)
+        first = asyncio.create_task(batcher.embed("first"))
+        await embed.wait_started()
+        rest = [asyncio.create_task(batcher.embed(text)) for text in ("a", "bb", "a")]
+        await asyncio.sleep(0.05)  # Past the window while the first call is still in flight
+        embed.release()
+        return embed, batcher, await asyncio.wait_for(asyncio.gather(first, *rest), timeout=5)
+
+    embed, batcher, vectors = asyncio.run(run())
+    assert embed.calls == [["first"], ["a", "bb"]]  # Identical queries embedded once
+    assert vectors == [[5.0, 0.0], [1.0, 0.0], [2.0, 1.0], [1.0, 0.0]]
+    stats = batcher.stats()
+    assert stats["requests"] == 4
+    assert stats["upstream_calls"] == 2
+    assert stats["calls_saved"] == 2
+    assert stats["texts_sent"] == 3
+    assert stats["batch_size_histogram"] == {"1": 1, "3": 1}
+
+
+def test_full_batch_is_sent_without_waiting_for_the_window():
+    async def run():
+        embed = GatedEmbed()
+        batcher = EmbedBatcher(embed, max_batch_size=2, window_ms=10_000)
+        first = asyncio.create_task(batcher.embed("first"))
+        await embed.wait_started()
+        rest = [asyncio.create_task(batcher.embed(text)) for text in ("a", "b")]
+        await embed.wait_started()  # The second call started while the first is in flight
+        embed.release()
+        await asyncio.wait_for(asyncio.gather(first, *rest), timeout=5)
+        return embed
+
+    assert asyncio.run(run()).calls == [["first"], ["a", "b"]]
+
+
+def test_errors_reach_every_waiting_query():
+    def failing(texts, timeout=None):
+        raise ConnectionError("cohere down")
+
+    async def run():
+        batcher = EmbedBatcher(failing)
+        results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert batcher.stats()["errors"] >= 1
+    with pytest.raises(ConnectionError):
+        asyncio.run(EmbedBatcher(failing).embed("c"))
+
+
+def test_dispatch_tasks_are_held_until_done():
+    async def run():
+        embed = GatedEmbed()
+        batcher = EmbedBatcher(embed)
+        query = asyncio.create_task(batcher.embed("held"))
+        await embed.wait_started()
+        held = set(batcher._tasks)
+        embed.release()
+        await asyncio.wait_for(query, timeout=5)
+        await asyncio.sleep(0)  # Done callbacks run on the next loop iteration
+        return held, batcher
+
+    held, batcher = asyncio.run(run())
+    assert len(held) == 1
+    assert batcher._tasks == set()
+
+
+def test_batch_call_gets_the_longest_remaining_budget():
+    async def run():
+        embed = GatedEmbed()
+        batcher = EmbedBatcher(embed, window_ms=10)
+        first = asyncio.create_task(batcher.embed("first", timeout=5.0))
+        await embed.wait_started()
+        rest = [asyncio.create_task(batcher.embed(text, timeout)) for text, timeout in (("a", 1.0), ("b", 3.0))]
+        await embed.wait_started()
+        embed.release()
+        await asyncio.wait_for(asyncio.gather(first, *rest), timeout=5)
+        return embed
+
+    embed = asyncio.run(run())
+    assert embed.calls == [["first"], ["a", "b"]]
+    assert 4.9 < embed.timeouts[0] <= 5.0
+    assert 2.9 < embed.timeouts[1] <= 3.0
+
+
+def test_query_without_timeout_leaves_the_call_unbounded():
+    async def run():
+        embed = GatedEmbed()
+        embed.release()
+        batcher = EmbedBatcher(embed)
+        await batcher.embed("no deadline")
+        return embed
+
+    assert asyncio.run(run()).timeouts == [None]
+
+
+def test_abandoned_queries_are_not_sent():
+    async def run():
+        embed = GatedEmbed()
+        batcher = EmbedBatcher(embed, window_ms=50)
+        first = asyncio.create_task(batcher.embed("first", timeout=5.0))
+        await embed.wait_started()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(batcher.embed("gave up", timeout=0.01), 0.01)
+        kept = asyncio.create_task(batcher.embed("kept", timeout=5.0))
+        await embed.wait_started()
+        embed.release()
+        await asyncio.wait_for(asyncio.gather(first, kept), timeout=5)
+        return embed
+
+    assert asyncio.run(run()).calls == [["first"], ["kept"]]
+
+
+# =============================================================================
+# Circuit breaker behind the batcher
+# =============================================================================
+
+class ReadTimeout(Exception):
+    """Stands in for the SDK's timeout error."""
+
+
+def timing_out():
+    raise ReadTimeout("timed out")
+
+
+def run_timed_out_batch(*budgets_ms):
+    """
+    Send one query per budget (against a 20s default) as one batch behind a
+    call already in flight; the batch's upstream call times out. Returns the breaker.
+    """
+    breaker = CircuitBreaker("cohere", failure_threshold=1)
+    gate = threading.Event()
+    calls = []
+
+    def embed(texts, timeout):
+        calls.append(texts)
+        if len(calls) == 1:
+            gate.wait(5)
+            return [[0.0] for _ in texts]
+        return breaker.call(timing_out)
+
+    async def request(batcher, text, budget_ms):
+        deadline = Deadline.from_ms(budget_ms, default_ms=20000)
+        return await batcher.embed(text, deadline.timeout("embed"))
+
+    async def run():
+        batcher = EmbedBatcher(embed, window_ms=10)
+        warm = asyncio.create_task(request(batcher, "warm", 20000))
+        await asyncio.sleep(0.05)  # In flight: the next queries are batched
+        tasks = [asyncio.create_task(request(batcher, f"q{i}", budget)) for i, budget in enumerate(budgets_ms)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        gate.set()
+        await warm
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ReadTimeout) for r in results)
+    assert len(calls) == 2
+    return breaker
+
+
+def test_batched_upstream_timeout_opens_breaker():
+    # The capped query flushes the batch, but the call ran on the uncapped query's full budget
+    breaker = run_timed_out_batch(1000, 20000)
+    assert breaker.state == OPEN
+    assert breaker.stats()["caller_timeouts"] == 0
+
+
+def test_batched_timeout_of_capped_queries_is_neutral():
+    breaker = run_timed_out_batch(1000, 1500)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["caller_timeouts"] == 1
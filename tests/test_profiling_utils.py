@@ -0,0 +1,79 @@
+"""Unit tests for scripts/profiling_utils.py."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from scripts.metrics_utils import MetricsMiddleware
+from scripts.profiling_utils import OTHER_ROUTE, RouteAwareExecutor, RouteCPURoute, RouteCPUSampler
+
+BUSY_SECONDS = 0.3
+
+
+def burn(seconds: float = BUSY_SECONDS) -> int:
+    """Spin for seconds of this thread's CPU time."""
+    end = time.thread_time() + seconds
+    spins = 0
+    while time.thread_time() < end:
+        spins += 1
+    return spins
+
+
+@asynccontextmanager
+async def lifespan(app):
+    asyncio.get_running_loop().set_default_executor(RouteAwareExecutor())
+    yield
+
+
+def build_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan)
+    app.router.route_class = RouteCPURoute
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/inline/{chapter}")
+    async def inline(chapter: str):
+        return {"spins": burn()}
+
+    @app.get("/offloaded/{chapter}")
+    async def offloaded(chapter: str):
+        return {"spins": await asyncio.to_thread(burn)}
+
+    @app.get("/sync/{chapter}")
+    def sync(chapter: str):
+        return {"spins": burn()}
+
+    return app
+
+
+@pytest.fixture
+def sampled():
+    """Call each route once under a fast sampler; returns the sampler's CPU seconds per route."""
+    sampler = RouteCPUSampler(interval=0.005).start()
+    try:
+        with TestClient(build_app()) as client:
+            for path in ("/inline/intro", "/offloaded/intro", "/sync/intro"):
+                response = client.get(path)
+                assert response.status_code == 200
+                assert response.json()["spins"] > 0
+    finally:
+        sampler.stop()
+    return sampler.cpu_seconds
+
+
+@pytest.mark.parametrize("route", ["/inline/{chapter}", "/offloaded/{chapter}", "/sync/{chapter}"])
+def test_route_cpu_is_attributed_to_the_route(sampled, route):
+    assert sampled[route] > BUSY_SECONDS / 2
+
+
+def test_worker_thread_cpu_is_not_other(sampled):
+    assert sampled[OTHER_ROUTE] < BUSY_SECONDS / 2
+
+
+def test_sync_route_keeps_its_signature():
+    app = build_app()
+    schema = app.openapi()["paths"]["/sync/{chapter}"]["get"]
+    assert [p["name"] for p in schema["parameters"]] == ["chapter"]
@@ -0,0 +1,231 @@
+"""Unit tests for scripts/resilience_utils.py."""
+
+import contextvars
+import itertools
+import threading
+import time
+
+import pytest
+
+from scripts.resilience_utils import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    Hedger,
+    is_timeout,
+)
+
+
+class ReadTimeout(Exception):
+    """Stands in for an SDK timeout (httpx.ReadTimeout, openai.APITimeoutError)."""
+
+
+class ServerError(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+def timing_out():
+    raise ReadTimeout("timed out")
+
+
+def failing():
+    raise ServerError("unavailable")
+
+
+def bad_request():
+    raise BadRequest("invalid input")
+
+
+def call_with_deadline(breaker: CircuitBreaker, deadline: Deadline, fn) -> None:
+    """One request: ask the deadline for a timeout, then call fn through the breaker."""
+    def request():
+        deadline.timeout("embed")
+        with pytest.raises(Exception):
+            breaker.call(fn)
+
+    contextvars.copy_context().run(request)  # Each request has its own context, as in the server
+
+
+# =============================================================================
+# Circuit breaker states
+# =============================================================================
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker("qdrant", failure_threshold=2, reset_timeout=0.05)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            breaker.call(failing)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "not called")
+    assert breaker.stats()["rejected"] == 1
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "probe") == "probe"
+    stats = breaker.stats()
+    assert stats["state"] == CLOSED
+    assert stats["consecutive_failures"] == 0
+    assert stats["times_opened"] == 1
+
+
+def test_breaker_success_resets_consecutive_failures():
+    breaker = CircuitBreaker("qdrant", failure_threshold=2)
+    with pytest.raises(ServerError):
+        breaker.call(failing)
+    breaker.call(lambda: None)
+    with pytest.raises(ServerError):
+        breaker.call(failing)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker("openai", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ServerError):
+        breaker.call(failing)
+    with pytest.raises(ServerError):
+        breaker.call(failing)  # The half-open probe
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_half_open_admits_one_probe_at_a_time():
+    breaker = CircuitBreaker("cohere", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ServerError):
+        breaker.call(failing)
+
+    breaker.before_call()  # The probe, in flight
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "second")
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_client_errors_do_not_count():
+    breaker = CircuitBreaker("cohere", failure_threshold=1)
+    with pytest.raises(BadRequest):
+        breaker.call(bad_request)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["failures"] == 0
+
+
+# =============================================================================
+# Timeouts of budget-capped calls
+# =============================================================================
+
+def test_timeouts_of_capped_calls_do_not_open_breaker():
+    breaker = CircuitBreaker("cohere", failure_threshold=3)
+    for _ in range(10):
+        call_with_deadline(breaker, Deadline.from_ms(1000, default_ms=20000), timing_out)
+
+    stats = breaker.stats()
+    assert stats["state"] == CLOSED
+    assert stats["failures"] == 0
+    assert stats["caller_timeouts"] == 10
+
+
+def test_timeouts_with_full_budget_open_breaker():
+    breaker = CircuitBreaker("cohere", failure_threshold=3)
+    for _ in range(3):
+        call_with_deadline(breaker, Deadline.from_ms(20000, default_ms=20000), timing_out)
+
+    assert breaker.stats()["state"] == OPEN
+    assert breaker.stats()["caller_timeouts"] == 0
+
+
+def test_other_errors_of_capped_calls_still_count():
+    breaker = CircuitBreaker("cohere", failure_threshold=3)
+    for _ in range(3):
+        call_with_deadline(breaker, Deadline.from_ms(1000, default_ms=20000), failing)
+
+    assert breaker.stats()["state"] == OPEN
+
+
+def test_caller_timeout_releases_half_open_probe():
+    breaker = CircuitBreaker("openai", failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ServerError):
+        breaker.call(failing)
+    assert breaker.state == OPEN
+
+    call_with_deadline(breaker, Deadline.from_ms(500, default_ms=20000), timing_out)
+    assert breaker.stats()["caller_timeouts"] == 1
+    assert breaker.call(lambda: "ok") == "ok"  # Not stuck waiting for the first probe
+    assert breaker.state == CLOSED
+
+
+def test_is_timeout_follows_wrapped_errors():
+    try:
+        try:
+            raise ReadTimeout("read")
+        except ReadTimeout as e:
+            raise RuntimeError("request failed") from e
+    except RuntimeError as wrapped:
+        assert is_timeout(wrapped)
+
+    assert is_timeout(DeadlineExceeded("llm"))
+    assert is_timeout(TimeoutError())
+    assert not is_timeout(ServerError("down"))
+
+
+# =============================================================================
+# Hedged requests
+# =============================================================================
+
+def slow_first_call(delay_s: float):
+    """fn whose first call takes delay_s and later calls return at once, tagged by call number."""
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    def fn():
+        with lock:
+            n = next(counter)
+        if n == 1:
+            time.sleep(delay_s)
+        return n
+    return fn
+
+
+def test_fast_calls_are_not_hedged():
+    hedger = Hedger("qdrant", min_delay_ms=50, max_delay_ms=50)
+    assert [hedger.call(lambda x: x * 2, i) for i in range(3)] == [0, 2, 4]
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_slow_call_is_hedged_and_backup_wins():
+    hedger = Hedger("qdrant", min_delay_ms=10, max_delay_ms=20, max_ratio=1.0)
+    assert hedger.call(slow_first_call(0.5)) == 2  # The backup's answer
+
+    stats = hedger.stats()
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+
+
+def test_hedging_is_capped_by_max_ratio():
+    hedger = Hedger("qdrant", min_delay_ms=10, max_delay_ms=20, max_ratio=0.0)
+    assert hedger.call(slow_first_call(0.1)) == 1  # Waits for the primary
+    assert hedger.stats()["hedged"] == 0
+
+
+def test_hedged_call_raises_when_both_attempts_fail():
+    hedger = Hedger("cohere", min_delay_ms=10, max_delay_ms=20, max_ratio=1.0)
+
+    def slow_failure():
+        time.sleep(0.05)
+        raise ServerError("unavailable")
+
+    with pytest.raises(ServerError):
+        hedger.call(slow_failure)
+    assert hedger.stats()["hedge_wins"] == 0
@@ -0,0 +1,115 @@
+"""Unit tests for scripts/search_utils.py."""
+
+import numpy as np
+import pytest
+
+from scripts.search_utils import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def doc(chunk_id, snippet, slug="intro"):
+    return {"chunk_id": chunk_id, "snippet": snippet, "source_path": f"docs/{slug}.md", "slug": slug}
+
+
+@pytest.fixture
+def index():
+    # Lengths 2, 3 and 2 terms: average 7/3
+    return BM25Index([
+        doc("c0", "Robot arm"),
+        doc("c1", "robot robot leg", slug="locomotion"),
+        doc("c2", "Wheel base", slug="locomotion"),
+    ])
+
+
+# =============================================================================
+# BM25
+# =============================================================================
+
+def test_tokenize_drops_stopwords_and_keeps_technical_terms():
+    assert tokenize("What is the sim-to-real gap in ROS v2.0?") == ["sim-to-real", "gap", "ros", "v2.0"]
+
+
+def test_bm25_scores_match_hand_computed_values(index):
+    # idf(robot) = ln(1 + (3 - 2 + 0.5) / (2 + 0.5)) = ln(1.6) = 0.470004
+    # idf(leg)   = ln(1 + (3 - 1 + 0.5) / (1 + 0.5)) = 0.980829
+    # norm(c0) = 1.2 * (0.25 + 0.75 * 2 / (7/3)) = 1.071429
+    # norm(c1) = 1.2 * (0.25 + 0.75 * 3 / (7/3)) = 1.457143
+    # c0: 0.470004 * 1 * 2.2 / (1 + 1.071429)                         = 0.499176
+    # c1: 0.470004 * 2 * 2.2 / (2 + 1.457143) + 0.980829 * 2.2 / (1 + 1.457143) = 1.476371
+    scores = index.score("robot leg")
+    np.testing.assert_allclose(scores, [0.499176, 1.476371, 0.0], rtol=1e-5)
+    assert index.term_idf()["robot"] == pytest.approx(0.470004, rel=1e-5)
+
+
+def test_bm25_search_ranks_and_normalizes(index):
+    results = index.search("robot leg", top_k=5)
+
+    assert [r["chunk_id"] for r in results] == ["c1", "c0"]  # c2 has no query term
+    assert results[0]["score"] == 1.0
+    assert results[1]["score"] == pytest.approx(0.499176 / 1.476371, rel=1e-5)
+
+
+def test_bm25_search_without_matches(index):
+    assert index.search("humanoid", top_k=5) == []
+    assert index.search("the and of", top_k=5) == []  # Only stopwords
+
+
+def test_filter_mask(index):
+    np.testing.assert_array_equal(index.filter_mask({"slug": ["locomotion"]}), [False, True, True])
+    np.testing.assert_array_equal(index.filter_mask({"slug": ["intro", "locomotion"]}), [True, True, True])
+    np.testing.assert_array_equal(
+        index.filter_mask({"slug": ["locomotion"], "chunk_id": ["c0", "c2"]}), [False, False, True]
+    )
+    np.testing.assert_array_equal(index.filter_mask({"slug": ["missing"]}), [False, False, False])
+
+
+def test_filtered_search(index):
+    results = index.search("robot", top_k=5, filters={"slug": ["intro"]})
+    assert [r["chunk_id"] for r in results] == ["c0"]
+    assert results[0]["score"] == 1.0
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.save(tmp_path)
+    loaded = BM25Index.load(tmp_path)
+
+    np.testing.assert_allclose(loaded.score("robot leg"), index.score("robot leg"))
+    assert loaded.search("wheel", top_k=1)[0]["chunk_id"] == "c2"
+    np.testing.assert_array_equal(loaded.filter_mask({"slug": ["intro"]}), [True, False, False])
+
+
+# =============================================================================
+# Reciprocal rank fusion
+# =============================================================================
+
+def ranked(*chunk_ids):
+    return [{"chunk_id": chunk_id, "score": 1.0 / (i + 1)} for i, chunk_id in enumerate(chunk_ids)]
+
+
+def test_rrf_orders_by_summed_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([ranked("a", "b", "c"), ranked("c", "d")], top_k=10, k=1)
+
+    # a: 1/2; b: 1/3; c: 1/4 + 1/2; d: 1/3; scaled by the best possible 2/2
+    assert [r["chunk_id"] for r in fused] == ["c", "a", "b", "d"]
+    assert [r["score"] for r in fused] == pytest.approx([0.75, 0.5, 1 / 3, 1 / 3])
+
+
+def test_rrf_ties_keep_first_seen_order():
+    fused = reciprocal_rank_fusion([ranked("a", "b", "c"), ranked("b", "a", "d")], top_k=10)
+
+    # a and b tie on 1/61 + 1/62, c and d on 1/63: first seen wins each tie
+    assert [r["chunk_id"] for r in fused] == ["a", "b", "c", "d"]
+    assert fused[0]["score"] == fused[1]["score"]
+    assert fused[2]["score"] == fused[3]["score"]
+
+
+def test_rrf_top_in_every_list_scores_one_and_keeps_first_dict():
+    first = [{"chunk_id": "a", "snippet": "dense"}]
+    second = [{"chunk_id": "a", "snippet": "sparse"}]
+    fused = reciprocal_rank_fusion([first, second], top_k=1)
+
+    assert fused == [{"chunk_id": "a", "snippet": "dense", "score": pytest.approx(1.0)}]
+
+
+def test_rrf_top_k_and_empty_lists():
+    assert len(reciprocal_rank_fusion([ranked("a", "b", "c")], top_k=2)) == 2
+    assert reciprocal_rank_fusion([[], []], top_k=5) == []
@@ -0,0 +1,119 @@
+"""Unit tests for scripts/shared_data_utils.py."""
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    PointStruct,
+    VectorParams,
+)
+
+from scripts.shared_data_utils import SharedSnapshot, VectorTable, build_snapshot, collection_version
+
+
+# =============================================================================
+# Vector lookup
+# =============================================================================
+
+@pytest.fixture
+def table():
+    point_ids = np.array([3, 10, 2**63 + 5], dtype=np.uint64)  # Sorted, one beyond the int64 range
+    vectors = np.array([[0.3, 0.0], [1.0, 0.0], [0.5, 0.5]], dtype=np.float32)
+    return VectorTable(point_ids, vectors)
+
+
+def test_lookup_returns_rows_in_request_order(table):
+    rows, missing = table.lookup([10, 3, 2**63 + 5, 10])
+
+    assert missing == []
+    np.testing.assert_allclose(np.stack(rows), [[1.0, 0.0], [0.3, 0.0], [0.5, 0.5], [1.0, 0.0]])
+
+
+def test_lookup_reports_missing_ids(table):
+    uuid = "5c56c793-69f3-4fbf-87e6-c4bf54c28c26"
+    rows, missing = table.lookup([4, 10, 11, uuid, -1, 0])
+
+    assert [row is None for row in rows] == [True, False, True, True, True, True]
+    assert missing == [4, 11, uuid, -1, 0]
+
+
+def test_lookup_past_the_last_id(table):
+    rows, missing = table.lookup([2**64 - 1])
+    assert rows == [None]
+    assert missing == [2**64 - 1]
+
+
+def test_lookup_in_empty_table():
+    table = VectorTable(np.array([], dtype=np.uint64), np.zeros((0, 2), dtype=np.float32))
+    assert len(table) == 0
+    assert table.lookup([1, 2]) == ([None, None], [1, 2])
+    assert table.lookup([]) == ([], [])
+
+
+# =============================================================================
+# Snapshot versions
+# =============================================================================
+
+def create(qdrant: QdrantClient, name: str, points: int) -> None:
+    qdrant.create_collection(name, vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    qdrant.upsert(name, [
+        PointStruct(id=i, vector=[1.0, float(i)], payload={"chunk_id": f"c{i}", "text": f"robot {i}"})
+        for i in range(points)
+    ])
+
+
+def point_alias(qdrant: QdrantClient, collection_name: str) -> None:
+    operations = [CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name,
+                                                                alias_name="book_vectors"))]
+    if collection_version(qdrant, "book_vectors") != "book_vectors":
+        operations.insert(0, DeleteAliasOperation(delete_alias=DeleteAlias(alias_name="book_vectors")))
+    qdrant.update_collection_aliases(operations)
+
+
+@pytest.fixture
+def qdrant():
+    client = QdrantClient(":memory:")
+    create(client, "book_vectors_v1", 4)
+    create(client, "book_vectors_v2", 4)
+    point_alias(client, "book_vectors_v1")
+    yield client
+    client.close()
+
+
+def test_snapshot_records_alias_target(qdrant, tmp_path):
+    manifest = build_snapshot(qdrant, "book_vectors", tmp_path, [])
+    snapshot = SharedSnapshot.open(tmp_path)
+
+    assert manifest["collection_version"] == "book_vectors_v1"
+    assert snapshot.stats()["collection_version"] == "book_vectors_v1"
+    assert snapshot.is_current(qdrant)
+    rows, missing = snapshot.vectors.lookup([2])
+    np.testing.assert_allclose(rows[0], np.array([1.0, 2.0]) / np.sqrt(5), rtol=1e-6)  # Cosine: stored normalized
+    assert missing == []
+
+
+def test_snapshot_is_stale_after_alias_switch(qdrant, tmp_path):
+    build_snapshot(qdrant, "book_vectors", tmp_path, [])
+    snapshot = SharedSnapshot.open(tmp_path)
+
+    point_alias(qdrant, "book_vectors_v2")  # Same point ids, same count
+    assert not snapshot.is_current(qdrant)
+
+
+def test_snapshot_is_stale_after_ingest(qdrant, tmp_path):
+    build_snapshot(qdrant, "book_vectors", tmp_path, [])
+    snapshot = SharedSnapshot.open(tmp_path)
+
+    qdrant.upsert("book_vectors_v1", [PointStruct(id=99, vector=[0.0, 1.0], payload={"chunk_id": "new"})])
+    assert not snapshot.is_current(qdrant)
+
+
+def test_collection_without_alias_is_its_own_version(qdrant, tmp_path):
+    assert collection_version(qdrant, "book_vectors_v2") == "book_vectors_v2"
+    build_snapshot(qdrant, "book_vectors_v2", tmp_path, [])
+    assert SharedSnapshot.open(tmp_path).is_current(qdrant)
@@ -0,0 +1,89 @@
+"""Unit tests for scripts/store-metadata.py (loaded by path: the file name is hyphenated)."""
+
+import csv
+import io
+import re
+
+import psycopg2.extras
+import pytest
+
+from benchmarks.common import load_script
+
+store_metadata = load_script("store-metadata.py")
+
+
+class RecordingCursor:
+    """Cursor stand-in that records statements and reads COPY data the way psycopg2 does."""
+
+    def __init__(self):
+        self.statements = []
+        self.copied = ""
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def copy_expert(self, sql, file, size=8192):
+        self.statements.append((sql, None))
+        while True:
+            data = file.read(size)
+            if not data:
+                break
+            self.copied += data
+
+
+def chunk(chunk_id, text, order_index=0):
+    return {"chunk_id": chunk_id, "source_path": "docs/intro.md", "slug": "intro",
+            "title": "Intro", "order_index": order_index, "text": text}
+
+
+CHUNKS = [chunk("c1", "first"), chunk("c2", "only"), chunk("c1", "second"), chunk("c1", "last, with comma")]
+
+
+def upserted_by_copy(chunks):
+    """Rows the COPY path's upsert keeps: staged rows numbered by seq, then DISTINCT ON as its ORDER BY says."""
+    cur = RecordingCursor()
+    assert store_metadata.store_metadata_copy(cur, iter(chunks)) == len(chunks)
+
+    create_sql, upsert_sql = cur.statements[0][0], cur.statements[-1][0]
+    assert re.search(r"seq\s+BIGSERIAL", create_sql)
+    assert "seq" not in cur.statements[1][0]  # Not in the COPY column list: filled by the sequence
+    assert re.search(r"DISTINCT ON \(chunk_id\)", upsert_sql)
+    assert re.search(r"ORDER BY chunk_id, seq DESC", upsert_sql)
+
+    staged = [tuple(row) for row in csv.reader(io.StringIO(cur.copied))]
+    ordered = sorted(enumerate(staged, start=1), key=lambda item: (item[1][0], -item[0]))
+    kept = {}
+    for _, row in ordered:
+        kept.setdefault(row[0], row)
+    return kept
+
+
+def upserted_by_values(chunks, monkeypatch):
+    sent = []
+    monkeypatch.setattr(psycopg2.extras, "execute_values", lambda cur, sql, rows, **kwargs: sent.extend(rows))
+    store_metadata.store_metadata_values(RecordingCursor(), chunks)
+    return {row[0]: tuple(str(value) for value in row) for row in sent}
+
+
+def test_copy_keeps_the_last_row_of_a_duplicated_chunk_id(monkeypatch):
+    kept = upserted_by_copy(CHUNKS)
+
+    assert kept["c1"][-1] == "last, with comma"
+    assert kept["c2"][-1] == "only"
+    assert kept == upserted_by_values(CHUNKS, monkeypatch)
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 65536])
+def test_copy_stream_renders_every_row(read_size):
+    stream = store_metadata.CopyRowStream(map(store_metadata.chunk_to_row, CHUNKS))
+    data = ""
+    while True:
+        part = stream.read(read_size)
+        if not part:
+            break
+        assert len(part) <= read_size
+        data += part
+
+    assert stream.rows_written == len(CHUNKS)
+    assert [row[-1] for row in csv.reader(io.StringIO(data))] == ["first", "only", "second", "last, with comma"]